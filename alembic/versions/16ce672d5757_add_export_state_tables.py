@@ -0,0 +1,45 @@
+"""Add export state tables for incremental Google Sheets export
+
+Revision ID: 16ce672d5757
+Revises: e85851cf3006
+Create Date: 2026-10-19 17:12:08.431907
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '16ce672d5757'
+down_revision: Union[str, None] = 'e85851cf3006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Таблицы пустые: первый экспорт после миграции перезапишет листы
+    # целиком и сохранит состояние.
+    op.create_table(
+        'export_state',
+        sa.Column('sheet', sa.String(), nullable=False),
+        sa.Column('high_water', sa.BigInteger(), nullable=True),
+        sa.Column('rows_count', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('sheet'),
+    )
+    op.create_table(
+        'exported_row',
+        sa.Column('sheet', sa.String(), nullable=False),
+        sa.Column('row_key', sa.String(), nullable=False),
+        sa.Column('row_number', sa.Integer(), nullable=False),
+        sa.Column('row_hash', sa.String(), nullable=False),
+        sa.PrimaryKeyConstraint('sheet', 'row_key'),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('exported_row')
+    op.drop_table('export_state')
@@ -0,0 +1,61 @@
+"""Add pair_member table
+
+Revision ID: 2c2513416116
+Revises: da9d5fa9c168
+Create Date: 2026-10-19 12:03:17.842106
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2c2513416116'
+down_revision: Union[str, None] = 'da9d5fa9c168'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'pair_member',
+        sa.Column('pair_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('round_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['pair_id'], ['pair.id'],
+                                ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('pair_id', 'user_id'),
+    )
+
+    # Пары одного раунда создаются в одной транзакции и получают
+    # одинаковое created_at (now() - время начала транзакции),
+    # поэтому номер раунда восстанавливается по created_at.
+    op.execute("""
+        INSERT INTO pair_member (pair_id, user_id, round_id)
+        SELECT m.pair_id, m.user_id, r.round_id
+        FROM (
+            SELECT id AS pair_id, user1_id AS user_id FROM pair
+            UNION
+            SELECT id, user2_id FROM pair
+            UNION
+            SELECT id, user3_id FROM pair WHERE user3_id IS NOT NULL
+        ) AS m
+        JOIN (
+            SELECT id,
+                   dense_rank() OVER (ORDER BY created_at) AS round_id
+            FROM pair
+        ) AS r ON r.id = m.pair_id
+    """)
+
+    op.create_index('ix_pair_member_user_round', 'pair_member',
+                    ['user_id', 'round_id', 'pair_id'])
+    op.create_index('ix_pair_member_round_id', 'pair_member', ['round_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_pair_member_round_id', table_name='pair_member')
+    op.drop_index('ix_pair_member_user_round', table_name='pair_member')
+    op.drop_table('pair_member')
@@ -0,0 +1,35 @@
+"""Add partial index for expiring pauses
+
+Revision ID: 626f61cc809b
+Revises: 875c6b7b4d97
+Create Date: 2026-10-19 15:02:48.519734
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '626f61cc809b'
+down_revision: Union[str, None] = '875c6b7b4d97'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_user_pause_until', 'user', ['pause_until'],
+            postgresql_concurrently=True,
+            postgresql_where=sa.text('pause_until IS NOT NULL'),
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_user_pause_until', table_name='user',
+                      postgresql_concurrently=True,
+                      if_exists=True)
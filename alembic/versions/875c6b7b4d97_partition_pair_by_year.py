@@ -0,0 +1,144 @@
+"""Partition pair by created_at year and add pair archive tables
+
+Revision ID: 875c6b7b4d97
+Revises: 2c2513416116
+Create Date: 2026-10-19 13:41:05.227310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '875c6b7b4d97'
+down_revision: Union[str, None] = '2c2513416116'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+PAIR_INDEXES = [
+    ('ix_pair_user1_id', ['user1_id'], None),
+    ('ix_pair_user2_id', ['user2_id'], None),
+    ('ix_pair_user3_id', ['user3_id'], 'user3_id IS NOT NULL'),
+    ('ix_pair_created_at', ['created_at'], None),
+]
+
+
+def pair_columns() -> list[sa.Column]:
+    return [
+        sa.Column('id', sa.Integer(), nullable=False,
+                  server_default=sa.text("nextval('pair_id_seq'::regclass)")),
+        sa.Column('created_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.Column('user1_id', sa.Integer(), nullable=False),
+        sa.Column('user2_id', sa.Integer(), nullable=False),
+        sa.Column('user3_id', sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(['user1_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['user2_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['user3_id'], ['user.id']),
+    ]
+
+
+def replace_pair_table(primary_key: list[str], **table_kw) -> None:
+    """
+    Пересоздает pair с тем же содержимым: старая таблица
+    переименовывается, данные копируются, последовательность id
+    переходит к новой таблице.
+    """
+    for name, _, _ in PAIR_INDEXES:
+        op.drop_index(name, table_name='pair', if_exists=True)
+    op.rename_table('pair', 'pair_old')
+    op.execute('ALTER TABLE pair_old RENAME CONSTRAINT pair_pkey '
+               'TO pair_old_pkey')
+
+    op.create_table('pair', *pair_columns(),
+                    sa.PrimaryKeyConstraint(*primary_key, name='pair_pkey'),
+                    **table_kw)
+    if table_kw.get('postgresql_partition_by'):
+        create_year_partitions()
+
+    op.execute('INSERT INTO pair (id, created_at, user1_id, user2_id, '
+               'user3_id) SELECT id, created_at, user1_id, user2_id, '
+               'user3_id FROM pair_old')
+    op.execute('ALTER SEQUENCE pair_id_seq OWNED BY pair.id')
+    op.drop_table('pair_old')
+
+    for name, columns, where in PAIR_INDEXES:
+        op.create_index(name, 'pair', columns,
+                        postgresql_where=sa.text(where) if where else None)
+
+
+def create_year_partitions() -> None:
+    """
+    Секции по годам: от года самой старой пары до следующего года,
+    плюс секция по умолчанию. Дальше секции создает задача
+    pair_partitions_maintenance.
+    """
+    op.execute('CREATE TABLE pair_default PARTITION OF pair DEFAULT')
+    op.execute("""
+        DO $$
+        DECLARE
+            first_year int;
+            last_year int := extract(year FROM now() AT TIME ZONE 'UTC') + 1;
+        BEGIN
+            SELECT coalesce(
+                extract(year FROM min(created_at) AT TIME ZONE 'UTC'),
+                last_year - 1)
+            INTO first_year FROM pair_old;
+            FOR y IN first_year..last_year LOOP
+                EXECUTE format(
+                    'CREATE TABLE pair_y%s PARTITION OF pair '
+                    'FOR VALUES FROM (%L) TO (%L)',
+                    y, y || '-01-01 00:00:00+00',
+                    (y + 1) || '-01-01 00:00:00+00');
+            END LOOP;
+        END
+        $$
+    """)
+
+
+def upgrade() -> None:
+    # Секционированную таблицу можно сослать внешним ключом только по
+    # ключу, включающему created_at, поэтому связь pair_member -> pair
+    # поддерживается приложением.
+    op.drop_constraint('pair_member_pair_id_fkey', 'pair_member',
+                       type_='foreignkey')
+
+    replace_pair_table(['id', 'created_at'],
+                       postgresql_partition_by='RANGE (created_at)')
+
+    op.create_table(
+        'pair_history_summary',
+        sa.Column('user_low_id', sa.Integer(), nullable=False),
+        sa.Column('user_high_id', sa.Integer(), nullable=False),
+        sa.Column('meetings', sa.Integer(), nullable=False),
+        sa.Column('last_met_at', sa.DateTime(timezone=True), nullable=False),
+        sa.CheckConstraint('user_low_id < user_high_id',
+                           name='pair_history_summary_ordered'),
+        sa.ForeignKeyConstraint(['user_low_id'], ['user.id']),
+        sa.ForeignKeyConstraint(['user_high_id'], ['user.id']),
+        sa.PrimaryKeyConstraint('user_low_id', 'user_high_id'),
+    )
+    op.create_table(
+        'pair_archive',
+        sa.Column('partition_name', sa.String(), nullable=False),
+        sa.Column('pairs_count', sa.Integer(), nullable=False),
+        sa.Column('detached', sa.Boolean(), nullable=False),
+        sa.Column('archived_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('partition_name'),
+    )
+
+
+def downgrade() -> None:
+    # Пары из отключенных секций в pair не возвращаются: их таблицы
+    # остаются в БД, и перенести их можно вручную.
+    op.drop_table('pair_archive')
+    op.drop_table('pair_history_summary')
+
+    replace_pair_table(['id'])
+
+    op.create_foreign_key('pair_member_pair_id_fkey', 'pair_member', 'pair',
+                          ['pair_id'], ['id'], ondelete='CASCADE')
@@ -0,0 +1,52 @@
+"""Add secondary indexes for pair history and user lists
+
+Revision ID: da9d5fa9c168
+Revises: 1168bfcc8d28
+Create Date: 2026-10-19 10:12:41.304518
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'da9d5fa9c168'
+down_revision: Union[str, None] = '1168bfcc8d28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# Индексы строятся через CREATE INDEX CONCURRENTLY, чтобы не блокировать
+# запись в таблицы на время построения. Такой запрос нельзя выполнять
+# внутри транзакции, поэтому используется autocommit_block.
+INDEXES = [
+    ('ix_pair_user1_id', 'pair', ['user1_id'], None),
+    ('ix_pair_user2_id', 'pair', ['user2_id'], None),
+    ('ix_pair_user3_id', 'pair', ['user3_id'], 'user3_id IS NOT NULL'),
+    ('ix_pair_created_at', 'pair', ['created_at'], None),
+    ('ix_user_list_order', 'user', ['last_name', 'id'],
+     'is_admin IS false AND is_blocked IS false'),
+    ('ix_user_active_telegram_id', 'user', ['telegram_id'],
+     'is_active IS true'),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_concurrently=True,
+                postgresql_where=sa.text(where) if where else None,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table,
+                          postgresql_concurrently=True,
+                          if_exists=True)
@@ -0,0 +1,57 @@
+"""Add stats counters table
+
+Revision ID: e85851cf3006
+Revises: 626f61cc809b
+Create Date: 2026-10-19 16:27:33.904215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e85851cf3006'
+down_revision: Union[str, None] = '626f61cc809b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'stats',
+        sa.Column('key', sa.String(), nullable=False),
+        sa.Column('value', sa.BigInteger(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True),
+                  server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('key'),
+    )
+
+    # Начальные значения счетчиков. Дальше их поддерживает приложение.
+    # Встречи из отключенных архивных секций pair учитываются
+    # по pair_archive.
+    op.execute("""
+        INSERT INTO stats (key, value)
+        SELECT 'all_users', count(*) FROM "user"
+        UNION ALL
+        SELECT 'active_users', count(*) FROM "user" WHERE is_active
+        UNION ALL
+        SELECT 'listed_users', count(*) FROM "user"
+            WHERE is_admin IS false AND is_blocked IS false
+        UNION ALL
+        SELECT 'paused_users', count(*) FROM "user"
+            WHERE pause_until IS NOT NULL
+        UNION ALL
+        SELECT 'meetings_total',
+            (SELECT count(*) FROM pair)
+            + (SELECT coalesce(sum(pairs_count), 0) FROM pair_archive
+               WHERE detached)
+        UNION ALL
+        SELECT 'paired_last_round', count(*) FROM pair_member
+            WHERE round_id = (SELECT max(round_id) FROM pair_member)
+    """)
+
+
+def downgrade() -> None:
+    op.drop_table('stats')
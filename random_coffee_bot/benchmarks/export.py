@@ -0,0 +1,215 @@
+"""
+Время и количество запросов к API при выгрузке в Гугл Таблицу.
+
+Выгрузка идет в FakeSheetsClient: таблица в памяти с имитацией
+задержки сети и квоты Google, поэтому ключ сервис-аккаунта не нужен.
+Для каждого размера замеряются три прогона: полная выгрузка, повторная
+без изменений и повторная после изменения 1% юзеров и добавления 1% пар.
+
+Запуск:
+    python -m random_coffee_bot.benchmarks.export --sizes 1000 10000
+    python -m random_coffee_bot.benchmarks.export --latency 0.2 \\
+        --quota 60 --server-quota 60 --sizes 1000 10000 100000
+
+По умолчанию квота клиента не ограничивает запись, чтобы замерить
+накладные расходы самой выгрузки; с --quota 60 время будет близко к
+реальному.
+
+По умолчанию база - SQLite в памяти. С --db-url postgresql+asyncpg://...
+таблицы создаются во временной схеме, которая удаляется после прогона,
+поэтому таблицы бота в этой базе не затрагиваются. Другие базы, в том
+числе файлы SQLite, не поддерживаются.
+"""
+import argparse
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, UTC
+from typing import Any, AsyncIterator, Optional
+
+from sqlalchemy import event, insert, make_url, text, update
+from sqlalchemy.ext.asyncio import (AsyncEngine,
+                                    AsyncSession,
+                                    async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.pool import StaticPool
+
+from ..config import GoogleSheetConfig
+from ..database.backend import create_sqlite_schema
+from ..database.models import Base, Pair, User
+from ..services import admin_service as adm
+from ..utils.fake_sheets import FakeSheetsBackend, FakeSheetsClient
+from ..utils.google_sheets import set_sheets_client
+
+
+START = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+async def seed(engine: AsyncEngine, amount: int) -> None:
+    """amount юзеров и amount пар из соседних юзеров."""
+    if not await create_sqlite_schema(engine):
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+    async with engine.begin() as conn:
+        await conn.execute(insert(User), [
+            {'telegram_id': 10_000_000 + i,
+             'username': f'user{i}',
+             'first_name': f'Имя{i}',
+             'last_name': f'Фамилия{i}',
+             'pairing_interval': (2, 4, None)[i % 3]}
+            for i in range(amount)
+        ])
+        await add_pairs(conn, amount, 0, amount)
+
+
+async def add_pairs(conn: Any, users: int, first: int, amount: int) -> None:
+    await conn.execute(insert(Pair), [
+        {'user1_id': i % users + 1,
+         'user2_id': (i + 1) % users + 1,
+         'user3_id': (i + 2) % users + 1 if i % 7 == 0 else None,
+         'created_at': START + timedelta(minutes=i)}
+        for i in range(first, first + amount)
+    ])
+
+
+async def change(engine: AsyncEngine, amount: int) -> None:
+    """Меняет имя каждому сотому юзеру и добавляет amount // 100 пар."""
+    async with engine.begin() as conn:
+        await conn.execute(update(User)
+                           .where(User.id % 100 == 0)
+                           .values(first_name=User.first_name + '!'))
+        await add_pairs(conn, amount, amount, max(amount // 100, 1))
+
+
+async def export(session_maker: async_sessionmaker[AsyncSession]
+                 ) -> tuple[float, int, int]:
+    """
+    Выгружает так же, как export_jobs.run_export: чтение идет в
+    отдельной сессии, а состояние экспорта коммитится в своей.
+    """
+    async with session_maker() as session, \
+            session_maker() as read_session:
+        started_at = time.perf_counter()
+        users = await adm.fetch_all_users(read_session)
+        users_rows = await adm.export_users_to_gsheet(session, users)
+        pairs_rows = await adm.export_pairs_to_gsheet(session, read_session)
+        await session.commit()
+        return time.perf_counter() - started_at, users_rows, pairs_rows
+
+
+def report(phase: str, seconds: float, users_rows: int, pairs_rows: int,
+           backend: FakeSheetsBackend) -> None:
+    calls = ', '.join(f'{method}={count}'
+                      for method, count in sorted(backend.calls.items()))
+    errors = ', '.join(f'{status}={count}'
+                       for status, count in sorted(backend.errors.items()))
+    print(f'  {phase:<14}{seconds:>9.2f} с  строк {users_rows}/{pairs_rows}'
+          f'  ячеек {backend.cells_written}  запросов {backend.total_calls}'
+          f' ({calls})' + (f'  ошибок: {errors}' if errors else ''))
+    backend.calls.clear()
+    backend.errors.clear()
+    backend.cells_written = 0
+
+
+def check_db_url(db_url: str) -> None:
+    """
+    Пропускает только базы, которые бенчмарк может безопасно удалить за
+    собой: SQLite в памяти и PostgreSQL (через временную схему).
+    """
+    url = make_url(db_url)
+    if url.get_backend_name() == 'sqlite':
+        if url.database not in (None, '', ':memory:'):
+            raise ValueError('Для SQLite поддерживается только база '
+                             'в памяти: sqlite+aiosqlite://')
+    elif url.get_backend_name() != 'postgresql':
+        raise ValueError(f'Неподдерживаемая база: {url.get_backend_name()}')
+
+
+@asynccontextmanager
+async def benchmark_engine(db_url: str) -> AsyncIterator[AsyncEngine]:
+    """
+    Движок для одного прогона. В PostgreSQL создает временную схему,
+    делает ее единственной в search_path и в конце удаляет только ее.
+    """
+    check_db_url(db_url)
+    if make_url(db_url).get_backend_name() == 'sqlite':
+        engine = create_async_engine(db_url, poolclass=StaticPool)
+        try:
+            yield engine
+        finally:
+            await engine.dispose()
+        return
+
+    schema = f'export_benchmark_{uuid.uuid4().hex[:12]}'
+    admin_engine = create_async_engine(db_url)
+    async with admin_engine.begin() as conn:
+        await conn.execute(text(f'CREATE SCHEMA {schema}'))
+    engine = create_async_engine(db_url)
+
+    @event.listens_for(engine.sync_engine, 'connect')
+    def set_search_path(dbapi_connection, connection_record):
+        autocommit = dbapi_connection.autocommit
+        dbapi_connection.autocommit = True
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f'SET SESSION search_path = {schema}')
+        cursor.close()
+        dbapi_connection.autocommit = autocommit
+
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+        async with admin_engine.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA {schema} CASCADE'))
+        await admin_engine.dispose()
+
+
+async def run(db_url: str, size: int, config: GoogleSheetConfig,
+              latency: float, server_quota: Optional[int]) -> None:
+    backend = FakeSheetsBackend(latency=latency,
+                                quota_per_minute=server_quota)
+    client = FakeSheetsClient(config, backend)
+    set_sheets_client(client)
+    try:
+        async with benchmark_engine(db_url) as engine:
+            session_maker = async_sessionmaker(engine,
+                                               expire_on_commit=False)
+            await seed(engine, size)
+            print(f'Юзеров и пар: {size}')
+            report('полная', *await export(session_maker), backend)
+            report('без изменений', *await export(session_maker), backend)
+            await change(engine, size)
+            report('изменения', *await export(session_maker), backend)
+    finally:
+        client.close()
+
+
+async def main(args: argparse.Namespace) -> None:
+    config = GoogleSheetConfig(
+        sheet_id='benchmark', backend='fake', credentials_file='',
+        max_workers=2, write_quota_per_minute=args.quota,
+        chunk_rows=args.chunk_rows, max_retries=5)
+    for size in args.sizes:
+        await run(args.db_url, size, config, args.latency,
+                  args.server_quota)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('--db-url', default='sqlite+aiosqlite://')
+    parser.add_argument('--sizes', type=int, nargs='+',
+                        default=[1_000, 10_000, 100_000])
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='задержка одного запроса к API, с')
+    parser.add_argument('--quota', type=int, default=1_000_000,
+                        help='квота записи клиента в минуту')
+    parser.add_argument('--server-quota', type=int, default=None,
+                        help='квота «сервера» в минуту, сверх нее - 429')
+    parser.add_argument('--chunk-rows', type=int, default=500)
+    args = parser.parse_args()
+    try:
+        check_db_url(args.db_url)
+    except ValueError as e:
+        parser.error(str(e))
+    asyncio.run(main(args))
@@ -10,6 +10,15 @@ from .utils.timeparse import parse_iso_to_utc, TimeParseError
 @dataclass
 class DatabaseConfig:
     db_url: str
+    replica_url: str | None
+    pool_size: int
+    max_overflow: int
+    pool_pre_ping: bool
+    pool_recycle: int
+    statement_cache_size: int
+    statement_timeout_ms: int
+    slow_query_ms: int
+    handler_query_warn: int
 
 
 @dataclass
@@ -23,6 +32,12 @@ class TgBot:
 @dataclass
 class GoogleSheetConfig:
     sheet_id: str
+    backend: str
+    credentials_file: str
+    max_workers: int
+    write_quota_per_minute: int
+    chunk_rows: int
+    max_retries: int
 
 
 @dataclass
@@ -36,6 +51,26 @@ class BootstrapSettings:
     first_pairing_at: datetime
 
 
+@dataclass
+class ThrottlingConfig:
+    rate_limit: int
+    period: float
+    duplicate_window: float
+
+
+@dataclass
+class UpdatesConfig:
+    max_concurrency: int
+    max_pending: int
+
+
+@dataclass
+class MaintenanceConfig:
+    pair_partitions_ahead_years: int
+    pair_archive_after_years: int
+    pair_archive_detach: bool
+
+
 @dataclass
 class Config:
     tg_bot: TgBot
@@ -43,6 +78,9 @@ class Config:
     g_sheet: GoogleSheetConfig
     time: TimeConfig
     bs_settings: BootstrapSettings
+    throttling: ThrottlingConfig
+    updates: UpdatesConfig
+    maintenance: MaintenanceConfig
 
 
 def load_config(path: str | None = None) -> Config:
@@ -76,10 +114,27 @@ def load_config(path: str | None = None) -> Config:
             admin_username=env('ADMIN_TG_USERNAME')
         ),
         db=DatabaseConfig(
-            db_url=env('DATABASE_URL')
+            db_url=env('DATABASE_URL'),
+            replica_url=env('DATABASE_REPLICA_URL', None) or None,
+            pool_size=env.int('DB_POOL_SIZE', 5),
+            max_overflow=env.int('DB_MAX_OVERFLOW', 5),
+            pool_pre_ping=env.bool('DB_POOL_PRE_PING', True),
+            pool_recycle=env.int('DB_POOL_RECYCLE', 1800),
+            statement_cache_size=env.int('DB_STATEMENT_CACHE_SIZE', 100),
+            statement_timeout_ms=env.int('DB_STATEMENT_TIMEOUT_MS', 30000),
+            slow_query_ms=env.int('DB_SLOW_QUERY_MS', 200),
+            handler_query_warn=env.int('DB_HANDLER_QUERY_WARN', 20)
         ),
         g_sheet=GoogleSheetConfig(
-            sheet_id=env('GOOGLE_SHEET_ID')
+            sheet_id=env('GOOGLE_SHEET_ID'),
+            backend=env('GOOGLE_SHEETS_BACKEND', 'google'),
+            credentials_file=env('GOOGLE_CREDENTIALS_FILE',
+                                 'random_coffee_bot/credentials.json'),
+            max_workers=env.int('GOOGLE_SHEETS_MAX_WORKERS', 2),
+            write_quota_per_minute=env.int(
+                'GOOGLE_SHEETS_WRITE_QUOTA_PER_MINUTE', 60),
+            chunk_rows=env.int('GOOGLE_SHEETS_CHUNK_ROWS', 500),
+            max_retries=env.int('GOOGLE_SHEETS_MAX_RETRIES', 5)
         ),
         time=TimeConfig(
             name=tz_name,
@@ -87,5 +142,20 @@ def load_config(path: str | None = None) -> Config:
         ),
         bs_settings=BootstrapSettings(
             first_pairing_at=first_pairing_at
+        ),
+        throttling=ThrottlingConfig(
+            rate_limit=env.int('THROTTLE_RATE_LIMIT', 5),
+            period=env.float('THROTTLE_PERIOD', 3.0),
+            duplicate_window=env.float('THROTTLE_DUPLICATE_WINDOW', 1.0)
+        ),
+        updates=UpdatesConfig(
+            max_concurrency=env.int('UPDATES_MAX_CONCURRENCY', 10),
+            max_pending=env.int('UPDATES_MAX_PENDING', 200)
+        ),
+        maintenance=MaintenanceConfig(
+            pair_partitions_ahead_years=env.int(
+                'PAIR_PARTITIONS_AHEAD_YEARS', 1),
+            pair_archive_after_years=env.int('PAIR_ARCHIVE_AFTER_YEARS', 3),
+            pair_archive_detach=env.bool('PAIR_ARCHIVE_DETACH', False)
         )
     )
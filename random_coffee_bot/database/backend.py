@@ -0,0 +1,110 @@
+"""
+Различия между поддерживаемыми СУБД: PostgreSQL (основная) и SQLite
+(локальный запуск, бенчмарки и быстрые тесты).
+
+Выражения, которые пишутся в СУБД по-разному, объявлены здесь как
+отдельные SQL-конструкции с компиляцией под каждый диалект, чтобы
+запросы в сервисах оставались одинаковыми.
+"""
+from typing import Any, Callable
+
+from sqlalchemy import Date
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn, PrimaryKeyConstraint
+from sqlalchemy.sql.functions import FunctionElement
+
+
+SQLITE_ROWID_KEY = 'sqlite_rowid_primary_key'
+
+
+def dialect_name(bind: Any) -> str:
+    """Имя диалекта для движка, соединения или сессии."""
+    if hasattr(bind, 'get_bind'):
+        bind = bind.get_bind()
+    return bind.dialect.name
+
+
+def dialect_insert(bind: Any) -> Callable:
+    """
+    insert с поддержкой ON CONFLICT для диалекта bind. У PostgreSQL
+    и SQLite интерфейс on_conflict_do_* одинаковый.
+    """
+    if dialect_name(bind) == 'postgresql':
+        return postgresql.insert
+    return sqlite.insert
+
+
+class utc_today(FunctionElement):
+    """Текущая дата по UTC."""
+
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(utc_today, 'postgresql')
+def _pg_utc_today(element, compiler, **kw) -> str:
+    return "CAST(timezone('UTC', now()) AS DATE)"
+
+
+@compiles(utc_today, 'sqlite')
+def _sqlite_utc_today(element, compiler, **kw) -> str:
+    return "date('now')"
+
+
+class weeks_before(FunctionElement):
+    """Дата за weeks недель до day: weeks_before(day, weeks)."""
+
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(weeks_before, 'postgresql')
+def _pg_weeks_before(element, compiler, **kw) -> str:
+    day, weeks = list(element.clauses)
+    return (f'CAST({compiler.process(day, **kw)} '
+            f'- make_interval(0, 0, {compiler.process(weeks, **kw)}) '
+            f'AS DATE)')
+
+
+@compiles(weeks_before, 'sqlite')
+def _sqlite_weeks_before(element, compiler, **kw) -> str:
+    day, weeks = list(element.clauses)
+    return (f"date({compiler.process(day, **kw)}, "
+            f"'-' || ({compiler.process(weeks, **kw)} * 7) || ' days')")
+
+
+# В PostgreSQL у секционированной таблицы pair составной первичный ключ
+# (id, created_at). SQLite не умеет автоинкремент в составном ключе,
+# поэтому для таблиц с SQLITE_ROWID_KEY в info первичным ключом в SQLite
+# становится одна колонка - INTEGER PRIMARY KEY AUTOINCREMENT.
+@compiles(CreateColumn, 'sqlite')
+def _sqlite_rowid_column(element, compiler, **kw) -> str:
+    column = element.element
+    if column.table.info.get(SQLITE_ROWID_KEY) == column.name:
+        return (f'{compiler.preparer.format_column(column)} '
+                f'INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT')
+    return compiler.visit_create_column(element, **kw)
+
+
+@compiles(PrimaryKeyConstraint, 'sqlite')
+def _sqlite_rowid_primary_key(constraint, compiler, **kw) -> str | None:
+    if constraint.table.info.get(SQLITE_ROWID_KEY):
+        return None
+    return compiler.visit_primary_key_constraint(constraint, **kw)
+
+
+async def create_sqlite_schema(engine: AsyncEngine) -> bool:
+    """
+    Для SQLite создает таблицы по моделям: миграции Alembic написаны
+    для PostgreSQL. Для остальных СУБД ничего не делает.
+    Возвращает True, если схема создавалась.
+    """
+    if engine.dialect.name != 'sqlite':
+        return False
+    from .models import Base
+
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return True
@@ -1,9 +1,125 @@
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import time
+from dataclasses import replace
+from typing import Any
 
-from ..config import Config, load_config
+from sqlalchemy import Engine, create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import (AsyncEngine,
+                                    async_sessionmaker,
+                                    create_async_engine)
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool, StaticPool
+
+from ..config import Config, DatabaseConfig, load_config
+from ..metrics import registry
+from .instrumentation import instrument_engine
+from .replica import ReadSessionRouter
+
+
+class _CheckoutTimingMixin:
+    """
+    Замеряет, сколько времени запрос ждал свободное соединение из пула.
+    Значение пишется в метрику db_pool_checkout_wait_seconds.
+    """
+    def _do_get(self):
+        started_at = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            registry.histogram('db_pool_checkout_wait_seconds',
+                               pool=self.metrics_name
+                               ).observe(time.perf_counter() - started_at)
+            registry.gauge('db_pool_checked_out',
+                           pool=self.metrics_name).set(self.checkedout())
+
+
+class TimedAsyncQueuePool(_CheckoutTimingMixin, AsyncAdaptedQueuePool):
+    metrics_name = 'async'
+
+
+class TimedQueuePool(_CheckoutTimingMixin, QueuePool):
+    metrics_name = 'sync'
+
+
+def _pool_kwargs(db_config: DatabaseConfig) -> dict[str, Any]:
+    return {
+        'pool_size': db_config.pool_size,
+        'max_overflow': db_config.max_overflow,
+        'pool_pre_ping': db_config.pool_pre_ping,
+        'pool_recycle': db_config.pool_recycle,
+    }
+
+
+def create_engine_from_config(db_config: DatabaseConfig) -> AsyncEngine:
+    """
+    Создает асинхронный движок БД с настройками пула из конфига.
+    Для asyncpg дополнительно задаются размер кэша подготовленных
+    выражений и statement_timeout на стороне Postgres.
+    Для SQLite (используется при разработке) настройки пула не применяются.
+    """
+    url = make_url(db_config.db_url)
+    if url.get_backend_name() == 'sqlite':
+        if url.database in (None, '', ':memory:'):
+            # База в памяти живет, пока открыто ее единственное соединение.
+            engine = create_async_engine(url, poolclass=StaticPool)
+        else:
+            engine = create_async_engine(url)
+        instrument_engine(engine, db_config.slow_query_ms)
+        return engine
+
+    connect_args: dict[str, Any] = {}
+    if url.get_driver_name() == 'asyncpg':
+        connect_args['statement_cache_size'] = (
+            db_config.statement_cache_size)
+        if db_config.statement_timeout_ms:
+            connect_args['server_settings'] = {
+                'statement_timeout': str(db_config.statement_timeout_ms)}
+    engine = create_async_engine(url,
+                                 poolclass=TimedAsyncQueuePool,
+                                 connect_args=connect_args,
+                                 **_pool_kwargs(db_config))
+    instrument_engine(engine, db_config.slow_query_ms)
+    return engine
+
+
+def create_sync_engine_from_config(db_config: DatabaseConfig,
+                                   pool_size: int = 1,
+                                   max_overflow: int = 1) -> Engine:
+    """
+    Создает синхронный движок (psycopg) для компонентов, которые не
+    умеют работать с asyncio, например для хранилища задач APScheduler.
+    Пул у него отдельный и маленький: такие компоненты делают единичные
+    короткие запросы.
+    """
+    url = make_url(db_config.db_url)
+    if url.get_backend_name() == 'sqlite':
+        return create_engine(url.set(drivername='sqlite'))
+
+    url = url.set(drivername='postgresql+psycopg')
+    connect_args: dict[str, Any] = {}
+    if db_config.statement_timeout_ms:
+        connect_args['options'] = (
+            f'-c statement_timeout={db_config.statement_timeout_ms}')
+    kwargs = _pool_kwargs(db_config)
+    kwargs.update(pool_size=pool_size, max_overflow=max_overflow)
+    engine = create_engine(url,
+                           poolclass=TimedQueuePool,
+                           connect_args=connect_args,
+                           **kwargs)
+    instrument_engine(engine, db_config.slow_query_ms)
+    return engine
 
 
 config: Config = load_config()
-database_url = config.db.db_url
-engine = create_async_engine(database_url)
+engine = create_engine_from_config(config.db)
 AsyncSessionLocal = async_sessionmaker(engine, expire_on_commit=False)
+
+replica_engine = (
+    create_engine_from_config(replace(config.db,
+                                      db_url=config.db.replica_url))
+    if config.db.replica_url else None
+)
+ReplicaSessionLocal = (
+    async_sessionmaker(replica_engine, expire_on_commit=False)
+    if replica_engine else None
+)
+read_router = ReadSessionRouter(AsyncSessionLocal, ReplicaSessionLocal)
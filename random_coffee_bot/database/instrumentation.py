@@ -0,0 +1,146 @@
+import hashlib
+import logging
+import re
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from ..metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+MAX_STATEMENT_LENGTH = 200
+
+_WHITESPACE = re.compile(r'\s+')
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r'\b\d+(?:\.\d+)?\b')
+_POSITIONAL = re.compile(r'\$\d+')
+_PLACEHOLDER = r'(?:\?|%\(\w+\)s|:\w+)'
+_PLACEHOLDER_LIST = re.compile(
+    rf'\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)')
+
+
+@dataclass
+class QueryStats:
+    """Счетчик запросов к БД, сделанных при обработке одного апдейта."""
+
+    handler: str
+    query_count: int = 0
+    db_time: float = 0.0
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar(
+    'current_query_stats', default=None)
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Приводит SQL к виду, по которому запросы можно группировать:
+    убирает литералы и схлопывает списки плейсхолдеров, чтобы
+    IN ($1, $2, $3) и IN ($1, $2) попали в одну метрику.
+    """
+    sql = _WHITESPACE.sub(' ', statement).strip()
+    sql = _POSITIONAL.sub('?', sql)
+    sql = _STRING_LITERAL.sub('?', sql)
+    sql = _NUMBER_LITERAL.sub('?', sql)
+    sql = _PLACEHOLDER_LIST.sub('(...)', sql)
+    return sql
+
+
+def statement_id(normalized: str) -> str:
+    """
+    Короткий хэш полного нормализованного запроса. Метрики ключуются по
+    нему: у запросов к одной таблице первые MAX_STATEMENT_LENGTH
+    символов часто совпадают, а условия WHERE идут в самом конце.
+    """
+    return hashlib.blake2b(normalized.encode(), digest_size=8).hexdigest()
+
+
+def shorten_statement(normalized: str) -> str:
+    """Обрезает запрос для показа в метке метрики."""
+    if len(normalized) > MAX_STATEMENT_LENGTH:
+        return normalized[:MAX_STATEMENT_LENGTH] + '…'
+    return normalized
+
+
+def parameter_shape(parameters: Any, executemany: bool = False) -> str:
+    """
+    Описывает параметры запроса без самих значений: типы и длины.
+    Значения в лог не пишем, в них могут быть персональные данные.
+    """
+    if executemany:
+        rows = list(parameters or [])
+        first = parameter_shape(rows[0]) if rows else '()'
+        return f'{len(rows)} x {first}'
+    if isinstance(parameters, dict):
+        items = ', '.join(f'{key}: {_value_shape(value)}'
+                          for key, value in parameters.items())
+        return f'{{{items}}}'
+    if isinstance(parameters, (list, tuple)):
+        return f'({", ".join(_value_shape(value) for value in parameters)})'
+    return _value_shape(parameters)
+
+
+def _value_shape(value: Any) -> str:
+    if value is None:
+        return 'None'
+    if isinstance(value, (list, tuple, set)):
+        return f'{type(value).__name__}[{len(value)}]'
+    if isinstance(value, (str, bytes)):
+        return f'{type(value).__name__}({len(value)})'
+    return type(value).__name__
+
+
+def instrument_engine(engine: Engine | AsyncEngine,
+                      slow_query_ms: int) -> None:
+    """
+    Подписывается на события движка и для каждого запроса:
+    - пишет время выполнения в гистограмму db_query_seconds с хэшем
+      нормализованного запроса в метке statement_id и его началом в
+      метке statement;
+    - логирует запросы дольше slow_query_ms вместе с формой параметров;
+    - добавляет запрос и его время к QueryStats текущего апдейта.
+    """
+    sync_engine = (engine.sync_engine if isinstance(engine, AsyncEngine)
+                   else engine)
+    slow_query_seconds = slow_query_ms / 1000
+
+    @event.listens_for(sync_engine, 'before_cursor_execute')
+    def _before_cursor_execute(conn, cursor, statement, parameters,
+                               context, executemany):
+        conn.info.setdefault('query_started_at', []).append(
+            time.perf_counter())
+
+    @event.listens_for(sync_engine, 'after_cursor_execute')
+    def _after_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        duration = (time.perf_counter()
+                    - conn.info['query_started_at'].pop())
+        normalized = normalize_statement(statement)
+        registry.histogram('db_query_seconds',
+                           statement_id=statement_id(normalized),
+                           statement=shorten_statement(normalized)
+                           ).observe(duration)
+
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.query_count += 1
+            stats.db_time += duration
+
+        if slow_query_seconds and duration >= slow_query_seconds:
+            handler = stats.handler if stats else '-'
+            logger.warning(
+                f'Медленный запрос ({duration * 1000:.0f} мс, '
+                f'хэндлер {handler}): {normalized} '
+                f'параметры: {parameter_shape(parameters, executemany)}')
+
+    @event.listens_for(sync_engine, 'handle_error')
+    def _handle_error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get('query_started_at'):
+            conn.info['query_started_at'].pop()
@@ -1,12 +1,20 @@
 from datetime import date, datetime
 
-from sqlalchemy import (BigInteger, Boolean, CheckConstraint, DateTime,
-                        Date, Integer, ForeignKey, func, String, Text)
-from sqlalchemy.orm import (DeclarativeBase,
+from sqlalchemy import (BigInteger, Boolean, CheckConstraint, Connection,
+                        DateTime, Date, event, Index, insert, Integer,
+                        ForeignKey, func, PrimaryKeyConstraint, select,
+                        String, Text, text)
+from sqlalchemy.orm import (attributes,
+                            DeclarativeBase,
                             declared_attr,
                             Mapped,
                             mapped_column,
-                            relationship)
+                            object_session,
+                            relationship,
+                            Session)
+
+from .backend import dialect_insert, SQLITE_ROWID_KEY
+from .partitions import create_initial_pair_partitions
 
 
 class Base(DeclarativeBase):
@@ -37,18 +45,22 @@ class User(CommonMixin, Base):
     last_name: Mapped[str | None] = mapped_column(String, nullable=True)
 
     is_active: Mapped[bool] = mapped_column(Boolean, default=True,
-                                            nullable=False)
+                                            nullable=False,
+                                            active_history=True)
     has_permission: Mapped[bool] = mapped_column(Boolean, default=True,
                                                  nullable=False)
     is_blocked: Mapped[bool] = mapped_column(Boolean, default=False,
-                                             nullable=False)
+                                             nullable=False,
+                                             active_history=True)
     is_admin: Mapped[bool] = mapped_column(Boolean, default=False,
-                                           nullable=False)
+                                           nullable=False,
+                                           active_history=True)
 
     pairing_interval: Mapped[int | None] = mapped_column(Integer,
                                                          nullable=True)
     last_paired_at: Mapped[date | None] = mapped_column(Date, nullable=True)
-    pause_until: Mapped[date | None] = mapped_column(Date, nullable=True)
+    pause_until: Mapped[date | None] = mapped_column(Date, nullable=True,
+                                                     active_history=True)
 
     pairs_as_user1: Mapped[list['Pair']] = relationship(
         'Pair',
@@ -66,9 +78,31 @@ class User(CommonMixin, Base):
         back_populates='user3'
     )
 
+    __table_args__ = (
+        # Список участников для админа: не админы и не заблокированные,
+        # по фамилии.
+        Index('ix_user_list_order', 'last_name', 'id',
+              postgresql_where=text(
+                  'is_admin IS false AND is_blocked IS false')),
+        # Рассылки и подсчет активных участников.
+        Index('ix_user_active_telegram_id', 'telegram_id',
+              postgresql_where=text('is_active IS true')),
+        # Ежедневное снятие истекших пауз.
+        Index('ix_user_pause_until', 'pause_until',
+              postgresql_where=text('pause_until IS NOT NULL')),
+    )
+
 
 class Pair(CommonMixin, Base):
-    """Таблица пар."""
+    """
+    Таблица пар.
+    В PostgreSQL таблица секционирована по created_at, по секции на год
+    (см. database/partitions.py). Первичный ключ секционированной таблицы
+    обязан включать ключ секционирования, поэтому в БД он составной,
+    а для ORM пара по-прежнему определяется только id.
+    """
+
+    id: Mapped[int] = mapped_column(Integer, autoincrement=True)
 
     user1_id: Mapped[int] = mapped_column(Integer,
                                           ForeignKey('user.id'),
@@ -90,6 +124,140 @@ class Pair(CommonMixin, Base):
         'User', foreign_keys=[user3_id], back_populates='pairs_as_user3'
     )
 
+    __table_args__ = (
+        Index('ix_pair_user1_id', 'user1_id'),
+        Index('ix_pair_user2_id', 'user2_id'),
+        Index('ix_pair_user3_id', 'user3_id',
+              postgresql_where=text('user3_id IS NOT NULL')),
+        Index('ix_pair_created_at', 'created_at'),
+        PrimaryKeyConstraint('id', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)',
+         'info': {SQLITE_ROWID_KEY: 'id'}},
+    )
+    __mapper_args__ = {'primary_key': ['id']}
+
+
+event.listen(Pair.__table__, 'after_create', create_initial_pair_partitions)
+
+
+class PairMember(Base):
+    """
+    Участники пар: по строке на каждого юзера пары.
+    Дублирует user1_id/user2_id/user3_id из Pair, чтобы история
+    встреч юзера читалась одним поиском по индексу. Строки создаются
+    автоматически при вставке Pair, см. _insert_pair_members.
+    round_id - номер раунда паринга: все пары, созданные в одной
+    транзакции, относятся к одному раунду.
+    Внешнего ключа на pair нет: секционированную таблицу можно
+    сослать только по ключу, включающему created_at.
+    """
+
+    __tablename__ = 'pair_member'
+
+    pair_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    user_id: Mapped[int] = mapped_column(Integer, ForeignKey('user.id'),
+                                         primary_key=True)
+    round_id: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index('ix_pair_member_user_round', 'user_id', 'round_id', 'pair_id'),
+        Index('ix_pair_member_round_id', 'round_id'),
+    )
+
+
+class PairHistorySummary(Base):
+    """
+    Сводка встреч из архивированных секций pair: сколько раз двое
+    юзеров встречались и когда в последний раз. Строки этих секций
+    удаляются из pair_member, а история для подбора пар складывается
+    из pair_member и этой сводки.
+    """
+
+    __tablename__ = 'pair_history_summary'
+
+    user_low_id: Mapped[int] = mapped_column(Integer, ForeignKey('user.id'),
+                                             primary_key=True)
+    user_high_id: Mapped[int] = mapped_column(Integer, ForeignKey('user.id'),
+                                              primary_key=True)
+    meetings: Mapped[int] = mapped_column(Integer, nullable=False)
+    last_met_at: Mapped[datetime] = mapped_column(DateTime(timezone=True),
+                                                  nullable=False)
+
+    __table_args__ = (
+        CheckConstraint('user_low_id < user_high_id',
+                        name='pair_history_summary_ordered'),
+    )
+
+
+class PairArchive(Base):
+    """Архивированные секции pair."""
+
+    __tablename__ = 'pair_archive'
+
+    partition_name: Mapped[str] = mapped_column(String, primary_key=True)
+    pairs_count: Mapped[int] = mapped_column(Integer, nullable=False)
+    detached: Mapped[bool] = mapped_column(Boolean, nullable=False)
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+
+_PAIR_ROUND_KEY = 'pair_round_id'
+
+
+def _current_round_id(session: Session | None, connection) -> int:
+    """Номер раунда для пар, создаваемых в текущей транзакции."""
+    info = session.info if session is not None else {}
+    round_id = info.get(_PAIR_ROUND_KEY)
+    if round_id is None:
+        round_id = connection.execute(
+            select(func.coalesce(func.max(PairMember.round_id), 0) + 1)
+        ).scalar_one()
+        info[_PAIR_ROUND_KEY] = round_id
+        _update_stats(connection, {STAT_PAIRED_LAST_ROUND: 0}, replace=True)
+    return round_id
+
+
+@event.listens_for(Pair, 'after_insert')
+def _insert_pair_members(mapper, connection, target: Pair) -> None:
+    user_ids = [target.user1_id, target.user2_id, target.user3_id]
+    round_id = _current_round_id(object_session(target), connection)
+    rows = [
+        {'pair_id': target.id, 'user_id': user_id, 'round_id': round_id}
+        for user_id in user_ids if user_id is not None
+    ]
+    connection.execute(insert(PairMember), rows)
+    _update_stats(connection, {STAT_MEETINGS_TOTAL: 1,
+                               STAT_PAIRED_LAST_ROUND: len(rows)})
+
+
+@event.listens_for(Pair, 'after_update')
+def _update_pair_members(mapper, connection, target: Pair) -> None:
+    """Третий участник может быть добавлен к уже сохраненной паре."""
+    history = attributes.get_history(target, 'user3_id')
+    if not history.has_changes():
+        return
+    for old_user_id in history.deleted:
+        if old_user_id is not None:
+            connection.execute(PairMember.__table__.delete().where(
+                PairMember.pair_id == target.id,
+                PairMember.user_id == old_user_id))
+            _update_stats(connection, {STAT_PAIRED_LAST_ROUND: -1})
+    if target.user3_id is not None:
+        round_id = connection.execute(
+            select(PairMember.round_id)
+            .where(PairMember.pair_id == target.id)
+            .limit(1)
+        ).scalar_one()
+        connection.execute(insert(PairMember).values(
+            pair_id=target.id, user_id=target.user3_id, round_id=round_id))
+        _update_stats(connection, {STAT_PAIRED_LAST_ROUND: 1})
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _reset_pair_round(session: Session) -> None:
+    session.info.pop(_PAIR_ROUND_KEY, None)
+
 
 class Setting(CommonMixin, Base):
     """Таблица для изменяемых настроек работы бота."""
@@ -116,3 +284,138 @@ class Notification(CommonMixin, Base):
     text: Mapped[str] = mapped_column(Text, nullable=False)
     sent_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True),
                                                      nullable=True)
+
+
+class ExportState(Base):
+    """
+    Состояние инкрементального экспорта в лист Гугл Таблицы.
+    high_water - id последней выгруженной записи (для листов, которые
+    только дополняются), rows_count - сколько строк данных уже в листе.
+    Если строки нет, следующий экспорт перезаписывает лист целиком.
+    """
+
+    __tablename__ = 'export_state'
+
+    sheet: Mapped[str] = mapped_column(String, primary_key=True)
+    high_water: Mapped[int | None] = mapped_column(BigInteger,
+                                                   nullable=True)
+    rows_count: Mapped[int] = mapped_column(Integer, nullable=False,
+                                            default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(),
+        onupdate=func.now(), nullable=False)
+
+
+class ExportedRow(Base):
+    """
+    Выгруженные строки листа: где в листе лежит строка с ключом
+    row_key и хэш ее содержимого. По хэшу экспорт понимает, какие
+    строки изменились и какие нужно перезаписать.
+    """
+
+    __tablename__ = 'exported_row'
+
+    sheet: Mapped[str] = mapped_column(String, primary_key=True)
+    row_key: Mapped[str] = mapped_column(String, primary_key=True)
+    row_number: Mapped[int] = mapped_column(Integer, nullable=False)
+    row_hash: Mapped[str] = mapped_column(String, nullable=False)
+
+
+STAT_ALL_USERS = 'all_users'
+STAT_ACTIVE_USERS = 'active_users'
+STAT_LISTED_USERS = 'listed_users'
+STAT_PAUSED_USERS = 'paused_users'
+STAT_MEETINGS_TOTAL = 'meetings_total'
+STAT_PAIRED_LAST_ROUND = 'paired_last_round'
+
+STAT_KEYS = (STAT_ALL_USERS, STAT_ACTIVE_USERS, STAT_LISTED_USERS,
+             STAT_PAUSED_USERS, STAT_MEETINGS_TOTAL, STAT_PAIRED_LAST_ROUND)
+
+
+class Stat(Base):
+    """
+    Счетчики для экрана с информацией о боте и итогов в списках.
+    Обновляются в той же транзакции, что и данные, при каждом flush
+    (см. _user_stats_*), поэтому чтение - это несколько строк по ключу
+    вместо COUNT по всей таблице. Массовые UPDATE мимо ORM должны
+    поправлять счетчики сами через update_stats.
+    """
+
+    __tablename__ = 'stats'
+
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[int] = mapped_column(BigInteger, nullable=False,
+                                       default=0)
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(),
+        onupdate=func.now(), nullable=False)
+
+
+def _update_stats(connection: Connection, deltas: dict[str, int],
+                  replace: bool = False) -> None:
+    """
+    Прибавляет deltas к счетчикам (или записывает значения, если
+    replace=True). Отсутствующие счетчики создаются.
+    """
+    stmt = dialect_insert(connection)(Stat).values(
+        [{'key': key, 'value': value} for key, value in deltas.items()])
+    new_value = (stmt.excluded.value if replace
+                 else Stat.value + stmt.excluded.value)
+    connection.execute(stmt.on_conflict_do_update(
+        index_elements=[Stat.key],
+        set_={'value': new_value, 'updated_at': func.now()}))
+
+
+async def update_stats(session, deltas: dict[str, int]) -> None:
+    """То же, что _update_stats, для вызова из сервисных функций."""
+    deltas = {key: value for key, value in deltas.items() if value}
+    if deltas:
+        await session.run_sync(
+            lambda sync_session: _update_stats(sync_session.connection(),
+                                               deltas))
+
+
+_USER_STAT_ATTRS = ('is_active', 'is_blocked', 'is_admin', 'pause_until')
+
+
+def _user_stat_keys(is_active, is_blocked, is_admin, pause_until
+                    ) -> set[str]:
+    keys = {STAT_ALL_USERS}
+    if is_active:
+        keys.add(STAT_ACTIVE_USERS)
+    if not is_admin and not is_blocked:
+        keys.add(STAT_LISTED_USERS)
+    if pause_until is not None:
+        keys.add(STAT_PAUSED_USERS)
+    return keys
+
+
+def _current_user_stat_keys(user: User) -> set[str]:
+    return _user_stat_keys(*(getattr(user, a) for a in _USER_STAT_ATTRS))
+
+
+@event.listens_for(User, 'after_insert')
+def _user_stats_insert(mapper, connection, target: User) -> None:
+    _update_stats(connection,
+                  dict.fromkeys(_current_user_stat_keys(target), 1))
+
+
+@event.listens_for(User, 'after_update')
+def _user_stats_update(mapper, connection, target: User) -> None:
+    old_values = []
+    for attr in _USER_STAT_ATTRS:
+        history = attributes.get_history(target, attr)
+        old_values.append(history.deleted[0] if history.deleted
+                          else getattr(target, attr))
+    old_keys = _user_stat_keys(*old_values)
+    new_keys = _current_user_stat_keys(target)
+    deltas = {key: 1 for key in new_keys - old_keys}
+    deltas.update({key: -1 for key in old_keys - new_keys})
+    if deltas:
+        _update_stats(connection, deltas)
+
+
+@event.listens_for(User, 'after_delete')
+def _user_stats_delete(mapper, connection, target: User) -> None:
+    _update_stats(connection,
+                  dict.fromkeys(_current_user_stat_keys(target), -1))
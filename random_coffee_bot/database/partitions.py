@@ -0,0 +1,157 @@
+import logging
+import re
+from datetime import date, datetime, UTC
+
+from sqlalchemy import Connection, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+logger = logging.getLogger(__name__)
+
+PAIR_TABLE = 'pair'
+PAIR_DEFAULT_PARTITION = 'pair_default'
+_PARTITION_NAME_RE = re.compile(r'^pair_y(\d{4})$')
+
+
+def pair_partition_name(year: int) -> str:
+    return f'pair_y{year}'
+
+
+def pair_partition_ddl(year: int) -> str:
+    """
+    DDL секции pair за год. Границы заданы в UTC, чтобы раскладка
+    не зависела от таймзоны сессии.
+    """
+    return (
+        f'CREATE TABLE IF NOT EXISTS {pair_partition_name(year)} '
+        f'PARTITION OF {PAIR_TABLE} '
+        f"FOR VALUES FROM ('{year}-01-01 00:00:00+00') "
+        f"TO ('{year + 1}-01-01 00:00:00+00')"
+    )
+
+
+PAIR_DEFAULT_PARTITION_DDL = (
+    f'CREATE TABLE IF NOT EXISTS {PAIR_DEFAULT_PARTITION} '
+    f'PARTITION OF {PAIR_TABLE} DEFAULT'
+)
+
+
+def create_initial_pair_partitions(target, connection: Connection,
+                                   **kw) -> None:
+    """
+    Вызывается после CREATE TABLE pair (например, в create_all в тестах):
+    создает секцию по умолчанию и секции на текущий и следующий год.
+    """
+    if connection.dialect.name != 'postgresql':
+        return
+    connection.execute(text(PAIR_DEFAULT_PARTITION_DDL))
+    year = datetime.now(UTC).year
+    for y in (year, year + 1):
+        connection.execute(text(pair_partition_ddl(y)))
+
+
+async def get_pair_partition_years(session: AsyncSession) -> list[int]:
+    """Годы, для которых к pair подключены секции."""
+    result = await session.execute(text(
+        'SELECT c.relname FROM pg_inherits i '
+        'JOIN pg_class c ON c.oid = i.inhrelid '
+        'JOIN pg_class p ON p.oid = i.inhparent '
+        'WHERE p.relname = :parent'), {'parent': PAIR_TABLE})
+    years = []
+    for name in result.scalars():
+        match = _PARTITION_NAME_RE.match(name)
+        if match:
+            years.append(int(match.group(1)))
+    return sorted(years)
+
+
+async def ensure_pair_partitions(session: AsyncSession,
+                                 years_ahead: int,
+                                 today: date | None = None) -> list[str]:
+    """
+    Создает секции pair с текущего года на years_ahead лет вперед,
+    чтобы новые пары никогда не попадали в секцию по умолчанию.
+    Возвращает имена созданных секций.
+    """
+    year = (today or datetime.now(UTC).date()).year
+    existing = set(await get_pair_partition_years(session))
+    created = []
+    try:
+        for y in range(year, year + years_ahead + 1):
+            if y in existing:
+                continue
+            await session.execute(text(pair_partition_ddl(y)))
+            created.append(pair_partition_name(y))
+        await session.commit()
+    except SQLAlchemyError as e:
+        await session.rollback()
+        logger.exception(f'Не удалось создать секции pair: {e}')
+        raise
+    if created:
+        logger.info(f'Созданы секции pair: {", ".join(created)}')
+    return created
+
+
+async def archive_pair_partitions(session: AsyncSession,
+                                  keep_years: int,
+                                  detach: bool,
+                                  today: date | None = None) -> list[str]:
+    """
+    Архивирует секции pair старше keep_years лет: встречи из них
+    суммируются в pair_history_summary, строки pair_member этих пар
+    удаляются, а сама секция по желанию отключается от pair
+    (DETACH PARTITION; таблица остается в БД как обычная).
+    Каждая секция архивируется в своей транзакции и только один раз.
+    Возвращает имена архивированных секций.
+    """
+    year = (today or datetime.now(UTC).date()).year
+    archived = []
+    for y in await get_pair_partition_years(session):
+        if y > year - keep_years:
+            continue
+        name = pair_partition_name(y)
+        already = await session.execute(
+            text('SELECT 1 FROM pair_archive WHERE partition_name = :name'),
+            {'name': name})
+        if already.first() is not None:
+            continue
+        try:
+            await session.execute(text(f"""
+                INSERT INTO pair_history_summary
+                    (user_low_id, user_high_id, meetings, last_met_at)
+                SELECT a.user_id, b.user_id, count(*), max(p.created_at)
+                FROM {name} AS p
+                JOIN pair_member AS a ON a.pair_id = p.id
+                JOIN pair_member AS b
+                    ON b.pair_id = p.id AND b.user_id > a.user_id
+                GROUP BY a.user_id, b.user_id
+                ON CONFLICT (user_low_id, user_high_id) DO UPDATE SET
+                    meetings = pair_history_summary.meetings
+                        + excluded.meetings,
+                    last_met_at = greatest(pair_history_summary.last_met_at,
+                                           excluded.last_met_at)
+            """))
+            await session.execute(text(
+                f'DELETE FROM pair_member AS m USING {name} AS p '
+                f'WHERE m.pair_id = p.id'))
+            pairs_count = (await session.execute(
+                text(f'SELECT count(*) FROM {name}'))).scalar_one()
+            await session.execute(
+                text('INSERT INTO pair_archive '
+                     '(partition_name, pairs_count, detached) '
+                     'VALUES (:name, :pairs_count, :detached)'),
+                {'name': name, 'pairs_count': pairs_count,
+                 'detached': detach})
+            if detach:
+                await session.execute(text(
+                    f'ALTER TABLE {PAIR_TABLE} DETACH PARTITION {name}'))
+            await session.commit()
+        except SQLAlchemyError as e:
+            await session.rollback()
+            logger.exception(f'Не удалось архивировать секцию {name}: {e}')
+            raise
+        logger.info(f'Секция {name} архивирована: {pairs_count} пар, '
+                    f'отключена: {detach}')
+        archived.append(name)
+    return archived
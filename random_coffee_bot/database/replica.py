@@ -0,0 +1,129 @@
+import logging
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import ORMExecuteState
+
+from ..metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+REPLICATION_LAG_QUERY = text(
+    'SELECT CASE '
+    'WHEN NOT pg_is_in_recovery() '
+    'OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 '
+    'ELSE COALESCE(EXTRACT(EPOCH FROM now() '
+    '- pg_last_xact_replay_timestamp()), 0) END'
+)
+
+_CONNECTION_ERRORS = (DBAPIError, OSError, TimeoutError)
+
+
+class ReadSessionRouter:
+    """
+    Выбирает, откуда читать: из реплики или из основной БД.
+    Вызывающий код указывает, насколько устаревшие данные ему подходят
+    (max_staleness в секундах). Если реплика не настроена, недоступна
+    или отстает сильнее, сессия открывается на основной БД.
+    Отставание реплики проверяется не чаще раза в lag_check_interval
+    секунд. Если реплика не ответила, она считается недоступной
+    retry_interval секунд. Запрос, на котором реплика отказала уже в
+    открытой сессии, повторяется в основной БД, и туда же идут
+    следующие запросы этой сессии.
+    """
+    def __init__(self,
+                 primary: async_sessionmaker[AsyncSession],
+                 replica: async_sessionmaker[AsyncSession] | None = None,
+                 lag_check_interval: float = 5.0,
+                 retry_interval: float = 30.0):
+        self.primary = primary
+        self.replica = replica
+        self.lag_check_interval = lag_check_interval
+        self.retry_interval = retry_interval
+        self._lag: float | None = None
+        self._lag_checked_at = float('-inf')
+        self._down_until = float('-inf')
+
+    @asynccontextmanager
+    async def session(self, max_staleness: float,
+                      primary_session: AsyncSession | None = None
+                      ) -> AsyncIterator[AsyncSession]:
+        """
+        Открывает сессию только для чтения. Изменения в ней не
+        коммитятся. Если чтение идет из основной БД и передана
+        primary_session (например, сессия апдейта), вторая сессия не
+        открывается: возвращается primary_session как есть.
+        """
+        use_replica = await self._replica_is_usable(max_staleness)
+        target = 'replica' if use_replica else 'primary'
+        registry.counter('db_read_sessions_total', target=target).inc()
+        if not use_replica and primary_session is not None:
+            yield primary_session
+            return
+
+        session_maker = self.replica if use_replica else self.primary
+        async with session_maker() as session:
+            if use_replica:
+                event.listen(session.sync_session, 'do_orm_execute',
+                             self._fail_over_to_primary)
+            try:
+                yield session
+            except DBAPIError as e:
+                if use_replica and (e.connection_invalidated
+                                    or isinstance(e, OperationalError)):
+                    self._mark_down(e)
+                raise
+            finally:
+                await session.rollback()
+
+    async def _replica_is_usable(self, max_staleness: float) -> bool:
+        if self.replica is None:
+            return False
+        now = time.monotonic()
+        if now < self._down_until:
+            return False
+        if now - self._lag_checked_at >= self.lag_check_interval:
+            try:
+                async with self.replica() as session:
+                    result = await session.execute(REPLICATION_LAG_QUERY)
+                    self._lag = float(result.scalar_one())
+            except _CONNECTION_ERRORS as e:
+                self._mark_down(e)
+                return False
+            self._lag_checked_at = now
+            registry.gauge('db_replica_lag_seconds').set(self._lag)
+        if self._lag is None or self._lag > max_staleness:
+            logger.debug(f'Реплика отстает на {self._lag} с, читаем из '
+                         'основной БД.')
+            return False
+        return True
+
+    def _fail_over_to_primary(self, orm_execute_state: ORMExecuteState
+                              ) -> Any:
+        try:
+            return orm_execute_state.invoke_statement()
+        except DBAPIError as e:
+            if not (e.connection_invalidated
+                    or isinstance(e, OperationalError)):
+                raise
+            self._mark_down(e)
+        registry.counter('db_replica_failovers_total').inc()
+        primary_bind = self.primary.kw['bind']
+        session = orm_execute_state.session
+        session.bind = primary_bind.sync_engine
+        return orm_execute_state.invoke_statement(
+            bind_arguments={'bind': session.bind})
+
+    def _mark_down(self, error: Exception) -> None:
+        logger.warning(f'Реплика недоступна, следующие '
+                       f'{self.retry_interval:.0f} с читаем из основной БД: '
+                       f'{error}')
+        self._down_until = time.monotonic() + self.retry_interval
+        self._lag = None
+        self._lag_checked_at = float('-inf')
+        registry.counter('db_replica_failures_total').inc()
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+
+from sqlalchemy import ColumnElement, func, literal, Row, Select, select
+from sqlalchemy.orm import aliased
+
+from .models import Pair, User
+
+
+@dataclass(frozen=True, slots=True)
+class UserView:
+    """
+    Неизменяемое представление пользователя для путей, которые только
+    читают данные. В отличие от ORM-объекта не попадает в identity map
+    сессии и не тянет за собой связи.
+    """
+
+    id: int
+    telegram_id: int
+    username: str | None
+    first_name: str | None
+    last_name: str | None
+    is_active: bool
+    has_permission: bool
+    is_blocked: bool
+    is_admin: bool
+    pairing_interval: int | None
+    pause_until: date | None
+    created_at: datetime
+
+    @property
+    def full_name(self) -> str:
+        return f'{self.first_name or ""} {self.last_name or ""}'.strip()
+
+
+USER_VIEW_COLUMNS = (
+    User.id,
+    User.telegram_id,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.is_active,
+    User.has_permission,
+    User.is_blocked,
+    User.is_admin,
+    User.pairing_interval,
+    User.pause_until,
+    User.created_at,
+)
+
+
+def select_user_views() -> Select:
+    """
+    Возвращает запрос, который выбирает только колонки, нужные UserView.
+    К нему можно добавлять условия, сортировку и лимиты как к обычному
+    select(User).
+    """
+    return select(*USER_VIEW_COLUMNS)
+
+
+def to_user_view(row: Row) -> UserView:
+    return UserView(*row)
+
+
+def full_name_sql(user) -> ColumnElement[str]:
+    """Полное имя юзера, собранное в SQL так же, как UserView.full_name."""
+    return func.trim(func.coalesce(user.first_name, literal(''))
+                     + literal(' ')
+                     + func.coalesce(user.last_name, literal('')))
+
+
+def select_pair_export_rows() -> Select:
+    """
+    Плоская проекция пар для экспорта: id, дата и готовые имена
+    участников (пустая строка, если третьего участника нет). Имена
+    склеиваются в SQL, поэтому строки результата можно сразу писать
+    в лист.
+    """
+    user1 = aliased(User)
+    user2 = aliased(User)
+    user3 = aliased(User)
+    return (
+        select(Pair.id,
+               Pair.created_at,
+               full_name_sql(user1),
+               full_name_sql(user2),
+               full_name_sql(user3))
+        .join(user1, Pair.user1_id == user1.id)
+        .join(user2, Pair.user2_id == user2.id)
+        .outerjoin(user3, Pair.user3_id == user3.id)
+    )
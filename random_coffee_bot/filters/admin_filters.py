@@ -2,10 +2,10 @@ from typing import Union
 
 from aiogram.filters import BaseFilter
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database.db import AsyncSessionLocal
 from ..config import load_config
-from ..services.user_service import get_user_by_telegram_id
+from ..services.user_service import get_user_view_by_telegram_id
 
 
 config = load_config()
@@ -16,7 +16,8 @@ class AdminFilter(BaseFilter):
     """
     Фильтр проверяет, что пользователь является админом (обычным или супер)
     """
-    async def __call__(self, event: Union[CallbackQuery, Message]) -> bool:
+    async def __call__(self, event: Union[CallbackQuery, Message],
+                       session: AsyncSession) -> bool:
         user_telegram = getattr(event, "from_user", None)
         user_tg_id = user_telegram.id if user_telegram else None
 
@@ -26,6 +27,5 @@ class AdminFilter(BaseFilter):
         if user_tg_id in admins_list:
             return True
 
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_tg_id)
-            return user.is_admin if user else False
+        user = await get_user_view_by_telegram_id(session, user_tg_id)
+        return user.is_admin if user else False
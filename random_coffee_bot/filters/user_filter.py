@@ -2,19 +2,20 @@ from typing import Optional, Union
 
 from aiogram.filters import BaseFilter
 from aiogram.types import CallbackQuery, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database.db import AsyncSessionLocal
-from ..database.models import User
-from ..services.user_service import get_user_from_event
+from ..database.views import UserView
+from ..services.user_service import get_user_view_from_event
 
 
 class ActiveUserFilter(BaseFilter):
     """
     Фильтр проверяет, что юзер есть в БД и имеет статус "активен".
     """
-    async def __call__(self, event: Union[CallbackQuery, Message]) -> bool:
-        async with AsyncSessionLocal() as session:
-            user: Optional[User] = await get_user_from_event(session, event)
+    async def __call__(self, event: Union[CallbackQuery, Message],
+                       session: AsyncSession) -> bool:
+        user: Optional[UserView] = await get_user_view_from_event(
+            session, event)
         return user.is_active if user else False
 
 
@@ -22,7 +23,8 @@ class InactiveUserFilter(BaseFilter):
     """
     Фильтр проверяет, что юзер есть в БД и имеет статус "неактивен".
     """
-    async def __call__(self, event: Union[CallbackQuery, Message]) -> bool:
-        async with AsyncSessionLocal() as session:
-            user: Optional[User] = await get_user_from_event(session, event)
+    async def __call__(self, event: Union[CallbackQuery, Message],
+                       session: AsyncSession) -> bool:
+        user: Optional[UserView] = await get_user_view_from_event(
+            session, event)
         return not user.is_active if user else False
@@ -7,8 +7,8 @@ from aiogram.fsm.state import default_state
 from aiogram.types import CallbackQuery, Message
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database.db import AsyncSessionLocal
 from ..database.models import User
 from ..filters.user_filter import ActiveUserFilter
 from ..keyboards.user_buttons import (
@@ -50,7 +50,8 @@ active_user_router.callback_query.filter(ActiveUserFilter())
 
 @active_user_router.message(StateFilter(FSMUserForm.waiting_for_first_name),
                             F.text.regexp(NAME_PATTERN))
-async def process_first_name_sending(message: Message, state: FSMContext):
+async def process_first_name_sending(message: Message, state: FSMContext,
+                                     session: AsyncSession):
     """
     Хэндлер срабатывает в состоянии, когда мы ждем от пользователя его имя,
     и оно введено верно. Обновляет имя в БД.
@@ -68,16 +69,15 @@ async def process_first_name_sending(message: Message, state: FSMContext):
     logger.debug(f'Получено сообщение в качестве имени: {first_name}')
 
     try:
-        async with AsyncSessionLocal() as session:
-            ok = await update_user_field(session,
-                                         user_telegram_id,
-                                         'first_name',
-                                         first_name)
-            if not ok:
-                await message.answer(USER_TEXTS['error_find_user'])
-                return await state.clear()
+        ok = await update_user_field(session,
+                                     user_telegram_id,
+                                     'first_name',
+                                     first_name)
+        if not ok:
+            await message.answer(USER_TEXTS['error_find_user'])
+            return await state.clear()
 
-            logger.debug('Имя сохранено.')
+        logger.debug('Имя сохранено.')
 
         await message.answer(USER_TEXTS['ask_last_name'])
         await state.set_state(FSMUserForm.waiting_for_last_name)
@@ -101,7 +101,8 @@ async def warning_not_first_name(message: Message):
 @active_user_router.message(
         StateFilter(FSMUserForm.waiting_for_last_name),
         F.text.regexp(NAME_PATTERN))
-async def process_last_name_sending(message: Message, state: FSMContext):
+async def process_last_name_sending(message: Message, state: FSMContext,
+                                    session: AsyncSession):
     """
     Хэндлер срабатывает в состоянии, когда мы ждем от пользователя
     его фамилию, и она введена верно. Обновляет фамилию в БД.
@@ -118,16 +119,15 @@ async def process_last_name_sending(message: Message, state: FSMContext):
     logger.debug(f'Получено сообщение в качестве фамилии: {last_name}')
 
     try:
-        async with AsyncSessionLocal() as session:
-            ok = await update_user_field(session,
-                                         user_telegram_id,
-                                         'last_name',
-                                         last_name)
-            if not ok:
-                await message.answer(USER_TEXTS['error_find_user'])
-                return await state.clear()
+        ok = await update_user_field(session,
+                                     user_telegram_id,
+                                     'last_name',
+                                     last_name)
+        if not ok:
+            await message.answer(USER_TEXTS['error_find_user'])
+            return await state.clear()
 
-            logger.debug('Фамилия сохранена')
+        logger.debug('Фамилия сохранена')
 
         keyboard = create_active_user_keyboard()
 
@@ -158,7 +158,7 @@ async def warning_not_last_name(message: Message):
     F.text == KEYBOARD_BUTTON_TEXTS['button_stop_participation'],
     StateFilter(default_state)
 )
-async def pause_participation(message: Message):
+async def pause_participation(message: Message, session: AsyncSession):
     """
     Хэндлер для приостановки участия пользователя.
     """
@@ -167,8 +167,7 @@ async def pause_participation(message: Message):
     telegram_id = message.from_user.id
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, telegram_id)
+        user = await get_user_by_telegram_id(session, telegram_id)
     except SQLAlchemyError:
         logger.error('Ошибка при запросе пользователя для паузы участия.')
         return await message.answer(USER_TEXTS['db_error'])
@@ -188,75 +187,74 @@ async def pause_participation(message: Message):
 @active_user_router.callback_query(
         lambda c: c.data.startswith('confirm_deactivate_'),
         StateFilter(default_state))
-async def process_deactivate_confirmation(callback_query: CallbackQuery):
+async def process_deactivate_confirmation(callback_query: CallbackQuery,
+                                          session: AsyncSession):
     """
     Хэндлер для обработки подтверждения приостановки участия.
     """
     telegram_id = callback_query.from_user.id
 
-    async with AsyncSessionLocal() as session:
-        user = await get_user_by_telegram_id(session, telegram_id)
+    user = await get_user_by_telegram_id(session, telegram_id)
 
-        if user is None:
-            await callback_query.answer(
-                USER_TEXTS['user_not_found'], show_alert=True
-            )
-            return
+    if user is None:
+        await callback_query.answer(
+            USER_TEXTS['user_not_found'], show_alert=True
+        )
+        return
 
-        try:
-            await callback_query.message.delete()
-
-            if callback_query.data == 'confirm_deactivate_yes':
-                if user.is_active:
-                    await set_user_active(session, telegram_id, False)
-                    await callback_query.message.answer(
-                        USER_TEXTS['participation_paused'],
-                        reply_markup=create_inactive_user_keyboard()
-                    )
-                else:
-                    await callback_query.answer(
-                        USER_TEXTS['already_paused'],
-                        show_alert=True
-                    )
-
-            elif callback_query.data == 'confirm_deactivate_no':
+    try:
+        await callback_query.message.delete()
+
+        if callback_query.data == 'confirm_deactivate_yes':
+            if user.is_active:
+                await set_user_active(session, telegram_id, False)
+                await callback_query.message.answer(
+                    USER_TEXTS['participation_paused'],
+                    reply_markup=create_inactive_user_keyboard()
+                )
+            else:
                 await callback_query.answer(
-                    USER_TEXTS['status_not_changed'],
+                    USER_TEXTS['already_paused'],
                     show_alert=True
                 )
 
-            await callback_query.answer()
-
-        except Exception as e:
-            logger.error(f'Произошла ошибка: {e}')
+        elif callback_query.data == 'confirm_deactivate_no':
             await callback_query.answer(
-                USER_TEXTS['error_occurred'],
+                USER_TEXTS['status_not_changed'],
                 show_alert=True
             )
 
+        await callback_query.answer()
+
+    except Exception as e:
+        logger.error(f'Произошла ошибка: {e}')
+        await callback_query.answer(
+            USER_TEXTS['error_occurred'],
+            show_alert=True
+        )
+
 
 @active_user_router.message(
     F.text == KEYBOARD_BUTTON_TEXTS['button_change_my_details'],
     StateFilter(default_state)
 )
-async def update_full_name(message: Message):
+async def update_full_name(message: Message, session: AsyncSession):
     """
     Хэндлер для обновления имени и фамилии пользователя.
     """
     telegram_id = message.from_user.id
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, telegram_id)
+        user = await get_user_by_telegram_id(session, telegram_id)
 
-            if user is None:
-                await message.answer(USER_TEXTS['user_not_found'])
-                return
+        if user is None:
+            await message.answer(USER_TEXTS['user_not_found'])
+            return
 
-            user_message = (
-                USER_TEXTS['comfirmation_change_name'
-                           ].format(first_name=user.first_name,
-                                    last_name=user.last_name))
+        user_message = (
+            USER_TEXTS['comfirmation_change_name'
+                       ].format(first_name=user.first_name,
+                                last_name=user.last_name))
 
         await message.answer(
             user_message,
@@ -298,7 +296,7 @@ async def no_update(callback: CallbackQuery):
 @active_user_router.message(
     F.text == KEYBOARD_BUTTON_TEXTS['button_my_status'],
     StateFilter(default_state))
-async def status_active(message: Message):
+async def status_active(message: Message, session: AsyncSession):
     """
     Хэндлер для кнопки "Мой статус участия".
     """
@@ -306,9 +304,8 @@ async def status_active(message: Message):
     username = message.from_user.username
 
     try:
-        async with AsyncSessionLocal() as session:
-            await update_username(session, user_id, username)
-            status_message = await create_text_status_active(session, user_id)
+        await update_username(session, user_id, username)
+        status_message = await create_text_status_active(session, user_id)
 
     except Exception as e:
         logger.error(f'Ошибка при получении статуса пользователя: {e}')
@@ -326,32 +323,31 @@ async def status_active(message: Message):
 @active_user_router.message(
         F.text == KEYBOARD_BUTTON_TEXTS['button_edit_meetings'],
         StateFilter(default_state))
-async def process_frequency(message: Message):
+async def process_frequency(message: Message, session: AsyncSession):
     """
     Хэндлер срабатывает при нажатии юзером кнопки меню для изменения интервала
     участия, отправляет ему инлайн-клавиатуру для подтверждения изменения
     интервала.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            user_id = message.from_user.id
-            result = await session.execute(
-                select(User.pairing_interval).where(
-                    User.telegram_id == user_id
-                )
+        user_id = message.from_user.id
+        result = await session.execute(
+            select(User.pairing_interval).where(
+                User.telegram_id == user_id
             )
+        )
 
-            pairing_interval = result.scalars().first()
+        pairing_interval = result.scalars().first()
 
-            if pairing_interval is None:
-                data_text = await create_text_with_interval(
-                    session, USER_TEXTS['no_interval'], user_id
-                )
-            else:
-                data_text = await create_text_with_interval(
-                    session, USER_TEXTS['user_confirm_changing_interval'],
-                    user_id
-                )
+        if pairing_interval is None:
+            data_text = await create_text_with_interval(
+                session, USER_TEXTS['no_interval'], user_id
+            )
+        else:
+            data_text = await create_text_with_interval(
+                session, USER_TEXTS['user_confirm_changing_interval'],
+                user_id
+            )
 
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
@@ -371,7 +367,8 @@ async def process_frequency(message: Message):
     lambda c: c.data.startswith('confirm_changing_interval'),
     StateFilter(default_state)
 )
-async def handle_callback_query_yes(callback: CallbackQuery):
+async def handle_callback_query_yes(callback: CallbackQuery,
+                                    session: AsyncSession):
     """
     Хэндлер срабатвает, когда юзер поджтверждает, что хочет изменить
     свой интервал встреч, отправляет юзеру инлайн-клавиатуру с вариантами
@@ -379,17 +376,16 @@ async def handle_callback_query_yes(callback: CallbackQuery):
     """
     await callback.message.delete()
     try:
-        async with AsyncSessionLocal() as session:
-            formatted_text = await create_text_for_select_an_interval(
-                session, USER_TEXTS['update_frequency']
-            )
+        formatted_text = await create_text_for_select_an_interval(
+            session, USER_TEXTS['update_frequency']
+        )
 
-            reply_markup = generate_inline_interval()
+        reply_markup = generate_inline_interval()
 
-            await callback.message.answer(
-                formatted_text,
-                reply_markup=reply_markup
-            )
+        await callback.message.answer(
+            formatted_text,
+            reply_markup=reply_markup
+        )
 
     except SQLAlchemyError as e:
         logger.error(f'Ошибка при работе с базой данных: {e}')
@@ -403,7 +399,8 @@ async def handle_callback_query_yes(callback: CallbackQuery):
     ),
     StateFilter(default_state)
 )
-async def process_set_or_change_interval(callback: CallbackQuery):
+async def process_set_or_change_interval(callback: CallbackQuery,
+                                         session: AsyncSession):
     """
     Хэндлер срабатывает на нажатие пользователем инлайн-кнопки
     с выбором частоты встреч или установкой частоты встреч по умолчанию.
@@ -411,23 +408,22 @@ async def process_set_or_change_interval(callback: CallbackQuery):
     user_id = callback.from_user.id
 
     try:
-        async with AsyncSessionLocal() as session:
-            if callback.data.startswith('new_interval:'):
-                _, new_interval_str = parse_callback_data(callback.data)
-                try:
-                    new_interval = int(new_interval_str.strip())
-                except ValueError:
-                    new_interval = None
-            else:
+        if callback.data.startswith('new_interval:'):
+            _, new_interval_str = parse_callback_data(callback.data)
+            try:
+                new_interval = int(new_interval_str.strip())
+            except ValueError:
                 new_interval = None
+        else:
+            new_interval = None
 
-            await set_new_user_interval(session, user_id, new_interval)
+        await set_new_user_interval(session, user_id, new_interval)
 
-            data_text = await create_text_with_interval(
-                session,
-                USER_TEXTS['success_new_interval'],
-                user_id
-            )
+        data_text = await create_text_with_interval(
+            session,
+            USER_TEXTS['success_new_interval'],
+            user_id
+        )
 
     except ValueError as ve:
         logger.error(f'Ошибка значения: {ve}')
@@ -453,17 +449,17 @@ async def process_set_or_change_interval(callback: CallbackQuery):
     lambda c: c.data.startswith('cancel_changing_interval'),
     StateFilter(default_state)
 )
-async def handle_callback_query_no(callback: CallbackQuery):
+async def handle_callback_query_no(callback: CallbackQuery,
+                                   session: AsyncSession):
     """
     Обрабатывает нажатие на инлайн-кнопку 'нет' для отмены
     изминения интервала встреч.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            user_id = callback.from_user.id
-            data_text = await create_text_with_default_interval(
-                session, USER_TEXTS['user_default_interval'], user_id
-            )
+        user_id = callback.from_user.id
+        data_text = await create_text_with_default_interval(
+            session, USER_TEXTS['user_default_interval'], user_id
+        )
         if isinstance(callback.message, Message):
             await callback.message.edit_text(text=data_text)
 
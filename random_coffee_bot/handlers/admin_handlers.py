@@ -1,21 +1,17 @@
 import logging
+import tempfile
 from datetime import date, datetime, timedelta
+from pathlib import Path
 
 from aiogram import Bot, F, Router
 from aiogram.filters import Command, CommandStart, StateFilter
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import default_state
-from aiogram.types import CallbackQuery, Message
-from gspread.exceptions import (
-    APIError,
-    SpreadsheetNotFound,
-    WorksheetNotFound
-)
-from oauth2client.client import HttpAccessTokenRefreshError
+from aiogram.types import CallbackQuery, FSInputFile, Message
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database.db import AsyncSessionLocal
 from ..database.models import Setting
 from ..filters.admin_filters import AdminFilter
 from ..keyboards.admin_buttons import (
@@ -35,6 +31,7 @@ from ..keyboards.admin_buttons import (
 from ..keyboards.user_buttons import (create_active_user_keyboard,
                                       create_inactive_user_keyboard)
 from ..services import admin_service as adm
+from ..services import export_jobs, file_export
 from ..services.constants import DATE_FORMAT
 from ..services.user_service import create_user, get_user_by_telegram_id
 from ..states.admin_states import FSMAdminPanel
@@ -75,8 +72,8 @@ async def process_participant_management(message: Message, state: FSMContext):
 
 @admin_router.message(StateFilter(FSMAdminPanel.waiting_for_telegram_id),
                       F.text.regexp(r'^\d+$'))
-async def process_find_user_by_telegram_id(message: Message,
-                                           state: FSMContext):
+async def process_find_user_by_telegram_id(message: Message, state: FSMContext,
+                                           session: AsyncSession):
     """
     Хэндлер срабатывает в состоянии, когда мы получаем от админа цифры в
     качестве telegram ID. Если в БД есть юзер с таким ID, отправляем инфо
@@ -89,13 +86,11 @@ async def process_find_user_by_telegram_id(message: Message,
     logger.debug(f'Админ прислал ID юзера {user_telegram_id}')
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
-            if user is None:
-                logger.debug('Пользователя с полученным ID нет в БД.')
-                await message.answer(ADMIN_TEXTS['finding_user_fail'])
-                return
-            await adm.reset_user_pause_until(session, user)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
+        if user is None:
+            logger.debug('Пользователя с полученным ID нет в БД.')
+            await message.answer(ADMIN_TEXTS['finding_user_fail'])
+            return
     except SQLAlchemyError:
         logger.exception('Ошибка при работе с базой данных')
         await message.answer(ADMIN_TEXTS['db_error'])
@@ -138,15 +133,18 @@ async def process_cancel(message: Message, state: FSMContext):
 
 
 @admin_router.message(StateFilter(FSMAdminPanel.waiting_for_telegram_id),
-                      Command(commands='list'))
-async def process_get_all_users_list(message: Message, state: FSMContext):
+                      Command(commands='list'),
+                      flags={'read_replica': 30})
+async def process_get_all_users_list(message: Message, state: FSMContext,
+                                     read_session: AsyncSession):
     """
     Хэндлер срабатывает в состоянии, когда мы ждем от админа цифры в качестве
     telegram ID, но он отправляет команду /list. Отправляем ему сообщение
     со списком юзеров в виде инлайн-кнопок.
     """
     try:
-        kb_bilder, total_users = await generate_inline_user_list()
+        kb_bilder, total_users = await generate_inline_user_list(
+            read_session)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await message.answer(ADMIN_TEXTS['db_error'])
@@ -177,16 +175,21 @@ async def process_warning_not_numbers(message: Message, state: FSMContext):
 
 
 @admin_router.callback_query(PageCallbackFactory.filter(),
-                             StateFilter(default_state))
+                             StateFilter(default_state),
+                             flags={'read_replica': 30})
 async def paginate_users(callback: CallbackQuery,
-                         callback_data: PageCallbackFactory):
+                         callback_data: PageCallbackFactory,
+                         read_session: AsyncSession):
     """
     Хэндлер срабатывает, когда админ нажимает на инлайн-кнопки навигации
     по списку пользователей.
     """
-    page = callback_data.page
     try:
-        kb_bilder, total_users = await generate_inline_user_list(page=page)
+        kb_bilder, total_users = await generate_inline_user_list(
+            read_session,
+            page=callback_data.page,
+            cursor=callback_data.cursor,
+            direction=callback_data.direction)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         if isinstance(callback.message, Message):
@@ -210,7 +213,8 @@ async def paginate_users(callback: CallbackQuery,
 @admin_router.callback_query(UsersCallbackFactory.filter(),
                              StateFilter(default_state))
 async def show_user_details(callback: CallbackQuery,
-                            callback_data: UsersCallbackFactory):
+                            callback_data: UsersCallbackFactory,
+                            session: AsyncSession):
     """
     Хэндлер срабатывает, когда админ нажимает на инлайн-кнопку с
     именем пользователя в списке пользователей.
@@ -218,16 +222,14 @@ async def show_user_details(callback: CallbackQuery,
     user_telegram_id = callback_data.telegram_id
     logger.debug(f'Админ выбрал юзера {user_telegram_id}')
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
-            if user is None:
-                logger.info('Пользователя с полученным ID нет в БД.')
-                if isinstance(callback.message, Message):
-                    await callback.message.answer(
-                        ADMIN_TEXTS['finding_user_fail']
-                    )
-                return
-            await adm.reset_user_pause_until(session, user)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
+        if user is None:
+            logger.info('Пользователя с полученным ID нет в БД.')
+            if isinstance(callback.message, Message):
+                await callback.message.answer(
+                    ADMIN_TEXTS['finding_user_fail']
+                )
+            return
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         if isinstance(callback.message, Message):
@@ -255,7 +257,8 @@ async def show_user_details(callback: CallbackQuery,
 
 @admin_router.callback_query(lambda c: c.data.startswith('cancel:'),
                              StateFilter(default_state))
-async def process_inline_cancel(callback: CallbackQuery):
+async def process_inline_cancel(callback: CallbackQuery,
+                                session: AsyncSession):
     """
     Хэндлер срабатывает на нажатие админом инлайн-кнопки "Отменить"
     изменения конкретного юзера.
@@ -263,10 +266,9 @@ async def process_inline_cancel(callback: CallbackQuery):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(
-                session, int(user_telegram_id)
-            )
+        user = await get_user_by_telegram_id(
+            session, int(user_telegram_id)
+        )
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
@@ -288,7 +290,8 @@ async def process_inline_cancel(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('set_has_permission_false:'),
         StateFilter(default_state))
-async def process_set_has_permission_false(callback: CallbackQuery):
+async def process_set_has_permission_false(callback: CallbackQuery,
+                                           session: AsyncSession):
     """
     Хэндлер срабатывает на нажатие админом инлайн-кнопки "Запретить
     пользоваться ботом" конкретному юзеру и заменяет предыдущее сообщение
@@ -297,8 +300,7 @@ async def process_set_has_permission_false(callback: CallbackQuery):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
@@ -323,7 +325,8 @@ async def process_set_has_permission_false(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('confirm_set_has_permission_false:'),
         StateFilter(default_state))
-async def process_confirm_set_has_permission_false(callback: CallbackQuery):
+async def process_confirm_set_has_permission_false(callback: CallbackQuery,
+                                                   session: AsyncSession):
     """
     Хэндлер срабатывает, если админ нажимает инлайн-кнопку "да" для
     подтверждения запретить юзеру пользоваться ботом. Отправляет
@@ -332,15 +335,14 @@ async def process_confirm_set_has_permission_false(callback: CallbackQuery):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
 
-            if user is None:
-                logger.info('Пользователя с полученным ID нет в БД.')
-                await callback.answer(ADMIN_TEXTS['finding_user_fail'])
-                return
-            else:
-                await adm.set_user_permission(session, user, False)
+        if user is None:
+            logger.info('Пользователя с полученным ID нет в БД.')
+            await callback.answer(ADMIN_TEXTS['finding_user_fail'])
+            return
+        else:
+            await adm.set_user_permission(session, user, False)
 
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
@@ -357,7 +359,8 @@ async def process_confirm_set_has_permission_false(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('return_to_find_user_by_telegram_id:'),
         StateFilter(default_state))
-async def process_find_user_by_telegram_id_cb(callback: CallbackQuery):
+async def process_find_user_by_telegram_id_cb(callback: CallbackQuery,
+                                              session: AsyncSession):
     """
     Хэндлер срабатывает, если админ на просьбу подтвердить какие-то изменения
     для юзера нажимает "нет". Возвращает админа к сообщению с
@@ -366,8 +369,7 @@ async def process_find_user_by_telegram_id_cb(callback: CallbackQuery):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
@@ -391,7 +393,8 @@ async def process_find_user_by_telegram_id_cb(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('set_has_permission_true:'),
         StateFilter(default_state))
-async def process_set_has_permission_true(callback: CallbackQuery):
+async def process_set_has_permission_true(callback: CallbackQuery,
+                                          session: AsyncSession):
     """
     Хэндлер срабатывает на нажатие админом инлайн-кнопки "Разрешить
     пользоваться ботом" конкретному юзеру и заменяет предыдущее сообщение
@@ -400,8 +403,7 @@ async def process_set_has_permission_true(callback: CallbackQuery):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
@@ -426,7 +428,8 @@ async def process_set_has_permission_true(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('confirm_set_has_permission_true:'),
         StateFilter(default_state))
-async def process_confirm_set_has_permission_true(callback: CallbackQuery):
+async def process_confirm_set_has_permission_true(callback: CallbackQuery,
+                                                  session: AsyncSession):
     """
     Хэндлер срабатывает, если админ нажимает инлайн-кнопку "да" для
     подтверждения разрешить юзеру пользоваться ботом. Отправляет
@@ -435,14 +438,13 @@ async def process_confirm_set_has_permission_true(callback: CallbackQuery):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
-
-            if user is None:
-                logger.info('Пользователя с полученным ID нет в БД.')
-                await callback.answer(ADMIN_TEXTS['finding_user_fail'])
-                return
-            await adm.set_user_permission(session, user, True)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
+
+        if user is None:
+            logger.info('Пользователя с полученным ID нет в БД.')
+            await callback.answer(ADMIN_TEXTS['finding_user_fail'])
+            return
+        await adm.set_user_permission(session, user, True)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
@@ -458,7 +460,8 @@ async def process_confirm_set_has_permission_true(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('set_pause:'),
         StateFilter(default_state))
-async def process_set_pause(callback: CallbackQuery, state: FSMContext):
+async def process_set_pause(callback: CallbackQuery, state: FSMContext,
+                            session: AsyncSession):
     """
     Хэндлер срабатывает на нажатие админом инлайн-кнопки "Поставить на паузу"
     конкретного юзера и заменяет предыдущее сообщение
@@ -468,8 +471,7 @@ async def process_set_pause(callback: CallbackQuery, state: FSMContext):
     _, user_telegram_id = adm.parse_callback_data(callback.data)
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
@@ -503,7 +505,8 @@ async def process_cancel_setting_pause(message: Message, state: FSMContext):
 
 @admin_router.message(StateFilter(FSMAdminPanel.waiting_for_end_pause_date),
                       F.text.func(lambda t: bool(t and adm.is_valid_date(t))))
-async def process_check_date_for_pause(message: Message, state: FSMContext):
+async def process_check_date_for_pause(message: Message, state: FSMContext,
+                                       session: AsyncSession):
     """
     Хэндлер срабатывает в состоянии, когда мы ждем от админа дату , до
     которой юзера нужно поставить на паузу,
@@ -529,24 +532,23 @@ async def process_check_date_for_pause(message: Message, state: FSMContext):
     await state.clear()
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
-
-            if user is None:
-                logger.info('Пользователя с полученным ID нет в БД.')
-                await message.answer(ADMIN_TEXTS['finding_user_fail'])
-                return
-
-            if parsed_date == today:
-                await adm.set_user_pause_until(session, user, None)
-                logger.debug('Пользователю убрана дата окончания паузы.')
-                data_text = adm.format_text_about_user(
-                    ADMIN_TEXTS['no_pause_until'], user)
-            else:
-                await adm.set_user_pause_until(session, user, parsed_date)
-                logger.debug('Пользователю установлена дата окончания паузы.')
-                data_text = adm.format_text_about_user(
-                    ADMIN_TEXTS['success_set_pause_untill'], user)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
+
+        if user is None:
+            logger.info('Пользователя с полученным ID нет в БД.')
+            await message.answer(ADMIN_TEXTS['finding_user_fail'])
+            return
+
+        if parsed_date == today:
+            await adm.set_user_pause_until(session, user, None)
+            logger.debug('Пользователю убрана дата окончания паузы.')
+            data_text = adm.format_text_about_user(
+                ADMIN_TEXTS['no_pause_until'], user)
+        else:
+            await adm.set_user_pause_until(session, user, parsed_date)
+            logger.debug('Пользователю установлена дата окончания паузы.')
+            data_text = adm.format_text_about_user(
+                ADMIN_TEXTS['success_set_pause_untill'], user)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await message.answer(ADMIN_TEXTS['db_error'])
@@ -570,19 +572,19 @@ async def process_wrong_date_for_pause(message: Message, state: FSMContext):
 @admin_router.message(
         F.text == KEYBOARD_BUTTON_TEXTS['button_change_interval'],
         StateFilter(default_state))
-async def process_button_change_interval(message: Message):
+async def process_button_change_interval(message: Message,
+                                         session: AsyncSession):
     """
     Хэндлер срабатывает при нажатии на кнопку клавиатуры "Изменить интервал".
     Отправляет сообщение с инлайн-кнопками для подтверждения действия.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            current_interval = await adm.get_global_interval(session)
+        current_interval = await adm.get_global_interval(session)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await message.answer(ADMIN_TEXTS['db_error'])
 
-    next_pairing_date = await get_next_pairing_date()
+    next_pairing_date = await get_next_pairing_date(session)
 
     data_text = adm.create_text_with_interval(
         ADMIN_TEXTS['confirm_changing_interval'],
@@ -612,7 +614,8 @@ async def process_choose_new_interval(callback: CallbackQuery):
 @admin_router.callback_query(
         lambda c: c.data.startswith('new_global_interval:'),
         StateFilter(default_state))
-async def process_set_new_interval(callback: CallbackQuery):
+async def process_set_new_interval(callback: CallbackQuery,
+                                   session: AsyncSession):
     """
     Хэндлер срабатывает на нажатие админом инлайн-кнопки с одним из
     вариантов интервала. Устанавливает выбранный вариант как новый
@@ -625,14 +628,13 @@ async def process_set_new_interval(callback: CallbackQuery):
         logger.error('Невозможно привести интервал из коллбэка к int.')
         return
     try:
-        async with AsyncSessionLocal() as session:
-            current_interval = await adm.set_new_global_interval(
-                session, new_interval)
+        current_interval = await adm.set_new_global_interval(
+            session, new_interval)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
 
-    next_pairing_date = await get_next_pairing_date()
+    next_pairing_date = await get_next_pairing_date(session)
     data_text = adm.create_text_with_interval(
         ADMIN_TEXTS['success_new_interval'],
         current_interval, next_pairing_date)
@@ -645,18 +647,18 @@ async def process_set_new_interval(callback: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'cancel_changing_global_interval',
                              StateFilter(default_state))
-async def process_cancel_changing_interval(callback: CallbackQuery):
+async def process_cancel_changing_interval(callback: CallbackQuery,
+                                           session: AsyncSession):
     """
     Срабатывает, если админ передумал менять глобальный интервал.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            current_interval = await adm.get_global_interval(session)
+        current_interval = await adm.get_global_interval(session)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.answer(ADMIN_TEXTS['db_error'])
 
-    next_pairing_date = await get_next_pairing_date()
+    next_pairing_date = await get_next_pairing_date(session)
     data_text = adm.create_text_with_interval(
         ADMIN_TEXTS['cancel_changing_interval'],
         current_interval, next_pairing_date)
@@ -671,51 +673,44 @@ async def process_cancel_changing_interval(callback: CallbackQuery):
 async def process_export_to_gsheet(message: Message, google_sheet_id):
     """
     Хэндлер срабатывает при нажатии на кнопку клавиатуры "Выгрузить в
-    гугл таблицу". Делает экспорт данных и отправляет админу ссылку на таблицу.
+    гугл таблицу". Запускает экспорт фоновой задачей (или присоединяет
+    админа к уже идущему экспорту) и сразу отвечает. Итог и ссылку на
+    таблицу админ получит, когда задача завершится.
     Параметр google_sheet_id приходит из workflow_data диспетчера, куда должен
     быть передан при инициализации из конфига.
     """
     logger.debug('Админ нажал "выгрузить в гугл-таблицу".')
-    await message.answer(ADMIN_TEXTS['start_export_data'])
+    await export_jobs.request_export(message, google_sheet_id)
 
-    try:
-        async with AsyncSessionLocal() as session:
-            users = await adm.fetch_all_users(session)
-            pairs = await adm.fetch_all_pairs(session)
-        await adm.export_users_to_gsheet(users)
-        await adm.export_pairs_to_gsheet(pairs)
 
-    except SQLAlchemyError:
-        logger.error('Ошибка при работе с базой данных')
-        await message.answer(ADMIN_TEXTS['db_error'])
-    except SpreadsheetNotFound:
-        logger.exception('❌ Не нашёл таблицу по этому ID. '
-                         'Проверьте SPREADSHEET_ID и доступы.')
-        await message.answer(ADMIN_TEXTS['error_google_sheets_settings'])
-    except WorksheetNotFound:
-        logger.exception('❌ Лист с нужным именем не найден. '
-                         'Проверьте, чтобы имена листов соответсвовали '
-                         'инструкции разработчиков.')
-        await message.answer(ADMIN_TEXTS['error_google_sheets_wrong_name'])
-    except APIError as e:
-        logger.exception(f'❌ Ошибка API Google Sheets: '
-                         f'{e.response.status_code} — {e.response.reason}')
-        await message.answer(ADMIN_TEXTS['error_google_sheets_unknown'])
-    except HttpAccessTokenRefreshError:
-        logger.exception('❌ Не удалось обновить токен доступа. Проверьте '
-                         'credentials.json и права сервис-аккаунта.')
-        await message.answer(ADMIN_TEXTS['error_google_sheets_settings'])
-    except Exception as e:
-        logger.exception(f'❌ Неожиданная ошибка при записи в Google '
-                         f'Sheets:\n{e}')
-        await message.answer(ADMIN_TEXTS['error_google_sheets_unknown'])
-    else:
-        logger.info('Экспорт в гугл-таблицу завершен успешно.')
-        text = ADMIN_TEXTS['success_export_data'].format(
-            google_sheet_id=google_sheet_id)
-        await message.answer(
-            text=text, parse_mode='HTML'
-        )
+@admin_router.message(F.text == KEYBOARD_BUTTON_TEXTS['button_export_file'],
+                      StateFilter(default_state),
+                      flags={'read_replica': 60})
+async def process_export_to_file(message: Message,
+                                 read_session: AsyncSession):
+    """
+    Хэндлер срабатывает при нажатии на кнопку клавиатуры "Выгрузить в
+    файл". Выгружает юзеров и пары в zip-архив с CSV и отправляет его
+    админу документом. Работает без Гугл Таблиц.
+    """
+    logger.debug('Админ нажал "выгрузить в файл".')
+    await message.answer(ADMIN_TEXTS['start_export_file'])
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = Path(tmp_dir) / file_export.export_file_name(date.today())
+        try:
+            result = await file_export.export_to_archive(read_session, path)
+        except SQLAlchemyError:
+            logger.error('Ошибка при работе с базой данных')
+            await message.answer(ADMIN_TEXTS['db_error'])
+            return
+        await message.answer_document(
+            FSInputFile(path),
+            caption=ADMIN_TEXTS['success_export_file'].format(
+                users_rows=result.users_rows,
+                pairs_rows=result.pairs_rows))
+    logger.info(f'Выгрузка в файл отправлена: юзеров {result.users_rows}, '
+                f'пар {result.pairs_rows}.')
 
 
 @admin_router.message(
@@ -733,31 +728,27 @@ async def process_create_notification(message: Message, state: FSMContext):
 
 @admin_router.message(
         F.text == KEYBOARD_BUTTON_TEXTS['button_info'],
-        StateFilter(default_state))
-async def process_get_info(message: Message):
+        StateFilter(default_state),
+        flags={'read_replica': 60})
+async def process_get_info(message: Message, session: AsyncSession,
+                           read_session: AsyncSession):
     """
     Хэндлер срабатывает при нажатии админом кнопки с инфо о текущем
     состоянии работы бота.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            current_interval = await adm.get_global_interval(session)
-            number_of_users, number_of_active_users = (
-                await adm.get_users_count(session))
+        current_interval = await adm.get_global_interval(session)
+        stats = await adm.get_stats(read_session)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await message.answer(ADMIN_TEXTS['db_error'])
 
-    next_pairing_date = await get_next_pairing_date()
-
-    extra_data = {
-        'all_users': number_of_users,
-        'active_users': number_of_active_users
-    }
+    next_pairing_date = await get_next_pairing_date(session)
 
     data_text = adm.create_text_with_interval(
         ADMIN_TEXTS['info'],
-        current_interval, next_pairing_date, extra_data)
+        current_interval, next_pairing_date,
+        {key: str(value) for key, value in stats.items()})
 
     await message.answer(data_text)
 
@@ -770,8 +761,8 @@ async def process_cancel_creating_notif(message: Message, state: FSMContext):
 
 
 @admin_router.message(FSMAdminPanel.waiting_for_text_of_notification)
-async def process_get_text_of_notification(message: Message,
-                                           state: FSMContext):
+async def process_get_text_of_notification(message: Message, state: FSMContext,
+                                           session: AsyncSession):
     """
     Хэндлер срабатывает при получении сообщения в режиме ожидания текста для
     рассылки.
@@ -796,8 +787,7 @@ async def process_get_text_of_notification(message: Message,
         logger.info(f'получен текст для рассылки: {message.html_text}')
         received_text = message.html_text
     try:
-        async with AsyncSessionLocal() as session:
-            notif = await adm.create_notif(session, received_text)
+        notif = await adm.create_notif(session, received_text)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await message.answer(ADMIN_TEXTS['db_error'])
@@ -811,7 +801,8 @@ async def process_get_text_of_notification(message: Message,
 
 @admin_router.callback_query(lambda c: c.data.startswith('confirm_notif:'),
                              StateFilter(default_state))
-async def process_send_notif(callback: CallbackQuery, bot: Bot):
+async def process_send_notif(callback: CallbackQuery, bot: Bot,
+                             session: AsyncSession):
     """
     Хэндлер срабатывает при нажатии инлайн-кнопки для
     подтверждения отправки рассылки.
@@ -820,7 +811,7 @@ async def process_send_notif(callback: CallbackQuery, bot: Bot):
     _, notif_id_str = adm.parse_callback_data(callback.data)
     try:
         notif_id = int(notif_id_str)
-        notif = await adm.get_notif(notif_id)
+        notif = await adm.get_notif(session, notif_id)
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         if isinstance(callback.message, Message):
@@ -882,7 +873,7 @@ async def process_cancel_notif(callback: CallbackQuery):
 @admin_router.message(
         F.text == KEYBOARD_BUTTON_TEXTS['button_on_off'],
         StateFilter(default_state))
-async def process_button_on_off(message: Message):
+async def process_button_on_off(message: Message, session: AsyncSession):
     """
     Хэндлер срабатывает при нажатии админом кнопки "Управление ботом"
     и отправляет инлайн-кнопку с просьбой подтвердить остановку или
@@ -890,20 +881,19 @@ async def process_button_on_off(message: Message):
     функционала формирования пар.
     """
     try:
-        next_pairing_date = await get_next_pairing_date()
-        async with AsyncSessionLocal() as session:
-            setting = await session.execute(select(Setting))
-            setting_obj = setting.scalar_one_or_none()
-
-            if setting_obj and not setting_obj.is_pairing_on:
-                await message.answer(
-                    ADMIN_TEXTS['ask_for_pairing_on'].format(
-                        status=next_pairing_date),
-                    reply_markup=generate_inline_pairing_on())
-            else:
-                await message.answer(
-                    ADMIN_TEXTS['ask_for_pairing_off'],
-                    reply_markup=generate_inline_pairing_off())
+        next_pairing_date = await get_next_pairing_date(session)
+        setting = await session.execute(select(Setting))
+        setting_obj = setting.scalar_one_or_none()
+
+        if setting_obj and not setting_obj.is_pairing_on:
+            await message.answer(
+                ADMIN_TEXTS['ask_for_pairing_on'].format(
+                    status=next_pairing_date),
+                reply_markup=generate_inline_pairing_on())
+        else:
+            await message.answer(
+                ADMIN_TEXTS['ask_for_pairing_off'],
+                reply_markup=generate_inline_pairing_off())
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         if isinstance(message, Message):
@@ -913,24 +903,24 @@ async def process_button_on_off(message: Message):
 
 @admin_router.callback_query(F.data == 'confirm_pairing_off',
                              StateFilter(default_state))
-async def pause_pairing_handler(callback: CallbackQuery):
+async def pause_pairing_handler(callback: CallbackQuery,
+                                session: AsyncSession):
     """
     Хэндлер срабатвает при нажатии инлайн-кнопки "Да", чтобы
     подтвердить остановку функционала формирования пар.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            setting = await session.execute(select(Setting))
-            setting_obj = setting.scalar_one_or_none()
-
-            if setting_obj and not not setting_obj.is_pairing_on:
-                setting_obj.is_pairing_on = False
-                await session.commit()
-                await callback.message.edit_text(
-                    ADMIN_TEXTS['notice_pairing_off'])
-            else:
-                await callback.message.edit_text(
-                    ADMIN_TEXTS['pairing_off_already'])
+        setting = await session.execute(select(Setting))
+        setting_obj = setting.scalar_one_or_none()
+
+        if setting_obj and not not setting_obj.is_pairing_on:
+            setting_obj.is_pairing_on = False
+            await session.flush()
+            await callback.message.edit_text(
+                ADMIN_TEXTS['notice_pairing_off'])
+        else:
+            await callback.message.edit_text(
+                ADMIN_TEXTS['pairing_off_already'])
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.message.answer(ADMIN_TEXTS['db_error'])
@@ -939,26 +929,26 @@ async def pause_pairing_handler(callback: CallbackQuery):
 
 @admin_router.callback_query(F.data == 'confirm_pairing_on',
                              StateFilter(default_state))
-async def resume_pairing_handler(callback: CallbackQuery):
+async def resume_pairing_handler(callback: CallbackQuery,
+                                 session: AsyncSession):
     """
     Хэндлер срабатвает при нажатии инлайн-кнопки "Да", чтобы
     подтвердить возобновление функционала формирования пар.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            setting = await session.execute(select(Setting))
-            setting_obj = setting.scalar_one_or_none()
-
-            if setting_obj and not setting_obj.is_pairing_on:
-                setting_obj.is_pairing_on = True
-                await session.commit()
-                next_pairing_date = await get_next_pairing_date()
-                await callback.message.edit_text(
-                    ADMIN_TEXTS['notice_pairing_on'].format(
-                        next_pairing_date=next_pairing_date))
-            else:
-                await callback.message.edit_text(
-                    ADMIN_TEXTS['pairing_on_already'])
+        setting = await session.execute(select(Setting))
+        setting_obj = setting.scalar_one_or_none()
+
+        if setting_obj and not setting_obj.is_pairing_on:
+            setting_obj.is_pairing_on = True
+            await session.flush()
+            next_pairing_date = await get_next_pairing_date(session)
+            await callback.message.edit_text(
+                ADMIN_TEXTS['notice_pairing_on'].format(
+                    next_pairing_date=next_pairing_date))
+        else:
+            await callback.message.edit_text(
+                ADMIN_TEXTS['pairing_on_already'])
     except SQLAlchemyError:
         logger.error('Ошибка при работе с базой данных')
         await callback.message.answer(ADMIN_TEXTS['db_error'])
@@ -974,7 +964,7 @@ async def process_cancel_pairing_off(callback: CallbackQuery):
 
 
 @admin_router.message(Command('user_menu'), StateFilter(default_state))
-async def open_user_menu_to_admin(message: Message):
+async def open_user_menu_to_admin(message: Message, session: AsyncSession):
     """
     Хэндлер срабатывает при отправке команды /user_menu и отправляет клавиатуру
     обычного пользователя (в зависимости от статуса участия).
@@ -987,22 +977,21 @@ async def open_user_menu_to_admin(message: Message):
     user_telegram_id = message.from_user.id
 
     try:
-        async with AsyncSessionLocal() as session:
-            user = await get_user_by_telegram_id(session, user_telegram_id)
-
-            if user is None:
-                user = await create_user(session, user_telegram_id,
-                                         message.from_user.username,
-                                         message.from_user.first_name,
-                                         message.from_user.last_name)
-                await adm.set_user_as_admin(user_telegram_id)
-                await message.answer(ADMIN_TEXTS['add_to_participants'],
-                                     reply_markup=create_active_user_keyboard())
-            else:
-                reply_kb = (create_active_user_keyboard() if user.is_active
-                            else create_inactive_user_keyboard())
-                await message.answer(ADMIN_TEXTS['change_menu_to_user_kb'],
-                                     reply_markup=reply_kb)
+        user = await get_user_by_telegram_id(session, user_telegram_id)
+
+        if user is None:
+            user = await create_user(session, user_telegram_id,
+                                     message.from_user.username,
+                                     message.from_user.first_name,
+                                     message.from_user.last_name)
+            await adm.set_user_as_admin(session, user_telegram_id)
+            await message.answer(ADMIN_TEXTS['add_to_participants'],
+                                 reply_markup=create_active_user_keyboard())
+        else:
+            reply_kb = (create_active_user_keyboard() if user.is_active
+                        else create_inactive_user_keyboard())
+            await message.answer(ADMIN_TEXTS['change_menu_to_user_kb'],
+                                 reply_markup=reply_kb)
     except SQLAlchemyError as e:
         logger.error('Ошибка при работе с базой данных: %s', str(e))
         await message.answer(ADMIN_TEXTS['db_error'])
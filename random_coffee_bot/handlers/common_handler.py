@@ -10,8 +10,8 @@ from aiogram.exceptions import (AiogramError,
                                 TelegramNetworkError,
                                 TelegramRetryAfter)
 from aiogram.types import CallbackQuery, ErrorEvent, Message
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database.db import AsyncSessionLocal
 from ..services.user_service import create_text_random_coffee
 from ..texts import KEYBOARD_BUTTON_TEXTS, USER_TEXTS
 
@@ -24,13 +24,12 @@ common_router = Router()
 @common_router.message(
         F.text == KEYBOARD_BUTTON_TEXTS['button_how_it_works'],
         StateFilter(default_state))
-async def text_random_coffee(message: Message):
+async def text_random_coffee(message: Message, session: AsyncSession):
     """
     Выводит текст о том как работает Random_coffee
     """
-    async with AsyncSessionLocal() as session:
-        text = await create_text_random_coffee(session)
-        await message.answer(text, parse_mode='HTML')
+    text = await create_text_random_coffee(session)
+    await message.answer(text, parse_mode='HTML')
 
 
 @common_router.message(Command('help'), StateFilter(default_state))
@@ -5,6 +5,7 @@ from aiogram.types import Message
 from aiogram.fsm.state import default_state
 from aiogram.fsm.storage.base import StorageKey
 from aiogram.fsm.context import FSMContext
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..filters.super_admin_filters import SuperAdminFilter
 from ..main_menu.main_menu_setup import (commands_for_admin,
@@ -49,7 +50,8 @@ async def cancel_admin_handler(message: Message, state: FSMContext):
 
 
 @super_admin_router.message(StateFilter(FSMAdminPanel.waiting_for_user_id))
-async def process_user_id(message: Message, state: FSMContext):
+async def process_user_id(message: Message, state: FSMContext,
+                          session: AsyncSession):
     """Хэндлер для ввода ID пользователя, которого хотим сделать админом."""
     if message.text in KEYBOARD_BUTTON_TEXTS.values():
         await message.answer(ADMIN_TEXTS['no_kb_buttons'])
@@ -61,12 +63,12 @@ async def process_user_id(message: Message, state: FSMContext):
     if isinstance(user_id_str, str) and user_id_str.isdigit():
         user_id = int(user_id_str)
 
-        if await is_user_admin(user_id):
+        if await is_user_admin(session, user_id):
             await message.answer(ADMIN_TEXTS['user_already_admin'])
             await state.clear()
             return
 
-        success = await set_user_as_admin(user_id)
+        success = await set_user_as_admin(session, user_id)
 
         if success:
             await message.answer(
@@ -118,7 +120,8 @@ async def cancel_user_handler(message: Message, state: FSMContext):
 
 
 @super_admin_router.message(StateFilter(FSMAdminPanel.waiting_for_admin_id))
-async def process_admin_id(message: Message, state: FSMContext, admins_list):
+async def process_admin_id(message: Message, state: FSMContext, admins_list,
+                           session: AsyncSession):
     """Ввод ID не главного админа которого хочешь удалить."""
     if message.text in KEYBOARD_BUTTON_TEXTS.values():
         await message.answer(ADMIN_TEXTS['no_kb_buttons'])
@@ -129,7 +132,7 @@ async def process_admin_id(message: Message, state: FSMContext, admins_list):
     if isinstance(user_id_str, str) and user_id_str.isdigit():
         user_id = int(user_id_str)
 
-        if not await is_admin_user(user_id):
+        if not await is_admin_user(session, user_id):
             await message.answer(
                 ADMIN_TEXTS['invalid_admin_user']
             )
@@ -143,7 +146,7 @@ async def process_admin_id(message: Message, state: FSMContext, admins_list):
             await state.clear()
             return
 
-        success, user = await set_admin_as_user(user_id)
+        success, user = await set_admin_as_user(session, user_id)
 
         if success:
             keyboard = (create_active_user_keyboard() if user.is_active
@@ -179,9 +182,9 @@ async def process_admin_id(message: Message, state: FSMContext, admins_list):
 
 
 @super_admin_router.message(Command('admin_list'), StateFilter(default_state))
-async def admin_list_handler(message: Message):
+async def admin_list_handler(message: Message, session: AsyncSession):
     """Хэндлер для команды /admin_list, выводит список всех администраторов."""
-    admins = await get_admin_list()
+    admins = await get_admin_list(session)
 
     if not admins:
         await message.answer(ADMIN_TEXTS['empty_admin_list'])
@@ -200,7 +203,7 @@ async def admin_list_handler(message: Message):
 
 # Служебный хэндлер на время разработки
 @super_admin_router.message(Command('del'), StateFilter(default_state))
-async def remove_me_from_db(message: Message):
-    from services.admin_service import delete_user
-    await delete_user(message.from_user.id)
+async def remove_me_from_db(message: Message, session: AsyncSession):
+    from ..services.admin_service import delete_user
+    await delete_user(session, message.from_user.id)
     await message.answer('Готово')
@@ -1,5 +1,4 @@
 import logging
-from math import ceil
 from typing import Optional, Tuple
 
 from aiogram.filters.callback_data import CallbackData
@@ -7,14 +6,17 @@ from aiogram.types import (InlineKeyboardButton,
                            InlineKeyboardMarkup,
                            KeyboardButton)
 from aiogram.utils.keyboard import InlineKeyboardBuilder, ReplyKeyboardBuilder
-from sqlalchemy import func, select
+from sqlalchemy import select, tuple_
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from ..database.db import AsyncSessionLocal
-from ..database.models import User
+from ..database.models import Stat, STAT_LISTED_USERS, User
+from ..database.views import select_user_views, to_user_view
 from ..texts import (INLINE_BUTTON_TEXTS,
                    INTERVAL_TEXTS,
                    KEYBOARD_BUTTON_TEXTS)
+from ..utils.cache import ttl_cache
+from ..utils.single_flight import single_flight
 
 
 logger = logging.getLogger(__name__)
@@ -28,6 +30,8 @@ button_participant_management = KeyboardButton(
     text=KEYBOARD_BUTTON_TEXTS['button_participant_management'])
 button_google_sheets = KeyboardButton(
     text=KEYBOARD_BUTTON_TEXTS['button_google_sheets'])
+button_export_file = KeyboardButton(
+    text=KEYBOARD_BUTTON_TEXTS['button_export_file'])
 button_change_interval = KeyboardButton(
     text=KEYBOARD_BUTTON_TEXTS['button_change_interval'])
 button_send_notification = KeyboardButton(
@@ -41,6 +45,7 @@ buttons_kb_builder_admin.row(
     button_info,
     button_participant_management,
     button_google_sheets,
+    button_export_file,
     button_change_interval,
     button_send_notification,
     button_on_off,
@@ -180,43 +185,115 @@ class UsersCallbackFactory(CallbackData, prefix='get_user'):
 
 
 class PageCallbackFactory(CallbackData, prefix='page'):
+    """
+    Страница списка участников. Список листается по ключу (last_name, id):
+    cursor - id крайнего юзера на текущей странице, direction - в какую
+    сторону от него листать. page нужен только для отображения.
+    """
     page: int
+    direction: str = 'next'
+    cursor: int = 0
 
 
 ITEMS_PER_PAGE = 10
+LISTED_USERS_COUNT_TTL = 60
+
+LISTED_USERS_FILTER = (User.is_admin.is_(False), User.is_blocked.is_(False))
+
+
+@ttl_cache(LISTED_USERS_COUNT_TTL)
+@single_flight
+async def get_listed_users_count(session: AsyncSession) -> int:
+    """
+    Возвращает количество юзеров, которые показываются в списке для
+    админа (LISTED_USERS_FILTER), из счетчика в таблице stats.
+    Значение кэшируется, поэтому может немного отставать.
+    """
+    result = await session.execute(
+        select(Stat.value).where(Stat.key == STAT_LISTED_USERS))
+    return result.scalar_one_or_none() or 0
+
+
+def _seek_segments(cursor_last_name: Optional[str], cursor_id: int,
+                   forward: bool) -> list[tuple]:
+    """
+    Возвращает условия и сортировки для строк после (forward=True) или до
+    курсора в порядке last_name ASC NULLS LAST, id ASC.
+    Юзеры без фамилии идут в конце списка. Сравнение кортежей с NULL не
+    работает, поэтому они выбираются отдельным сегментом. Каждый сегмент
+    читается по индексу ix_user_list_order без сортировки.
+    """
+    by_name = (User.last_name.asc(), User.id.asc())
+    by_name_desc = (User.last_name.desc(), User.id.desc())
+    no_name = User.last_name.is_(None)
+    if forward:
+        if cursor_last_name is None:
+            return [((no_name, User.id > cursor_id), (User.id.asc(),))]
+        return [
+            ((tuple_(User.last_name, User.id)
+              > tuple_(cursor_last_name, cursor_id),), by_name),
+            ((no_name,), (User.id.asc(),)),
+        ]
+    if cursor_last_name is None:
+        return [
+            ((no_name, User.id < cursor_id), (User.id.desc(),)),
+            ((User.last_name.is_not(None),), by_name_desc),
+        ]
+    return [((tuple_(User.last_name, User.id)
+              < tuple_(cursor_last_name, cursor_id),), by_name_desc)]
 
 
-async def generate_inline_user_list(page: int = 1
+async def generate_inline_user_list(session: AsyncSession, page: int = 1,
+                                    cursor: int = 0,
+                                    direction: str = 'next'
                                     ) -> Tuple[Optional[InlineKeyboardBuilder],
                                                int]:
+    """
+    Формирует страницу списка участников. Без курсора возвращает первую
+    страницу. Возвращает клавиатуру (None, если на странице никого нет)
+    и общее количество участников в списке.
+    """
+    forward = direction != 'prev'
+    limit = ITEMS_PER_PAGE + 1
     try:
-        async with AsyncSessionLocal() as session:
-            total_res = await session.execute(
-                select(func.count())
-                .select_from(User)
-                .where(User.is_admin.is_(False), User.is_blocked.is_(False))
+        cursor_row = None
+        if cursor:
+            cursor_res = await session.execute(
+                select(User.last_name).where(User.id == cursor))
+            cursor_row = cursor_res.one_or_none()
+        if cursor_row is None:
+            cursor, forward, page = 0, True, 1
+            segments = [((), (User.last_name.asc().nulls_last(),
+                              User.id.asc()))]
+        else:
+            segments = _seek_segments(cursor_row.last_name, cursor, forward)
+
+        users = []
+        for conditions, order in segments:
+            result = await session.execute(
+                select_user_views()
+                .where(*LISTED_USERS_FILTER, *conditions)
+                .order_by(*order)
+                .limit(limit - len(users))
             )
-            total = total_res.scalar_one()
-
-            if total == 0:
-                return None, 0
+            users.extend(to_user_view(row) for row in result)
+            if len(users) >= limit:
+                break
 
-            last_page = max(1, ceil(total/ITEMS_PER_PAGE))
-            page = min(max(1, page), last_page)
-
-            stmt = (
-                select(User)
-                .where(User.is_admin.is_(False), User.is_blocked.is_(False))
-                .order_by(User.last_name)
-                .offset((page - 1) * ITEMS_PER_PAGE)
-                .limit(ITEMS_PER_PAGE)
-            )
-            result = await session.execute(stmt)
-            users = result.scalars().all()
+        if not users and not cursor:
+            return None, 0
+        total = await get_listed_users_count(session)
     except SQLAlchemyError as e:
         logger.exception('Не удалось получить список пользователей из БД.')
         raise e
 
+    has_more = len(users) > ITEMS_PER_PAGE
+    users = users[:ITEMS_PER_PAGE]
+    if not forward:
+        users.reverse()
+    has_prev = has_more if not forward else bool(cursor)
+    has_next = has_more if forward else True
+
     if not users:
         return None, total
 
@@ -231,15 +308,17 @@ async def generate_inline_user_list(page: int = 1
                 telegram_id=u.telegram_id).pack()
         )
 
-    if page > 1:
+    if has_prev and page > 1:
         kb.button(
             text=INLINE_BUTTON_TEXTS['go_back'],
-            callback_data=PageCallbackFactory(page=page - 1).pack()
+            callback_data=PageCallbackFactory(
+                page=page - 1, direction='prev', cursor=users[0].id).pack()
         )
-    if page * ITEMS_PER_PAGE < total:
+    if has_next:
         kb.button(
             text=INLINE_BUTTON_TEXTS['go_forward'],
-            callback_data=PageCallbackFactory(page=page + 1).pack()
+            callback_data=PageCallbackFactory(
+                page=page + 1, direction='next', cursor=users[-1].id).pack()
         )
 
     kb.adjust(1)
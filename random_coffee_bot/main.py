@@ -7,9 +7,10 @@ logger = logging.getLogger(__name__)
 
 import asyncio
 from aiogram import Bot, Dispatcher
-from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 
 from .config import Config, load_config
+from .database.backend import create_sqlite_schema
+from .database.db import AsyncSessionLocal, engine, read_router
 from .globals import job_context
 from .handlers.active_user_handlers import active_user_router
 from .handlers.admin_handlers import admin_router
@@ -19,9 +20,19 @@ from .handlers.inactive_user_handlers import inactive_user_router
 from .handlers.super_admin_handlers import super_admin_router
 from .handlers.user_start_handler import user_start_router
 from .main_menu.main_menu_setup import set_main_menu_on_bot_start
-from .middlewares import AccessMiddleware
+from .middlewares import (AccessMiddleware,
+                          DbSessionMiddleware,
+                          QueryStatsMiddleware,
+                          ReadSessionMiddleware,
+                          ThrottlingMiddleware,
+                          UpdateSchedulerMiddleware)
 from .utils.bootstrap_settings import ensure_app_settings
-from .utils.scheduler import schedule_pairing_jobs
+from .utils.google_sheets import close_sheets_client
+from .utils.scheduler import (schedule_maintenance_jobs,
+                              schedule_pairing_jobs,
+                              shutdown_scheduler,
+                              watch_interval_changes)
+from .utils.setting_events import SettingsListener
 
 
 async def main():
@@ -33,10 +44,14 @@ async def main():
     admins_list = config.tg_bot.admins_list
     google_sheet_id = config.g_sheet.sheet_id
 
-    engine = create_async_engine(config.db.db_url, echo=False)
-    session_maker = async_sessionmaker(engine, expire_on_commit=False)
+    session_maker = AsyncSessionLocal
+
+    # Для SQLite схема создается по моделям, для PostgreSQL - миграциями.
+    if await create_sqlite_schema(engine):
+        logger.info('Схема БД SQLite создана по моделям.')
 
     await ensure_app_settings(
+        session_maker,
         2,
         config.bs_settings.first_pairing_at,
         False)
@@ -53,7 +68,24 @@ async def main():
         'google_sheet_id': google_sheet_id
     })
 
+    dp.update.outer_middleware(ThrottlingMiddleware(
+        rate_limit=config.throttling.rate_limit,
+        period=config.throttling.period,
+        duplicate_window=config.throttling.duplicate_window))
+    update_scheduler = UpdateSchedulerMiddleware(
+        max_concurrency=config.updates.max_concurrency,
+        max_pending=config.updates.max_pending)
+    dp.update.outer_middleware(update_scheduler)
+    query_stats = QueryStatsMiddleware(config.db.handler_query_warn)
+    dp.update.outer_middleware(query_stats)
+    dp.update.outer_middleware(DbSessionMiddleware(session_maker))
     dp.update.middleware(AccessMiddleware())
+    dp.message.middleware(query_stats)
+    dp.callback_query.middleware(query_stats)
+    dp.chat_member.middleware(query_stats)
+    read_sessions = ReadSessionMiddleware(read_router)
+    dp.message.middleware(read_sessions)
+    dp.callback_query.middleware(read_sessions)
     dp.include_router(group_router)
     dp.include_router(super_admin_router)
     dp.include_router(admin_router)
@@ -63,14 +95,27 @@ async def main():
     dp.include_router(common_router)
 
     dp.startup.register(set_main_menu_on_bot_start)
+    dp.shutdown.register(update_scheduler.wait_closed)
+    dp.shutdown.register(close_sheets_client)
 
     #  На случай, если нужно будет запланировать все задачи с чистого листа на новую дату:
     # scheduler.start()  # Для прода закоментировать
     # scheduler.remove_all_jobs()  # Для прода закоментировать
 
     await schedule_pairing_jobs(session_maker)
-
-    await dp.start_polling(bot)
+    schedule_maintenance_jobs()
+    dp.shutdown.register(shutdown_scheduler)
+
+    # Смена интервала в этом или другом процессе бота сразу
+    # перепланирует паринг.
+    watch_interval_changes()
+    settings_listener = SettingsListener(engine)
+    if settings_listener.start():
+        dp.shutdown.register(settings_listener.stop)
+
+    # Апдейты раскладывает по очередям UpdateSchedulerMiddleware, поэтому
+    # поллинг не создает задачу на каждый апдейт и ждет, если очереди полны.
+    await dp.start_polling(bot, handle_as_tasks=False)
 
 
 if __name__ == "__main__":
@@ -5,6 +5,7 @@ from aiogram.types import (BotCommandScopeDefault,
                            BotCommandScopeChat,
                            MenuButtonCommands,
                            MenuButtonDefault)
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
 from ..config import load_config
 from ..main_menu import commands as c
@@ -59,14 +60,17 @@ async def set_main_menu_for_super_admins(bot: Bot):
         await set_main_menu(bot, admin_tg_id, commands_for_super_admin)
 
 
-async def set_main_menu_for_admins(bot: Bot):
-    admins_list = await get_admin_list()
+async def set_main_menu_for_admins(bot: Bot,
+                                   session_maker: async_sessionmaker):
+    async with session_maker() as session:
+        admins_list = await get_admin_list(session)
 
     for admin in admins_list:
         await set_main_menu(bot, admin.telegram_id, commands_for_admin)
 
 
-async def set_main_menu_on_bot_start(bot: Bot):
+async def set_main_menu_on_bot_start(bot: Bot,
+                                     session_maker: async_sessionmaker):
     await bot.set_my_commands(commands=[], scope=BotCommandScopeDefault())
-    await set_main_menu_for_admins(bot)
+    await set_main_menu_for_admins(bot, session_maker)
     await set_main_menu_for_super_admins(bot)
@@ -0,0 +1,153 @@
+import threading
+from bisect import bisect_left
+from typing import Any
+
+
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+                   2.5, 5.0, 10.0)
+
+
+class Counter:
+    """Монотонно растущий счетчик."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {'value': self._value}
+
+
+class Gauge:
+    """Значение, которое может как расти, так и уменьшаться."""
+
+    def __init__(self) -> None:
+        self._value = 0.0
+        self._lock = threading.Lock()
+
+    def set(self, value: float) -> None:
+        with self._lock:
+            self._value = value
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value -= amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    def snapshot(self) -> dict[str, Any]:
+        return {'value': self._value}
+
+
+class Histogram:
+    """
+    Гистограмма наблюдений с фиксированными границами корзин.
+    Хранит количество, сумму и максимум наблюдений.
+    """
+
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)
+        self._count = 0
+        self._sum = 0.0
+        self._max = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        with self._lock:
+            self._counts[bisect_left(self.buckets, value)] += 1
+            self._count += 1
+            self._sum += value
+            if value > self._max:
+                self._max = value
+
+    @property
+    def count(self) -> int:
+        return self._count
+
+    @property
+    def sum(self) -> float:
+        return self._sum
+
+    def quantile(self, q: float) -> float:
+        """
+        Возвращает верхнюю границу корзины, в которую попадает квантиль q.
+        Для наблюдений выше последней границы возвращает максимум.
+        """
+        if not self._count:
+            return 0.0
+        rank = q * self._count
+        seen = 0
+        for bound, amount in zip(self.buckets, self._counts):
+            seen += amount
+            if seen >= rank:
+                return bound
+        return self._max
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            'count': self._count,
+            'sum': self._sum,
+            'max': self._max,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+        }
+
+
+class MetricsRegistry:
+    """
+    Хранилище метрик процесса. Метрика однозначно определяется именем и
+    набором меток, повторный запрос возвращает уже созданный экземпляр.
+    """
+
+    def __init__(self) -> None:
+        self._metrics: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def _get_or_create(self, factory, name: str, labels: dict[str, str]):
+        key = (name, tuple(sorted(labels.items())))
+        metric = self._metrics.get(key)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.setdefault(key, factory())
+        return metric
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        return self._get_or_create(Counter, name, labels)
+
+    def gauge(self, name: str, **labels: str) -> Gauge:
+        return self._get_or_create(Gauge, name, labels)
+
+    def histogram(self, name: str,
+                  buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+                  **labels: str) -> Histogram:
+        return self._get_or_create(lambda: Histogram(buckets), name, labels)
+
+    def snapshot(self, prefix: str = '') -> dict[str, dict[str, Any]]:
+        """Возвращает текущие значения метрик, имя которых начинается
+        с prefix."""
+        result = {}
+        for (name, labels), metric in list(self._metrics.items()):
+            if not name.startswith(prefix):
+                continue
+            label_text = ','.join(f'{k}={v}' for k, v in labels)
+            full_name = f'{name}{{{label_text}}}' if label_text else name
+            result[full_name] = metric.snapshot()
+        return result
+
+
+registry = MetricsRegistry()
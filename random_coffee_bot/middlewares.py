@@ -1,12 +1,24 @@
+import asyncio
 import logging
+import time
+from collections import deque
 from typing import Any, Awaitable, Callable, Dict
 
 from aiogram import BaseMiddleware
 from aiogram.enums import ChatType
-from aiogram.types import ReplyKeyboardRemove, Update
+from aiogram.dispatcher.flags import get_flag
+from aiogram.exceptions import TelegramAPIError
+from aiogram.types import (CallbackQuery,
+                           ErrorEvent,
+                           ReplyKeyboardRemove,
+                           TelegramObject,
+                           Update)
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
-from .database.db import AsyncSessionLocal
+from .database.instrumentation import QueryStats, current_query_stats
+from .database.replica import ReadSessionRouter
+from .metrics import registry
 from .services.user_service import get_user_by_telegram_id
 from .texts import USER_TEXTS
 
@@ -14,6 +26,359 @@ from .texts import USER_TEXTS
 logger = logging.getLogger(__name__)
 
 
+class ThrottlingMiddleware(BaseMiddleware):
+    """
+    Ограничивает частоту апдейтов от одного пользователя.
+    Для каждого юзера хранится скользящее окно времени последних апдейтов:
+    если за period секунд пришло больше rate_limit апдейтов, лишние
+    отбрасываются до того, как откроется сессия БД. Один раз за окно юзер
+    получает предупреждение.
+    Повторное нажатие той же инлайн-кнопки в течение duplicate_window
+    секунд считается дублем и тоже отбрасывается, а на колбэк отвечаем
+    пустым ответом, чтобы у юзера не висели часики.
+    Количество отброшенных апдейтов пишется в метрику
+    throttling_dropped_total с причиной в метке reason.
+    """
+    CLEANUP_EVERY = 1000
+
+    def __init__(self, rate_limit: int, period: float,
+                 duplicate_window: float,
+                 clock: Callable[[], float] = time.monotonic):
+        self.rate_limit = rate_limit
+        self.period = period
+        self.duplicate_window = duplicate_window
+        self.clock = clock
+        self._hits: dict[int, deque[float]] = {}
+        self._warned: set[int] = set()
+        self._last_callback: dict[int, tuple[str | None, float]] = {}
+        self._calls = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,  # type: ignore
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        if user is None or event.chat_member:
+            return await handler(event, data)
+
+        now = self.clock()
+        self._calls += 1
+        if self._calls % self.CLEANUP_EVERY == 0:
+            self._cleanup(now)
+
+        callback = event.callback_query
+        if callback:
+            last_data, last_at = self._last_callback.get(user.id,
+                                                         (None, 0.0))
+            if (last_data == callback.data
+                    and now - last_at < self.duplicate_window):
+                logger.debug(f'Повторный колбэк {callback.data} от юзера '
+                             f'{user.id} отброшен.')
+                self._drop('duplicate_callback')
+                await self._answer_silently(callback)
+                return
+
+        hits = self._hits.setdefault(user.id, deque())
+        while hits and now - hits[0] >= self.period:
+            hits.popleft()
+        if len(hits) >= self.rate_limit:
+            logger.info(f'Юзер {user.id} превысил лимит апдейтов. '
+                        'Апдейт отброшен.')
+            self._drop('rate_limit')
+            if user.id not in self._warned:
+                self._warned.add(user.id)
+                await self._warn(event)
+            elif callback:
+                await self._answer_silently(callback)
+            return
+
+        hits.append(now)
+        self._warned.discard(user.id)
+        if callback:
+            # окно дублей отсчитывается от колбэка, который обработали,
+            # иначе частые нажатия продлевали бы его бесконечно
+            self._last_callback[user.id] = (callback.data, now)
+        registry.counter('throttling_passed_total').inc()
+        return await handler(event, data)
+
+    def _drop(self, reason: str) -> None:
+        registry.counter('throttling_dropped_total', reason=reason).inc()
+
+    def _cleanup(self, now: float) -> None:
+        """Забывает юзеров, от которых давно не было апдейтов."""
+        for user_id, hits in list(self._hits.items()):
+            if not hits or now - hits[-1] >= self.period:
+                del self._hits[user_id]
+                self._warned.discard(user_id)
+        for user_id, (_, last_at) in list(self._last_callback.items()):
+            if now - last_at >= self.duplicate_window:
+                del self._last_callback[user_id]
+
+    async def _warn(self, event: Update) -> None:
+        try:
+            if event.message:
+                await event.message.answer(USER_TEXTS['too_many_requests'])
+            elif event.callback_query:
+                await event.callback_query.answer(
+                    USER_TEXTS['too_many_requests'])
+        except TelegramAPIError:
+            logger.warning('Не удалось предупредить юзера о превышении '
+                           'лимита апдейтов.')
+
+    async def _answer_silently(self, callback: CallbackQuery) -> None:
+        try:
+            await callback.answer()
+        except TelegramAPIError:
+            logger.debug('Не удалось ответить на отброшенный колбэк.')
+
+
+class UpdateSchedulerMiddleware(BaseMiddleware):
+    """
+    Планировщик обработки апдейтов.
+    Апдейты одного пользователя складываются в его очередь и
+    обрабатываются строго по порядку одной задачей-воркером, поэтому шаги
+    FSM одного юзера не обгоняют друг друга; состояние FSM читается
+    заново, когда до апдейта дошла очередь. Одновременно обрабатывается
+    не больше max_concurrency апдейтов всех юзеров, чтобы всплеск
+    нагрузки не исчерпал пул соединений с БД.
+    Если в очередях накопилось max_pending апдейтов, мидлварь не
+    принимает новый апдейт, пока не освободится место. Поллинг при этом
+    ждет, то есть новые апдейты не забираются у Телеграма (бэкпрешер).
+    Для этого поллинг нужно запускать с handle_as_tasks=False.
+    Глубина очередей пишется в метрики update_scheduler_*.
+    Исключения из хэндлеров передаются в обработчики ошибок диспетчера.
+    """
+    def __init__(self, max_concurrency: int, max_pending: int):
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self._running = asyncio.Semaphore(max_concurrency)
+        self._free_slots = asyncio.Semaphore(max_pending)
+        self._queues: dict[int, deque[tuple]] = {}
+        self._workers: dict[int, asyncio.Task] = {}
+        self._pending = 0
+
+    async def __call__(
+        self,
+        handler: Callable[[Update, Dict[str, Any]], Awaitable[Any]],
+        event: Update,  # type: ignore
+        data: Dict[str, Any]
+    ) -> Any:
+        user = data.get('event_from_user')
+        if user is None:
+            async with self._running:
+                return await handler(event, data)
+
+        if self._free_slots.locked():
+            logger.debug('Очереди апдейтов заполнены, ждем освобождения '
+                         'места.')
+            registry.counter('update_scheduler_backpressure_total').inc()
+        await self._free_slots.acquire()
+
+        queue = self._queues.setdefault(user.id, deque())
+        queue.append((handler, event, data, time.perf_counter()))
+        self._pending += 1
+        registry.gauge('update_scheduler_pending').set(self._pending)
+        registry.histogram('update_scheduler_user_queue_depth',
+                           buckets=(1, 2, 3, 5, 10, 20, 50)
+                           ).observe(len(queue))
+
+        if user.id not in self._workers:
+            self._workers[user.id] = asyncio.create_task(
+                self._work(user.id), name=f'updates-{user.id}')
+            registry.gauge('update_scheduler_active_users').set(
+                len(self._workers))
+
+    async def _work(self, user_id: int) -> None:
+        """Обрабатывает очередь одного юзера, пока она не опустеет."""
+        queue = self._queues[user_id]
+        try:
+            while queue:
+                handler, event, data, queued_at = queue.popleft()
+                try:
+                    async with self._running:
+                        registry.histogram(
+                            'update_scheduler_wait_seconds'
+                        ).observe(time.perf_counter() - queued_at)
+                        await self._refresh_state(data)
+                        await handler(event, data)
+                except Exception as e:
+                    await self._propagate_error(event, data, e)
+                finally:
+                    self._pending -= 1
+                    self._free_slots.release()
+                    registry.gauge('update_scheduler_pending').set(
+                        self._pending)
+        finally:
+            del self._queues[user_id]
+            del self._workers[user_id]
+            registry.gauge('update_scheduler_active_users').set(
+                len(self._workers))
+
+    @staticmethod
+    async def _refresh_state(data: Dict[str, Any]) -> None:
+        """
+        FSMContextMiddleware диспетчера читает состояние до того, как
+        апдейт попадет в очередь. Пока он ждал, предыдущие апдейты юзера
+        могли сменить состояние, поэтому перед обработкой читаем его
+        заново - иначе StateFilter сработает по устаревшему.
+        """
+        state = data.get('state')
+        if state is not None:
+            data['raw_state'] = await state.get_state()
+
+    async def _propagate_error(self, event: Update, data: Dict[str, Any],
+                               exception: Exception) -> None:
+        dispatcher = data.get('dispatcher')
+        if dispatcher is None:
+            logger.exception(f'Ошибка при обработке апдейта {event.update_id}',
+                             exc_info=exception)
+            return
+        try:
+            await dispatcher.propagate_event(
+                update_type='error',
+                event=ErrorEvent(update=event, exception=exception),
+                **data)
+        except Exception:
+            logger.exception(f'Ошибка при обработке апдейта {event.update_id}')
+
+    async def wait_closed(self) -> None:
+        """Дожидается обработки уже принятых апдейтов."""
+        while self._workers:
+            await asyncio.gather(*self._workers.values(),
+                                 return_exceptions=True)
+
+
+class QueryStatsMiddleware(BaseMiddleware):
+    """
+    Считает запросы к БД и время в БД для каждого апдейта.
+    Регистрируется дважды: как внешняя мидлварь апдейтов (открывает счетчик
+    в contextvar, чтобы учитывались и запросы мидлварей и фильтров) и как
+    внутренняя мидлварь роутеров (подставляет в счетчик имя хэндлера).
+    По завершении апдейта пишет метрики handler_db_queries и
+    handler_db_seconds с именем хэндлера в метке. Если запросов больше
+    warn_queries, пишет предупреждение: так проще заметить N+1.
+    """
+    def __init__(self, warn_queries: int = 0):
+        self.warn_queries = warn_queries
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        stats = current_query_stats.get()
+        if not isinstance(event, Update):
+            handler_object = data.get('handler')
+            if stats is not None and handler_object is not None:
+                stats.handler = handler_object.callback.__qualname__
+            return await handler(event, data)
+
+        stats = QueryStats(handler=f'update:{event.event_type}')
+        token = current_query_stats.set(stats)
+        try:
+            return await handler(event, data)
+        finally:
+            current_query_stats.reset(token)
+            registry.histogram('handler_db_queries',
+                               buckets=(0, 1, 2, 5, 10, 20, 50, 100),
+                               handler=stats.handler
+                               ).observe(stats.query_count)
+            registry.histogram('handler_db_seconds',
+                               handler=stats.handler).observe(stats.db_time)
+            if self.warn_queries and stats.query_count > self.warn_queries:
+                logger.warning(f'Хэндлер {stats.handler} сделал '
+                               f'{stats.query_count} запросов к БД '
+                               f'({stats.db_time * 1000:.0f} мс).')
+            else:
+                logger.debug(f'Хэндлер {stats.handler}: '
+                             f'{stats.query_count} запросов к БД, '
+                             f'{stats.db_time * 1000:.1f} мс.')
+
+
+class ReadSessionMiddleware(BaseMiddleware):
+    """
+    Передает в хэндлер сессию для чтения под ключом read_session.
+    Хэндлер, которому подходят немного устаревшие данные, объявляет
+    это флагом read_replica с допустимым отставанием в секундах:
+    @router.message(..., flags={'read_replica': 30}).
+    Для таких хэндлеров сессия открывается на реплике (если она настроена,
+    доступна и отстает не сильнее), в остальных случаях read_session - это
+    обычная сессия апдейта. Если реплика отказала посреди хэндлера,
+    запрос повторяется в основной БД (см. ReadSessionRouter).
+    """
+    def __init__(self, read_router: ReadSessionRouter):
+        self.read_router = read_router
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        max_staleness = get_flag(data, 'read_replica')
+        if max_staleness is None:
+            data['read_session'] = data['session']
+            return await handler(event, data)
+
+        read_sessions = self.read_router.session(
+            max_staleness, primary_session=data['session'])
+        async with read_sessions as read_session:
+            data['read_session'] = read_session
+            return await handler(event, data)
+
+
+class DbSessionMiddleware(BaseMiddleware):
+    """
+    Единица работы с БД на один апдейт.
+    Открывает одну сессию (и одну транзакцию) на апдейт и передает ее
+    дальше в мидлвари, фильтры и хэндлеры через ключ session. Сервисные
+    функции только делают flush и сами не откатывают транзакцию, а
+    коммит выполняется один раз после того, как апдейт обработан. Если
+    обработка завершилась исключением или хэндлер перехватил ошибку
+    flush (транзакция сессии больше не активна), транзакция
+    откатывается.
+    Время жизни транзакции пишется в метрику db_unit_of_work_seconds.
+    """
+    def __init__(self, session_maker: async_sessionmaker[AsyncSession]):
+        self.session_maker = session_maker
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        started_at = time.perf_counter()
+        outcome = 'commit'
+        async with self.session_maker() as session:
+            data['session'] = session
+            try:
+                result = await handler(event, data)
+                if not session.in_transaction():
+                    outcome = 'no_transaction'
+                elif not session.is_active:
+                    outcome = 'rollback'
+                    await session.rollback()
+                else:
+                    await session.commit()
+                return result
+            except Exception:
+                outcome = 'rollback'
+                await session.rollback()
+                raise
+            finally:
+                duration = time.perf_counter() - started_at
+                registry.histogram('db_unit_of_work_seconds').observe(
+                    duration)
+                registry.counter('db_unit_of_work_total',
+                                 outcome=outcome).inc()
+                logger.debug(f'Единица работы с БД завершена ({outcome}) '
+                             f'за {duration * 1000:.1f} мс.')
+
+
 class AccessMiddleware(BaseMiddleware):
     """
     Проверяет, что апдейт пришел из приватного чата (другие игнорирует).
@@ -82,26 +447,9 @@ class AccessMiddleware(BaseMiddleware):
             return
 
         logger.debug('Юзер есть в группе. Проверяем, есть ли он в БД.')
+        session: AsyncSession = data['session']
         try:
-            async with AsyncSessionLocal() as session:
-                user_from_db = await get_user_by_telegram_id(session, user.id)
-
-                if user_from_db is None:
-                    logger.debug(f'Юзера нет в БД. Апдейт передан в хэндлеры. '
-                                 f'Юзер: {data['event_from_user']}')
-                    return await handler(event, data)
-                else:
-                    logger.debug('Юзер есть в БД. Проверяем разрешение.')
-                    if not user_from_db.has_permission:
-                        logger.info('У юзера нет разрешения. Отказ в доступе.')
-                        if event.message:
-                            await event.message.answer(
-                                USER_TEXTS['no_permission'],
-                                reply_markup=ReplyKeyboardRemove())
-                        elif event.callback_query:
-                            await event.callback_query.answer(
-                                USER_TEXTS['no_permission'], show_alert=True)
-                        return
+            user_from_db = await get_user_by_telegram_id(session, user.id)
         except SQLAlchemyError:
             logger.error('Ошибка при работе с базой данных')
             if event.message:
@@ -110,6 +458,23 @@ class AccessMiddleware(BaseMiddleware):
                 await event.callback_query.answer(USER_TEXTS['db_error'],
                                                   show_alert=True)
             return
+
+        if user_from_db is None:
+            logger.debug(f'Юзера нет в БД. Апдейт передан в хэндлеры. '
+                         f'Юзер: {data['event_from_user']}')
+            return await handler(event, data)
+
+        logger.debug('Юзер есть в БД. Проверяем разрешение.')
+        if not user_from_db.has_permission:
+            logger.info('У юзера нет разрешения. Отказ в доступе.')
+            if event.message:
+                await event.message.answer(
+                    USER_TEXTS['no_permission'],
+                    reply_markup=ReplyKeyboardRemove())
+            elif event.callback_query:
+                await event.callback_query.answer(
+                    USER_TEXTS['no_permission'], show_alert=True)
+            return
         logger.debug(f'У юзера есть разрешение. Апдейт передан в хэндлеры. '
                      f'Юзер: {data['event_from_user']}')
         return await handler(event, data)
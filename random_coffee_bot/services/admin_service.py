@@ -1,18 +1,24 @@
+import hashlib
 import html
 import logging
 from datetime import date, datetime
-from typing import Optional, Sequence
+from typing import AsyncIterator, Optional, Sequence, Union
 
 import asyncio
 from aiogram import Bot
 from aiogram.exceptions import TelegramBadRequest, TelegramForbiddenError
-from sqlalchemy import func, select, update
-from sqlalchemy.orm import selectinload
+from sqlalchemy import delete, func, Row, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import SQLAlchemyError
 
 from ..database.db import AsyncSessionLocal
-from ..database.models import Notification, Pair, Setting, User
+from ..database.models import (ExportedRow, ExportState, Notification,
+                               Pair, Setting, Stat, STAT_KEYS,
+                               STAT_PAUSED_USERS, update_stats, User)
+from ..database.views import (UserView,
+                              select_pair_export_rows,
+                              select_user_views,
+                              to_user_view)
 from ..services.constants import DATE_FORMAT, DATE_TIME_FORMAT_UTC
 from ..services.user_service import set_user_active
 from ..texts import (ADMIN_TEXTS,
@@ -21,7 +27,11 @@ from ..texts import (ADMIN_TEXTS,
                      USER_TABLE_HEADERS_TEXT,
                      USER_TABLE_VALUES_TEXT as U_V_TEXT,
                      USER_TEXTS)
-from ..utils.google_sheets import pairs_sheet, users_sheet
+from ..utils.google_sheets import get_sheets_client
+from ..utils.setting_events import notify_interval_changed
+from ..utils.sheets_writer import (ProgressCallback, SheetRow,
+                                   SheetsBatchWriter)
+from ..utils.single_flight import single_flight
 
 
 logger = logging.getLogger(__name__)
@@ -39,10 +49,9 @@ async def set_user_permission(session: AsyncSession,
         user.has_permission = has_permission
         if not has_permission:
             user.is_active = False
-        await session.commit()
+        await session.flush()
         return True
     except SQLAlchemyError as e:
-        await session.rollback()
         logger.exception(f'Ошибка при обновлении пользователя '
                          f'{user.telegram_id}')
         raise e
@@ -58,20 +67,21 @@ async def set_user_pause_until(session: AsyncSession,
     """
     try:
         user.pause_until = input_date
-        await session.commit()
+        await session.flush()
         return True
     except SQLAlchemyError as e:
-        await session.rollback()
         logger.exception(f'Ошибка при обновлении пользователя '
                          f'{user.telegram_id}')
         raise e
 
 
-def format_text_about_user(template: str,   user: User,
+def format_text_about_user(template: str,
+                           user: Union[User, UserView],
                            extra_fields: Optional[dict[str, str]] = None
                            ) -> str:
     """
     Форматирует текст на основе шаблона и атрибутов пользователя.
+    Принимает как ORM-объект, так и UserView.
     """
     data = {
         'first_name': user.first_name or ADMIN_TEXTS['no_data'],
@@ -85,27 +95,27 @@ def format_text_about_user(template: str,   user: User,
                      if user.pairing_interval
                      else INTERVAL_TEXTS['default']),
         'pause_until': (user.pause_until.strftime(DATE_FORMAT)
-                        if user.pause_until else ADMIN_TEXTS['no_settings']),
+                        if user.pause_until
+                        and user.pause_until > date.today()
+                        else ADMIN_TEXTS['no_settings']),
     }
     if extra_fields:
         data.update(extra_fields)
     return template.format(**data)
 
 
-async def get_users_count(session: AsyncSession) -> tuple[int, int]:
+@single_flight
+async def get_stats(session: AsyncSession) -> dict[str, int]:
     """
-    Возвращает общее количество юзеров и количество активных.
+    Возвращает счетчики из таблицы stats: количество юзеров, активных,
+    на паузе, встреч и т.д. Ключи - STAT_* из моделей, отсутствующие
+    счетчики равны 0.
     """
-    result1 = await session.execute(
-        select(func.count(User.id))
-    )
-    number_of_users = result1.scalar_one()
-    result2 = await session.execute(
-        select(func.count(User.id))
-        .where(User.is_active.is_(True))
-    )
-    number_of_active_users = result2.scalar_one()
-    return number_of_users, number_of_active_users
+    result = await session.execute(
+        select(Stat.key, Stat.value).where(Stat.key.in_(STAT_KEYS)))
+    stats = dict.fromkeys(STAT_KEYS, 0)
+    stats.update({key: value for key, value in result})
+    return stats
 
 
 def create_text_with_interval(template: str,
@@ -162,6 +172,7 @@ def parse_callback_data(data: str) -> tuple[str, str]:
         raise
 
 
+@single_flight
 async def get_global_interval(session: AsyncSession) -> Optional[int]:
     """
     Возвращает из базы данных значение глобального интервала.
@@ -176,7 +187,8 @@ async def set_new_global_interval(session: AsyncSession, new_value: int
                                   ) -> int:
     """
     Изменяет значение глобального интервала в таблице settings.
-    Возвращает True, если интервал обновлен.
+    Возвращает установленный интервал. После коммита планировщик
+    перепланирует паринг (см. utils.setting_events).
     """
     try:
         result = await session.execute(
@@ -184,36 +196,54 @@ async def set_new_global_interval(session: AsyncSession, new_value: int
         )
         setting = result.scalar_one()
 
-        setting.global_interval = new_value
-        await session.commit()
+        if setting.global_interval != new_value:
+            setting.global_interval = new_value
+            await session.flush()
+            await notify_interval_changed(session, new_value)
         logger.info(f'Установленный интервал {setting.global_interval}')
         return setting.global_interval
     except SQLAlchemyError as e:
-        await session.rollback()
         logger.exception('Ошибка при установке нового интервала')
         raise e
 
 
-async def fetch_all_users(session: AsyncSession) -> Sequence[User]:
+async def clear_expired_pauses(session: AsyncSession) -> int:
     """
-    Извлекает из БД всех пользователей, предварительно удалив устаревшие
-    даты в pause_until, сортирует по дате присоединения.
+    Удаляет устаревшие даты в pause_until у всех пользователей одним
+    запросом по частичному индексу ix_user_pause_until.
+    Запускается раз в сутки задачей expire_pauses, поэтому пути чтения
+    ничего не пишут: до ее запуска пауза, закончившаяся сегодня, уже
+    не учитывается ни при паринге, ни при показе.
+    Возвращает количество снятых пауз.
     """
     today = date.today()
     try:
-        async with session.begin():
-            await session.execute(
-                update(User)
-                .where(
-                    User.pause_until.is_not(None),
-                    User.pause_until <= today
-                )
-                .values(pause_until=None)
-            )
-            result = await session.execute(
-                select(User).order_by(User.created_at)
+        result = await session.execute(
+            update(User)
+            .where(
+                User.pause_until.is_not(None),
+                User.pause_until <= today
             )
-            users = result.scalars().all()
+            .values(pause_until=None)
+        )
+        # Массовый UPDATE идет мимо ORM, счетчик правится вручную.
+        await update_stats(session, {STAT_PAUSED_USERS: -result.rowcount})
+    except SQLAlchemyError as e:
+        logger.exception(f'Не удалось удалить устаревшие паузы: {e}')
+        raise e
+    return result.rowcount
+
+
+async def fetch_all_users(session: AsyncSession) -> Sequence[UserView]:
+    """
+    Извлекает из БД всех пользователей, сортирует по дате присоединения.
+    Только читает, поэтому подходит для сессии на реплике.
+    """
+    try:
+        result = await session.execute(
+            select_user_views().order_by(User.created_at)
+        )
+        users = [to_user_view(row) for row in result]
 
         return users
     except SQLAlchemyError as e:
@@ -221,120 +251,259 @@ async def fetch_all_users(session: AsyncSession) -> Sequence[User]:
         raise e
 
 
+async def stream_users(session: AsyncSession, chunk_size: int = 500
+                       ) -> AsyncIterator[list[UserView]]:
+    """
+    Как fetch_all_users, но отдает юзеров чанками по chunk_size по мере
+    чтения с сервера: в памяти одновременно только один чанк.
+    """
+    stmt = (select_user_views()
+            .order_by(User.created_at)
+            .execution_options(yield_per=chunk_size))
+    try:
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield [to_user_view(row) for row in partition]
+    except SQLAlchemyError as e:
+        logger.exception(f'Не удалось получить юзеров из БД: {e}')
+        raise e
+
+
+USERS_SHEET = 'users'
+PAIRS_SHEET = 'pairs'
+
+USER_TABLE_COLUMNS = ['telegram_id', 'first_name', 'last_name', 'role',
+                      'is_in_group', 'is_active', 'has_permission',
+                      'pairing_interval', 'pause_until', 'joined_at',
+                      'privacy_policy']
+PAIR_TABLE_COLUMNS = ['date', 'user1', 'user2', 'user3']
+
+
+def user_table_headers() -> list[str]:
+    return [USER_TABLE_HEADERS_TEXT[column] for column in USER_TABLE_COLUMNS]
+
+
+def pair_table_headers() -> list[str]:
+    return [PAIR_TABLE_HEADERS_TEXT[column] for column in PAIR_TABLE_COLUMNS]
+
+
+def user_to_row(u: UserView, today: date) -> list[str]:
+    """Строка таблицы юзеров в том виде, в каком она попадает в лист."""
+    return [
+        str(u.telegram_id),
+        u.first_name if u.first_name else U_V_TEXT['dash'],
+        u.last_name if u.last_name else U_V_TEXT['dash'],
+        U_V_TEXT['admin'] if u.is_admin else U_V_TEXT['dash'],
+        U_V_TEXT['no'] if u.is_blocked else U_V_TEXT['yes'],
+        U_V_TEXT['yes'] if u.is_active else U_V_TEXT['no'],
+        U_V_TEXT['yes'] if u.has_permission else U_V_TEXT['no'],
+        (INTERVAL_TEXTS['default'] if not u.pairing_interval
+         else INTERVAL_TEXTS[str(u.pairing_interval)]),
+        (u.pause_until.strftime(DATE_FORMAT)
+         if u.pause_until and u.pause_until > today else ''),
+        u.created_at.strftime(DATE_FORMAT),
+        u.created_at.strftime(DATE_TIME_FORMAT_UTC),
+    ]
+
+
+def pair_to_row(row: Row) -> list[str]:
+    """Строка листа пар из строки select_pair_export_rows."""
+    _, created_at, user1_name, user2_name, user3_name = row
+    # для тестирования в часах и минутах:
+    # pairing_date = created_at.strftime('%Y-%m-%d %H:%M')
+    return [created_at.strftime(DATE_FORMAT),
+            user1_name,
+            user2_name,
+            user3_name]
+
+
+def row_hash(row: Sequence[str]) -> str:
+    return hashlib.sha1('\x1f'.join(row).encode()).hexdigest()
+
+
+async def get_export_state(session: AsyncSession,
+                           sheet: str) -> Optional[ExportState]:
+    return await session.get(ExportState, sheet)
+
+
+async def _start_full_export(session: AsyncSession, writer: SheetsBatchWriter,
+                             sheet: str) -> ExportState:
+    """
+    Очищает лист и сбрасывает его состояние экспорта. Дальше лист
+    заполняется заново, а состояние сохраняется после каждого чанка.
+    """
+    await writer.clear()
+    await session.execute(delete(ExportedRow)
+                          .where(ExportedRow.sheet == sheet))
+    state = await get_export_state(session, sheet)
+    if state is None:
+        state = ExportState(sheet=sheet)
+        session.add(state)
+    state.high_water = None
+    state.rows_count = 0
+    await session.commit()
+    return state
+
+
 async def export_users_to_gsheet(
-    users: Sequence[User]
-) -> None:
+    session: AsyncSession,
+    users: Sequence[UserView],
+    progress: Optional[ProgressCallback] = None
+) -> int:
     """
     Записывает данные о пользователях в Гугл Таблицу.
+    Перезаписываются только строки, содержимое которых изменилось с
+    прошлого экспорта, новые юзеры дописываются в конец, строки
+    удаленных юзеров очищаются. Без сохраненного состояния лист
+    перезаписывается целиком.
+    Состояние коммитится после каждого записанного чанка, поэтому
+    после сбоя следующий экспорт продолжит с незаписанных строк.
+    Возвращает количество записанных строк.
     """
     logger.info('Начниаем экспорт юзеров.')
-    worksheet = users_sheet
-    loop = asyncio.get_running_loop()
-
-    rows: list[list[str]] = []
-    headers = [USER_TABLE_HEADERS_TEXT['telegram_id'],
-               USER_TABLE_HEADERS_TEXT['first_name'],
-               USER_TABLE_HEADERS_TEXT['last_name'],
-               USER_TABLE_HEADERS_TEXT['role'],
-               USER_TABLE_HEADERS_TEXT['is_in_group'],
-               USER_TABLE_HEADERS_TEXT['is_active'],
-               USER_TABLE_HEADERS_TEXT['has_permission'],
-               USER_TABLE_HEADERS_TEXT['pairing_interval'],
-               USER_TABLE_HEADERS_TEXT['pause_until'],
-               USER_TABLE_HEADERS_TEXT['joined_at'],
-               USER_TABLE_HEADERS_TEXT['privacy_policy']]
-    rows.append(headers)
-
-    for u in users:
-        telegram_id = str(u.telegram_id)
-        first_name = u.first_name if u.first_name else U_V_TEXT['dash']
-        last_name = u.last_name if u.last_name else U_V_TEXT['dash']
-        role = U_V_TEXT['admin'] if u.is_admin else U_V_TEXT['dash']
-        is_in_group = U_V_TEXT['no'] if u.is_blocked else U_V_TEXT['yes']
-        is_active = U_V_TEXT['yes'] if u.is_active else U_V_TEXT['no']
-        has_permission = (U_V_TEXT['yes'] if u.has_permission
-                          else U_V_TEXT['no'])
-        pairing_interval = (INTERVAL_TEXTS['default'] if not u.pairing_interval
-                            else INTERVAL_TEXTS[str(u.pairing_interval)])
-        pause_until = (u.pause_until.strftime(DATE_FORMAT) if u.pause_until
-                       else '')
-        joined_at = u.created_at.strftime(DATE_FORMAT)
-        accept_policy = (u.created_at.strftime(DATE_TIME_FORMAT_UTC))
-
-        rows.append([telegram_id, first_name, last_name, role, is_in_group,
-                     is_active, has_permission, pairing_interval, pause_until,
-                     joined_at, accept_policy])
-    logger.info(f'Сформировано строк {len(rows)-1}')
-
-    await loop.run_in_executor(None, worksheet.clear)
-    await loop.run_in_executor(None, worksheet.append_rows, rows)
-    logger.info('Таблица юзеров экспортирована.')
-
-
-async def fetch_all_pairs(session: AsyncSession) -> Sequence[Pair]:
-    """
-    Извлекает из БД все пары, сортирует по дате их формирования.
+    client = get_sheets_client()
+    writer = client.writer(await client.worksheet(USERS_SHEET), progress)
+    headers = user_table_headers()
+    today = date.today()
+    rows = {str(u.telegram_id): user_to_row(u, today) for u in users}
+
+    state = await get_export_state(session, USERS_SHEET)
+    updates: list[SheetRow] = []
+    if state is None:
+        state = await _start_full_export(session, writer, USERS_SHEET)
+        updates.append((1, headers))
+        exported: dict[str, ExportedRow] = {}
+    else:
+        result = await session.execute(
+            select(ExportedRow).where(ExportedRow.sheet == USERS_SHEET))
+        exported = {r.row_key: r for r in result.scalars()}
+
+    # номер строки в листе -> (telegram_id, хэш строки или None,
+    # если строку удаленного юзера нужно очистить)
+    pending: dict[int, tuple[str, Optional[str]]] = {}
+    next_row = state.rows_count + 2
+    for key, row in rows.items():
+        h = row_hash(row)
+        exported_row = exported.get(key)
+        if exported_row is None:
+            n = next_row
+            next_row += 1
+        elif exported_row.row_hash == h:
+            continue
+        else:
+            n = exported_row.row_number
+        pending[n] = (key, h)
+        updates.append((n, row))
+    for key in exported.keys() - rows.keys():
+        n = exported[key].row_number
+        pending[n] = (key, None)
+        updates.append((n, [''] * len(headers)))
+
+    async def save_chunk(chunk: Sequence[SheetRow]) -> None:
+        for n, _ in chunk:
+            if n not in pending:
+                continue
+            key, h = pending[n]
+            exported_row = exported.get(key)
+            if h is None:
+                await session.delete(exported_row)
+            elif exported_row is None:
+                exported[key] = ExportedRow(sheet=USERS_SHEET, row_key=key,
+                                            row_number=n, row_hash=h)
+                session.add(exported[key])
+            else:
+                exported_row.row_hash = h
+        state.rows_count = max(state.rows_count, chunk[-1][0] - 1)
+        await session.commit()
+
+    await writer.write_rows(updates, on_chunk=save_chunk)
+    logger.info(f'Таблица юзеров экспортирована: {len(pending)} строк.')
+    return len(pending)
+
+
+async def count_pairs(session: AsyncSession,
+                      after_id: Optional[int] = None) -> int:
+    stmt = select(func.count()).select_from(Pair)
+    if after_id is not None:
+        stmt = stmt.where(Pair.id > after_id)
+    return (await session.execute(stmt)).scalar_one()
+
+
+async def stream_pair_rows(session: AsyncSession,
+                           after_id: Optional[int] = None,
+                           chunk_size: int = 500
+                           ) -> AsyncIterator[Sequence[Row]]:
+    """
+    Отдает пары для экспорта чанками по chunk_size строк в порядке их
+    формирования (если задан after_id, только пары новее нее).
+    Результат читается с сервера по мере записи, поэтому в памяти
+    одновременно только один чанк.
     """
+    stmt = (select_pair_export_rows()
+            .order_by(Pair.id)
+            .execution_options(yield_per=chunk_size))
+    if after_id is not None:
+        stmt = stmt.where(Pair.id > after_id)
     try:
-        result = await session.execute(
-            select(Pair)
-            .options(
-                selectinload(Pair.user1),
-                selectinload(Pair.user2),
-                selectinload(Pair.user3)
-            ).order_by(Pair.created_at.desc())
-        )
-        pairs = result.scalars().all()
-        return pairs
+        result = await session.stream(stmt)
+        async for partition in result.partitions():
+            yield partition
     except SQLAlchemyError as e:
         logger.exception(f'Не удалось получить пары из БД: {e}')
         raise e
 
 
 async def export_pairs_to_gsheet(
-    pairs: Sequence[Pair]
-) -> None:
+    session: AsyncSession,
+    read_session: AsyncSession,
+    progress: Optional[ProgressCallback] = None
+) -> int:
     """
     Записывает данные о парах в Гугл Таблицу.
+    История пар не меняется, поэтому лист только дополняется парами
+    новее последней выгруженной (high_water в состоянии экспорта).
+    Без сохраненного состояния лист перезаписывается целиком.
+    Пары читаются из read_session потоком и пишутся в лист по мере
+    чтения, high_water коммитится в session после каждого чанка.
+    Возвращает количество записанных строк.
     """
     logger.info('Начинаем экспорт пар.')
-    worksheet = pairs_sheet
-    loop = asyncio.get_running_loop()
-
-    rows: list[list[str]] = []
-    headers = [PAIR_TABLE_HEADERS_TEXT['date'],
-               PAIR_TABLE_HEADERS_TEXT['user1'],
-               PAIR_TABLE_HEADERS_TEXT['user2'],
-               PAIR_TABLE_HEADERS_TEXT['user3']]
-    rows.append(headers)
-
-    for p in pairs:
-        # для тестирования в часах и минутах:
-        # pairing_date_utc = p.created_at
-        # pairing_date = pairing_date_utc.strftime('%Y-%m-%d %H:%M')
-
-        pairing_date = p.created_at.strftime(DATE_FORMAT)
-        u1_full_name = (f'{p.user1.first_name or ""} {p.user1.last_name or ""}'
-                        ).strip()
-        u2_full_name = (f'{p.user2.first_name or ""} {p.user2.last_name or ""}'
-                        ).strip()
-        if p.user3_id:
-            u3_full_name = (
-                f'{p.user3.first_name or ""} {p.user3.last_name or ""}'
-            ).strip()
-        else:
-            u3_full_name = ''
-
-        rows.append([pairing_date,
-                    u1_full_name,
-                    u2_full_name,
-                    u3_full_name,])
-
-    logger.info(f'Сформировано строк {len(rows)-1}')
+    client = get_sheets_client()
+    writer = client.writer(await client.worksheet(PAIRS_SHEET), progress)
+
+    state = await get_export_state(session, PAIRS_SHEET)
+    if state is None:
+        state = await _start_full_export(session, writer, PAIRS_SHEET)
+        await writer.write_rows([(1, pair_table_headers())])
+    after_id = state.high_water
+    total = await count_pairs(read_session, after_id)
+    first_row = state.rows_count + 2
+    # номер строки в листе -> id пары, для строк еще не записанных чанков
+    pair_ids: dict[int, int] = {}
+
+    async def sheet_rows() -> AsyncIterator[list[SheetRow]]:
+        n = first_row
+        async for partition in stream_pair_rows(read_session, after_id,
+                                                writer.chunk_rows):
+            chunk = []
+            for row in partition:
+                pair_ids[n] = row.id
+                chunk.append((n, pair_to_row(row)))
+                n += 1
+            yield chunk
+
+    async def save_chunk(chunk: Sequence[SheetRow]) -> None:
+        last_row = chunk[-1][0]
+        state.high_water = pair_ids[last_row]
+        state.rows_count = last_row - 1
+        for n, _ in chunk:
+            del pair_ids[n]
+        await session.commit()
 
-    await loop.run_in_executor(None, worksheet.clear)
-    await loop.run_in_executor(None, worksheet.append_rows, rows)
-    logger.info('Таблица пар экспортирована.')
+    written = await writer.write_stream(sheet_rows(), total,
+                                        on_chunk=save_chunk)
+    logger.info(f'Таблица пар экспортирована: {written} новых строк.')
+    return written
 
 
 async def create_notif(session: AsyncSession, received_text: str
@@ -344,44 +513,37 @@ async def create_notif(session: AsyncSession, received_text: str
         text=received_text
     )
     session.add(notif)
-    try:
-        await session.commit()
-        return notif
-    except SQLAlchemyError as e:
-        await session.rollback()
-        raise e
+    await session.flush()
+    return notif
 
 
-async def get_notif(notif_id: int) -> Notification | None:
+async def get_notif(session: AsyncSession, notif_id: int
+                    ) -> Notification | None:
     """Возвращает экземпляр уведомления."""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(Notification)
-            .where(Notification.id == notif_id)
-        )
-        notif = result.scalar_one_or_none()
-        return notif
+    result = await session.execute(
+        select(Notification)
+        .where(Notification.id == notif_id)
+    )
+    notif = result.scalar_one_or_none()
+    return notif
 
 
-async def mark_notif_as_sent(notif_id: int) -> None:
+async def mark_notif_as_sent(session: AsyncSession, notif_id: int) -> None:
     """Устанавливает дату и время, когда была отправлена рассылка."""
-    async with AsyncSessionLocal() as session:
-        await session.execute(
-            update(Notification)
-            .where(Notification.id == notif_id)
-            .values(sent_at=datetime.utcnow())
-        )
-        await session.commit()
+    await session.execute(
+        update(Notification)
+        .where(Notification.id == notif_id)
+        .values(sent_at=datetime.utcnow())
+    )
 
 
-async def get_active_user_ids() -> Sequence[int]:
+async def get_active_user_ids(session: AsyncSession) -> Sequence[int]:
     """Возвращает список telegram ID активных пользователей."""
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(
-            select(User.telegram_id).where(User.is_active.is_(True))
-        )
-        user_telegram_ids = result.scalars().all()
-        return user_telegram_ids
+    result = await session.execute(
+        select(User.telegram_id).where(User.is_active.is_(True))
+    )
+    user_telegram_ids = result.scalars().all()
+    return user_telegram_ids
 
 
 async def broadcast_notif_to_active_users(
@@ -389,11 +551,14 @@ async def broadcast_notif_to_active_users(
     """
     Отправляет рассылку активным пльзователям.
     Вовзращает количество доставленных писем.
+    Рассылка идет долго, поэтому она не держит транзакцию апдейта, а
+    работает с БД через короткие собственные сессии.
     """
     delivered_count = 0
 
     try:
-        user_telegram_ids = await get_active_user_ids()
+        async with AsyncSessionLocal() as session:
+            user_telegram_ids = await get_active_user_ids(session)
     except SQLAlchemyError as e:
         logger.error(f'Ошибка при получении ID активных юзеров из БД: {e}')
         raise e
@@ -410,6 +575,7 @@ async def broadcast_notif_to_active_users(
             try:
                 async with AsyncSessionLocal() as session:
                     await set_user_active(session, telegram_id, False)
+                    await session.commit()
                     logger.info(f'Статус юзера {telegram_id} изменен '
                                 'на неактивный.')
             except SQLAlchemyError as e:
@@ -419,7 +585,9 @@ async def broadcast_notif_to_active_users(
             logger.warning(f'Не получилось отправить для {telegram_id}: {e}')
     if delivered_count > 0:
         try:
-            await mark_notif_as_sent(notif.id)
+            async with AsyncSessionLocal() as session:
+                await mark_notif_as_sent(session, notif.id)
+                await session.commit()
         except SQLAlchemyError as e:
             logger.error(f'Ошибка при работе с БД: {e}')
         return delivered_count, None
@@ -427,19 +595,6 @@ async def broadcast_notif_to_active_users(
                                 amount=len(user_telegram_ids)))
 
 
-async def reset_user_pause_until(session: AsyncSession, user: User) -> None:
-    """Если pause_until сегодня или раньше — обнуляем это поле."""
-    today = date.today()
-    if user.pause_until is not None and user.pause_until <= today:
-        user.pause_until = None
-        try:
-            await session.commit()
-        except SQLAlchemyError as e:
-            await session.rollback()
-            logger.error('Ошибка при очистке pause_until '
-                         f'для user_id={user.id}: {e}')
-
-
 # async def set_first_pairing_date(recieved_date: datetime):
 #     try:
 #         async with AsyncSessionLocal() as session:
@@ -469,7 +624,7 @@ async def reset_user_pause_until(session: AsyncSession, user: User) -> None:
 #         logger.error(f'Ошибка при установке интервала и даты: {e}')
 
 
-async def set_user_as_admin(user_id: int) -> bool:
+async def set_user_as_admin(session: AsyncSession, user_id: int) -> bool:
     """
     Устанавливает пользователя с заданным telegram_id в качестве
     администратора.
@@ -481,20 +636,19 @@ async def set_user_as_admin(user_id: int) -> bool:
     противном случае.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).filter_by(telegram_id=user_id)
-            )
-            user = result.scalars().first()
+        result = await session.execute(
+            select(User).filter_by(telegram_id=user_id)
+        )
+        user = result.scalars().first()
 
-            if user:
-                user.is_admin = True
+        if user:
+            user.is_admin = True
 
-                await session.commit()
-                return True
-            else:
-                logger.warning(f'Пользователь с ID {user_id} не найден.')
-                return False
+            await session.flush()
+            return True
+        else:
+            logger.warning(f'Пользователь с ID {user_id} не найден.')
+            return False
     except Exception as e:
         logger.error(
             f'Ошибка при установке администратора '
@@ -502,7 +656,8 @@ async def set_user_as_admin(user_id: int) -> bool:
         return False
 
 
-async def set_admin_as_user(user_id: int) -> tuple[bool, Optional[User]]:
+async def set_admin_as_user(session: AsyncSession, user_id: int
+                            ) -> tuple[bool, Optional[User]]:
     """
     Устанавливает пользователя с заданным telegram_id как обычного
     пользователя (не администратора).
@@ -516,20 +671,19 @@ async def set_admin_as_user(user_id: int) -> tuple[bool, Optional[User]]:
     противном случае.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).filter_by(telegram_id=user_id)
-            )
-            user = result.scalars().first()
+        result = await session.execute(
+            select(User).filter_by(telegram_id=user_id)
+        )
+        user = result.scalars().first()
 
-            if user:
-                user.is_admin = False
+        if user:
+            user.is_admin = False
 
-                await session.commit()
-                return (True, user)
-            else:
-                logger.warning(f'Пользователь с ID {user_id} не найден.')
-                return (False, None)
+            await session.flush()
+            return (True, user)
+        else:
+            logger.warning(f'Пользователь с ID {user_id} не найден.')
+            return (False, None)
     except Exception as e:
         logger.error(
             'Ошибка при изменении статуса администратора для '
@@ -538,7 +692,7 @@ async def set_admin_as_user(user_id: int) -> tuple[bool, Optional[User]]:
         return (False, None)
 
 
-async def is_user_admin(user_id: int) -> bool:
+async def is_user_admin(session: AsyncSession, user_id: int) -> bool:
     """
     Проверяет, является ли пользователь с заданным telegram_id администратором.
 
@@ -550,13 +704,12 @@ async def is_user_admin(user_id: int) -> bool:
     случае.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).filter_by(telegram_id=user_id)
-            )
-            user = result.scalars().first()
+        result = await session.execute(
+            select(User).filter_by(telegram_id=user_id)
+        )
+        user = result.scalars().first()
 
-            return user is not None and user.is_admin
+        return user is not None and user.is_admin
     except Exception as e:
         logger.error(
             'Ошибка при проверке статуса администратора для '
@@ -565,7 +718,7 @@ async def is_user_admin(user_id: int) -> bool:
         return False
 
 
-async def is_admin_user(user_id: int) -> bool:
+async def is_admin_user(session: AsyncSession, user_id: int) -> bool:
     """
     Проверяет, является ли пользователь с заданным telegram_id администратором.
 
@@ -577,13 +730,12 @@ async def is_admin_user(user_id: int) -> bool:
     противном случае.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).filter_by(telegram_id=user_id)
-            )
-            user = result.scalars().first()
+        result = await session.execute(
+            select(User).filter_by(telegram_id=user_id)
+        )
+        user = result.scalars().first()
 
-            return user is not None and user.is_admin
+        return user is not None and user.is_admin
     except Exception as e:
         logger.error(
             'Ошибка при проверке статуса администратора для '
@@ -592,20 +744,22 @@ async def is_admin_user(user_id: int) -> bool:
         return False
 
 
-async def get_admin_list() -> Sequence[User]:
+@single_flight
+async def get_admin_list(session: AsyncSession) -> Sequence[UserView]:
     """
     Получает список всех администраторов.
 
     Возвращает:
-    list: Список объектов пользователей, которые являются администраторами.
+    list: Список UserView администраторов. Результат делят между собой
+    одновременные вызовы, поэтому ORM-объекты, привязанные к сессии
+    одного из них, здесь не возвращаются.
     """
     try:
-        async with AsyncSessionLocal() as session:
-            result = await session.execute(
-                select(User).filter_by(is_admin=True)
-            )
-            admins = result.scalars().all()
-            return admins
+        result = await session.execute(
+            select_user_views().where(User.is_admin.is_(True))
+        )
+        admins = [to_user_view(row) for row in result]
+        return admins
     except Exception as e:
         logger.error(f'Ошибка при получении списка администраторов: {e}')
         return []
@@ -776,17 +930,12 @@ async def refresh_all_usernames(session: AsyncSession, bot: Bot) -> None:
 
 
 # Служебная функция на время разработки.
-async def delete_user(telegram_id: int) -> bool:
+async def delete_user(session: AsyncSession, telegram_id: int) -> bool:
     '''Удаляет пользователя из БД.'''
     from ..services.user_service import get_user_by_telegram_id
-    async with AsyncSessionLocal() as session:
-        try:
-            user = await get_user_by_telegram_id(session, telegram_id)
-            if not user:
-                return False
-            await session.delete(user)
-            await session.commit()
-            return True
-        except SQLAlchemyError as e:
-            await session.rollback()
-            raise e
+    user = await get_user_by_telegram_id(session, telegram_id)
+    if not user:
+        return False
+    await session.delete(user)
+    await session.flush()
+    return True
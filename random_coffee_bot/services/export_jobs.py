@@ -0,0 +1,181 @@
+"""
+Экспорт в Гугл Таблицу как фоновая задача.
+
+Хэндлер только запускает задачу и сразу отвечает админу. Одновременно
+идет не больше одного экспорта: если админ нажимает кнопку, пока
+экспорт уже идет, он присоединяется к текущей задаче, а не запускает
+новую. Когда задача завершается, каждый присоединившийся админ
+получает сообщение с итогом: длительностью и количеством строк.
+"""
+import asyncio
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from aiogram import Bot
+from aiogram.exceptions import TelegramAPIError, TelegramBadRequest
+from aiogram.types import Message
+from google.auth.exceptions import RefreshError, TransportError
+from gspread.exceptions import (
+    APIError,
+    SpreadsheetNotFound,
+    WorksheetNotFound
+)
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..database.db import AsyncSessionLocal, read_router
+from ..texts import ADMIN_TEXTS
+from . import admin_service as adm
+
+
+logger = logging.getLogger(__name__)
+
+# Насколько устаревшими могут быть данные, прочитанные с реплики.
+EXPORT_MAX_STALENESS = 60
+
+
+@dataclass
+class ExportResult:
+    users_rows: int
+    pairs_rows: int
+
+
+@dataclass
+class ExportJob:
+    id: str
+    started_at: float = field(default_factory=time.monotonic)
+    # кому отправить итог: админ, нажавший кнопку повторно, будет в
+    # списке один раз
+    admin_ids: set[int] = field(default_factory=set)
+    # сообщения о запуске, в них показывается ход экспорта
+    status_messages: list[Message] = field(default_factory=list)
+    task: Optional[asyncio.Task] = None
+
+    async def report_progress(self, sheet: str, done: int,
+                              total: int) -> None:
+        text = ADMIN_TEXTS['export_progress'].format(
+            sheet=sheet, done=done, total=total)
+        for status in list(self.status_messages):
+            try:
+                await status.edit_text(text)
+            except TelegramBadRequest as e:
+                # текст не изменился или сообщение удалено
+                logger.debug(f'Ход экспорта {self.id} не показан: {e}')
+            except TelegramAPIError as e:
+                # флуд-контроль или сеть: экспорт от этого не страдает
+                logger.warning(f'Не удалось обновить ход экспорта '
+                               f'{self.id}: {e}')
+
+    def progress(self, sheet: str) -> Callable[[int, int], Awaitable[None]]:
+        async def report(done: int, total: int) -> None:
+            await self.report_progress(sheet, done, total)
+        return report
+
+
+_current_job: Optional[ExportJob] = None
+
+
+def get_current_job() -> Optional[ExportJob]:
+    return _current_job
+
+
+async def run_export(job: ExportJob) -> ExportResult:
+    """
+    Выгружает юзеров и пары. Данные читаются с реплики (пары - потоком
+    по мере записи), состояние экспорта пишется в основную БД
+    короткими транзакциями по чанкам.
+    """
+    async with AsyncSessionLocal() as session, \
+            read_router.session(EXPORT_MAX_STALENESS) as read_session:
+        users = await adm.fetch_all_users(read_session)
+        users_rows = await adm.export_users_to_gsheet(
+            session, users, job.progress(adm.USERS_SHEET))
+        pairs_rows = await adm.export_pairs_to_gsheet(
+            session, read_session, job.progress(adm.PAIRS_SHEET))
+        await session.commit()
+    return ExportResult(users_rows=users_rows, pairs_rows=pairs_rows)
+
+
+def export_error_text(error: Exception) -> str:
+    """
+    Пишет ошибку экспорта в лог и возвращает текст для админа.
+    Вызывается из блока except.
+    """
+    if isinstance(error, SQLAlchemyError):
+        logger.error('Ошибка при работе с базой данных')
+        return ADMIN_TEXTS['db_error']
+    if isinstance(error, SpreadsheetNotFound):
+        logger.exception('❌ Не нашёл таблицу по этому ID. '
+                         'Проверьте SPREADSHEET_ID и доступы.')
+        return ADMIN_TEXTS['error_google_sheets_settings']
+    if isinstance(error, WorksheetNotFound):
+        logger.exception('❌ Лист с нужным именем не найден. '
+                         'Проверьте, чтобы имена листов соответсвовали '
+                         'инструкции разработчиков.')
+        return ADMIN_TEXTS['error_google_sheets_wrong_name']
+    if isinstance(error, APIError):
+        logger.exception(f'❌ Ошибка API Google Sheets: '
+                         f'{error.response.status_code} — '
+                         f'{error.response.reason}')
+        return ADMIN_TEXTS['error_google_sheets_unknown']
+    if isinstance(error, RefreshError):
+        logger.exception('❌ Не удалось обновить токен доступа. Проверьте '
+                         'credentials.json и права сервис-аккаунта.')
+        return ADMIN_TEXTS['error_google_sheets_settings']
+    if isinstance(error, (TransportError, FileNotFoundError)):
+        logger.exception('❌ Не удалось подключиться к Google. Проверьте '
+                         'сеть и путь к credentials.json.')
+        return ADMIN_TEXTS['error_google_sheets_unknown']
+    logger.exception(f'❌ Неожиданная ошибка при записи в Google '
+                     f'Sheets:\n{error}')
+    return ADMIN_TEXTS['error_google_sheets_unknown']
+
+
+async def _run_job(job: ExportJob, bot: Bot, google_sheet_id: str) -> None:
+    global _current_job
+    try:
+        result = await run_export(job)
+    except Exception as e:
+        logger.error(f'Экспорт {job.id} завершился ошибкой.')
+        text = export_error_text(e)
+    else:
+        duration = time.monotonic() - job.started_at
+        logger.info(f'Экспорт {job.id} завершен за {duration:.1f} с: '
+                    f'юзеров {result.users_rows}, пар {result.pairs_rows}.')
+        text = ADMIN_TEXTS['success_export_data'].format(
+            job_id=job.id, duration=f'{duration:.0f}',
+            users_rows=result.users_rows, pairs_rows=result.pairs_rows,
+            google_sheet_id=google_sheet_id)
+    finally:
+        _current_job = None
+
+    for admin_id in job.admin_ids:
+        try:
+            await bot.send_message(admin_id, text, parse_mode='HTML')
+        except Exception as e:
+            logger.warning(f'Не удалось сообщить админу {admin_id} '
+                           f'об итогах экспорта {job.id}: {e}')
+
+
+async def request_export(message: Message, google_sheet_id: str
+                         ) -> tuple[ExportJob, bool]:
+    """
+    Запускает экспорт или присоединяет админа к уже идущему.
+    Возвращает задачу и признак того, что она только что создана.
+    """
+    global _current_job
+    job = _current_job
+    is_new = job is None
+    if is_new:
+        job = ExportJob(id=uuid.uuid4().hex[:8])
+        _current_job = job
+        logger.info(f'Запускаем экспорт {job.id}.')
+        job.task = asyncio.create_task(
+            _run_job(job, message.bot, google_sheet_id))
+    job.admin_ids.add(message.chat.id)
+    text_key = 'export_job_started' if is_new else 'export_job_attached'
+    job.status_messages.append(await message.answer(
+        ADMIN_TEXTS[text_key].format(job_id=job.id)))
+    return job, is_new
@@ -0,0 +1,182 @@
+"""
+Массовый импорт юзеров из CSV, например при переезде сообщества.
+
+Файл - CSV в UTF-8 с заголовком; обязательна колонка telegram_id,
+необязательны username, first_name и last_name. Строки загружаются
+во временную таблицу (в PostgreSQL через COPY), а затем переносятся
+в user двумя запросами: INSERT ... ON CONFLICT DO NOTHING добавляет
+новых юзеров, UPDATE ... FROM обновляет имена остальных. Пустые
+значения в файле не затирают имена, которые уже есть в БД.
+
+Запуск:
+    python -m random_coffee_bot.services.user_import members.csv
+"""
+import argparse
+import asyncio
+import csv
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterable
+
+from sqlalchemy import (BigInteger, Column, func, literal, MetaData, or_,
+                        select, String, Table, true, update)
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..database.backend import dialect_insert, dialect_name
+from ..database.db import AsyncSessionLocal
+from ..database.models import (STAT_ACTIVE_USERS, STAT_ALL_USERS,
+                               STAT_LISTED_USERS, update_stats, User)
+
+logger = logging.getLogger(__name__)
+
+
+NAME_COLUMNS = ('username', 'first_name', 'last_name')
+IMPORT_COLUMNS = ('telegram_id', *NAME_COLUMNS)
+
+# временная таблица живет в соединении до конца импорта
+_staging = Table(
+    'user_import', MetaData(),
+    Column('telegram_id', BigInteger, primary_key=True,
+           autoincrement=False),
+    *(Column(name, String) for name in NAME_COLUMNS),
+    prefixes=['TEMPORARY'],
+)
+
+
+@dataclass
+class ImportResult:
+    inserted: int
+    updated: int
+    # строки без изменений, повторы telegram_id и строки с ошибками
+    skipped: int
+
+
+def read_import_rows(lines: Iterable[str]
+                     ) -> tuple[list[dict[str, Any]], int]:
+    """
+    Разбирает CSV. Возвращает строки для импорта и число пропущенных
+    строк: с неверным telegram_id и повторы (берется последняя).
+    """
+    reader = csv.DictReader(lines)
+    if 'telegram_id' not in (reader.fieldnames or ()):
+        raise ValueError('В файле нет колонки telegram_id.')
+    rows: dict[int, dict[str, Any]] = {}
+    skipped = 0
+    for record in reader:
+        try:
+            telegram_id = int((record['telegram_id'] or '').strip())
+        except ValueError:
+            telegram_id = 0
+        if telegram_id <= 0:
+            logger.warning(f'Строка {reader.line_num}: неверный '
+                           f'telegram_id {record["telegram_id"]!r}.')
+            skipped += 1
+            continue
+        if telegram_id in rows:
+            skipped += 1
+        rows[telegram_id] = {'telegram_id': telegram_id, **{
+            name: (record.get(name) or '').strip() or None
+            for name in NAME_COLUMNS}}
+    return list(rows.values()), skipped
+
+
+async def _load_staging(session: AsyncSession,
+                        rows: list[dict[str, Any]]) -> None:
+    conn = await session.connection()
+    await conn.run_sync(_staging.drop, checkfirst=True)
+    await conn.run_sync(_staging.create)
+    if dialect_name(session) == 'postgresql' and \
+            conn.dialect.driver == 'asyncpg':
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            _staging.name, columns=IMPORT_COLUMNS,
+            records=[tuple(row[name] for name in IMPORT_COLUMNS)
+                     for row in rows])
+    elif rows:
+        await conn.execute(_staging.insert(), rows)
+
+
+async def import_users(session: AsyncSession,
+                       rows: list[dict[str, Any]],
+                       skipped: int = 0) -> ImportResult:
+    """
+    Добавляет новых юзеров и обновляет имена существующих. Новые юзеры
+    создаются активными, как после /start. Коммит и откат делает
+    вызывающий код. skipped - строки, отброшенные при разборе файла.
+    """
+    try:
+        await _load_staging(session, rows)
+
+        # Добавленных и обновленных считаем по самим запросам, а не
+        # заранее: юзер из файла может успеть прийти в бота через /start.
+        insert = dialect_insert(session)(User)
+        stmt = insert.from_select(
+            [*IMPORT_COLUMNS, 'is_active', 'has_permission', 'is_blocked',
+             'is_admin'],
+            # WHERE нужен SQLite, чтобы ON CONFLICT не принялся за JOIN
+            select(*(_staging.c[name] for name in IMPORT_COLUMNS),
+                   literal(True), literal(True), literal(False),
+                   literal(False)).where(true())
+        ).on_conflict_do_nothing(index_elements=[User.telegram_id])
+        inserted = (await session.execute(stmt)).rowcount
+
+        users = User.__table__
+        # только что добавленные юзеры совпадают с файлом и не обновятся
+        stmt = (update(users)
+                .where(users.c.telegram_id == _staging.c.telegram_id,
+                       or_(*(_staging.c[name].is_not(None)
+                             & users.c[name].is_distinct_from(
+                                 _staging.c[name])
+                             for name in NAME_COLUMNS)))
+                .values({name: func.coalesce(_staging.c[name], users.c[name])
+                         for name in NAME_COLUMNS}))
+        updated = (await session.execute(stmt)).rowcount
+
+        await update_stats(session, {STAT_ALL_USERS: inserted,
+                                     STAT_ACTIVE_USERS: inserted,
+                                     STAT_LISTED_USERS: inserted})
+        conn = await session.connection()
+        await conn.run_sync(_staging.drop)
+    except SQLAlchemyError as e:
+        logger.error(f'Ошибка при импорте юзеров: {e}')
+        raise
+
+    return ImportResult(inserted=inserted, updated=updated,
+                        skipped=skipped + len(rows) - inserted - updated)
+
+
+async def import_users_from_file(session: AsyncSession,
+                                 path: Path) -> ImportResult:
+    """
+    Импортирует юзеров из CSV-файла path в отдельной транзакции сессии:
+    коммитит ее, а при ошибке откатывает.
+    """
+    def read() -> tuple[list[dict[str, Any]], int]:
+        with open(path, encoding='utf-8-sig', newline='') as file:
+            return read_import_rows(file)
+
+    rows, skipped = await asyncio.to_thread(read)
+    async with session.begin():
+        result = await import_users(session, rows, skipped)
+    logger.info(f'Импорт юзеров из {path}: добавлено {result.inserted}, '
+                f'обновлено {result.updated}, пропущено {result.skipped}.')
+    return result
+
+
+async def main(path: Path) -> None:
+    async with AsyncSessionLocal() as session:
+        result = await import_users_from_file(session, path)
+    print(f'Добавлено: {result.inserted}\n'
+          f'Обновлено: {result.updated}\n'
+          f'Пропущено: {result.skipped}')
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument('path', type=Path,
+                        help='CSV с колонками ' + ', '.join(IMPORT_COLUMNS))
+    args = parser.parse_args()
+    asyncio.run(main(args.path))
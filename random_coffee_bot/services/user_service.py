@@ -8,7 +8,9 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import load_config
 from ..database.models import Setting, User
+from ..database.views import UserView, select_user_views, to_user_view
 from ..texts import ADMIN_TEXTS, INTERVAL_TEXTS, USER_TEXTS
+from ..utils.single_flight import single_flight
 
 logger = logging.getLogger(__name__)
 
@@ -40,12 +42,36 @@ async def get_user_from_event(session: AsyncSession,
     return user
 
 
+async def get_user_view_by_telegram_id(session: AsyncSession,
+                                       telegram_id: int
+                                       ) -> Optional[UserView]:
+    """Получает из БД неизменяемое представление пользователя по его
+    telegram_id. Используется там, где данные юзера только читаются.
+    Если пользователь не найден, возвращает None."""
+    result = await session.execute(
+        select_user_views().where(User.telegram_id == telegram_id)
+    )
+    row = result.one_or_none()
+    return to_user_view(row) if row else None
+
+
+async def get_user_view_from_event(session: AsyncSession,
+                                   event: Union[CallbackQuery, Message]
+                                   ) -> Optional[UserView]:
+    user_telegram = getattr(event, "from_user", None)
+    if not user_telegram:
+        return None
+
+    return await get_user_view_by_telegram_id(session, user_telegram.id)
+
+
 async def create_user(session: AsyncSession,
                       telegram_id: int,
                       username: str | None,
                       first_name: str,
                       last_name: str | None) -> User:
-    """Создает пользователя. Возвращает экземпляр пользователя."""
+    """Создает пользователя. Возвращает экземпляр пользователя.
+    Изменения отправляются в БД через flush, коммит делает вызывающий код."""
     user = User(
                 telegram_id=telegram_id,
                 username=username,
@@ -53,12 +79,8 @@ async def create_user(session: AsyncSession,
                 last_name=last_name
             )
     session.add(user)
-    try:
-        await session.commit()
-        return user
-    except SQLAlchemyError as e:
-        await session.rollback()
-        raise e
+    await session.flush()
+    return user
 
 
 async def update_user_field(session: AsyncSession,
@@ -67,16 +89,12 @@ async def update_user_field(session: AsyncSession,
                             value: str) -> bool:
     """Обновляет заданное поле пользователя.
     Возвращает True, если пользователь найден и обновлен."""
-    try:
-        user = await get_user_by_telegram_id(session, telegram_id)
-        if not user:
-            return False
-        setattr(user, field, value)
-        await session.commit()
-        return True
-    except SQLAlchemyError as e:
-        await session.rollback()
-        raise e
+    user = await get_user_by_telegram_id(session, telegram_id)
+    if not user:
+        return False
+    setattr(user, field, value)
+    await session.flush()
+    return True
 
 
 async def set_user_active(session: AsyncSession,
@@ -85,16 +103,12 @@ async def set_user_active(session: AsyncSession,
                           ) -> bool:
     """Изменяет значение флага is_active.
     Возвращает True, если пользователь найден и обновлен."""
-    try:
-        user = await get_user_by_telegram_id(session, telegram_id)
-        if not user:
-            return False
-        user.is_active = is_active
-        await session.commit()
-        return True
-    except SQLAlchemyError as e:
-        await session.rollback()
-        raise e
+    user = await get_user_by_telegram_id(session, telegram_id)
+    if not user:
+        return False
+    user.is_active = is_active
+    await session.flush()
+    return True
 
 
 async def create_text_random_coffee(session: AsyncSession):
@@ -245,6 +259,7 @@ async def create_text_with_interval(
     return data_text
 
 
+@single_flight
 async def get_global_interval(session: AsyncSession) -> int:
     """
     Возвращает из базы данных значение глобального интервала.
@@ -295,7 +310,7 @@ async def set_new_user_interval(
         )
 
         updated_user.pairing_interval = new_value
-        await session.commit()
+        await session.flush()
 
         logger.info(
             f'pairing_interval для пользователя с id '
@@ -303,7 +318,6 @@ async def set_new_user_interval(
         )
 
     except SQLAlchemyError as e:
-        await session.rollback()
         logger.exception(
             'Ошибка при установке нового интервала для пользователя'
         )
@@ -331,4 +345,3 @@ async def update_username(session: AsyncSession,
             .where(User.telegram_id == telegram_id)
             .values(username=username)
         )
-    await session.commit()
@@ -3,6 +3,7 @@ from datetime import date, datetime, UTC
 
 import pytest
 import pytest_asyncio
+from sqlalchemy import text
 from sqlalchemy.engine import URL
 from sqlalchemy.ext.asyncio import (
     AsyncEngine,
@@ -10,8 +11,10 @@ from sqlalchemy.ext.asyncio import (
     async_sessionmaker,
     create_async_engine,
 )
+from sqlalchemy.pool import StaticPool
 from testcontainers.postgres import PostgresContainer
 
+from random_coffee_bot.database.backend import create_sqlite_schema
 from random_coffee_bot.database.models import Base, Setting
 
 
@@ -49,6 +52,43 @@ async def engine(pg_container) -> AsyncIterator[AsyncEngine]:
         await engine.dispose()
 
 
+@pytest_asyncio.fixture
+async def replica_engine(pg_container) -> AsyncIterator[AsyncEngine]:
+    """
+    Вторая база в том же контейнере, которая играет роль реплики.
+    Данные в нее не реплицируются, поэтому по содержимому видно,
+    из какой базы было чтение.
+    """
+    admin_engine = create_async_engine(make_async_url(pg_container),
+                                       isolation_level="AUTOCOMMIT")
+    async with admin_engine.connect() as conn:
+        await conn.execute(text("DROP DATABASE IF EXISTS replica"))
+        await conn.execute(text("CREATE DATABASE replica"))
+    await admin_engine.dispose()
+
+    engine = create_async_engine(
+        make_async_url(pg_container).set(database="replica"), echo=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def sqlite_engine() -> AsyncIterator[AsyncEngine]:
+    """SQLite в памяти: схема создается по моделям, Docker не нужен."""
+    engine = create_async_engine("sqlite+aiosqlite://",
+                                 poolclass=StaticPool)
+    await create_sqlite_schema(engine)
+    try:
+        yield engine
+    finally:
+        await engine.dispose()
+
+
 @pytest_asyncio.fixture
 async def session_maker(engine: AsyncEngine
                         ) -> async_sessionmaker[AsyncSession]:
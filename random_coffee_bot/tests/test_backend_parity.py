@@ -0,0 +1,95 @@
+"""
+Одни и те же проверки на PostgreSQL и на SQLite: семантика запросов
+не должна зависеть от СУБД.
+"""
+from collections.abc import AsyncIterator
+from datetime import datetime, timedelta, UTC
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from random_coffee_bot.database import backend
+from random_coffee_bot.database.models import Setting, User
+from random_coffee_bot.utils.bootstrap_settings import ensure_app_settings
+from random_coffee_bot.utils.pairing import get_users_ready_for_pairing
+
+
+@pytest.fixture(params=['postgresql', 'sqlite'])
+def backend_session_maker(request) -> async_sessionmaker[AsyncSession]:
+    engine_fixture = 'engine' if request.param == 'postgresql' \
+        else 'sqlite_engine'
+    engine = request.getfixturevalue(engine_fixture)
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest_asyncio.fixture
+async def backend_session(backend_session_maker
+                          ) -> AsyncIterator[AsyncSession]:
+    async with backend_session_maker() as s:
+        try:
+            yield s
+        finally:
+            await s.rollback()
+
+
+@pytest.mark.asyncio
+async def test_date_functions(backend_session: AsyncSession, utc_today):
+    result = await backend_session.execute(
+        select(backend.utc_today(),
+               backend.weeks_before(literal(utc_today), 3)))
+    today, three_weeks_ago = result.one()
+
+    assert str(today) == utc_today.isoformat()
+    assert str(three_weeks_ago) == (
+        utc_today - timedelta(weeks=3)).isoformat()
+
+
+@pytest.mark.asyncio
+async def test_ready_for_pairing(backend_session: AsyncSession, utc_today):
+    backend_session.add(Setting(id=1, global_interval=2,
+                                first_pairing_date=datetime.now(UTC)))
+    cases = [
+        # (поля юзера, готов ли он к парингу)
+        ({}, True),
+        ({'is_active': False}, False),
+        ({'pause_until': utc_today}, True),
+        ({'pause_until': utc_today + timedelta(days=1)}, False),
+        ({'pause_until': utc_today - timedelta(days=1)}, True),
+        ({'last_paired_at': utc_today - timedelta(weeks=2)}, True),
+        ({'last_paired_at': utc_today - timedelta(weeks=2, days=-1)}, False),
+        ({'pairing_interval': 1,
+          'last_paired_at': utc_today - timedelta(weeks=1)}, True),
+        ({'pairing_interval': 3,
+          'last_paired_at': utc_today - timedelta(weeks=2)}, False),
+        ({'pairing_interval': 3,
+          'last_paired_at': utc_today - timedelta(weeks=3)}, True),
+    ]
+    backend_session.add_all(
+        User(telegram_id=60_000 + i, first_name=f'U{i}', **fields)
+        for i, (fields, _) in enumerate(cases))
+    await backend_session.flush()
+
+    ready = await get_users_ready_for_pairing(backend_session)
+
+    assert sorted(u.telegram_id for u in ready) == [
+        60_000 + i for i, (_, is_ready) in enumerate(cases) if is_ready]
+
+
+@pytest.mark.asyncio
+async def test_ensure_app_settings_is_idempotent(backend_session_maker):
+    first_pairing_at = datetime(2030, 1, 1, tzinfo=UTC)
+    try:
+        setting = await ensure_app_settings(backend_session_maker, 3,
+                                            first_pairing_at, None)
+        assert setting.global_interval == 3
+        assert setting.is_pairing_on is False
+
+        setting = await ensure_app_settings(backend_session_maker, 5,
+                                            first_pairing_at, True)
+        assert setting.global_interval == 3
+    finally:
+        async with backend_session_maker() as s:
+            await s.execute(delete(Setting))
+            await s.commit()
@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+
+from random_coffee_bot.services import export_jobs
+from random_coffee_bot.services.export_jobs import ExportResult
+
+
+class FakeBot:
+    def __init__(self):
+        self.sent: list[tuple[int, str]] = []
+
+    async def send_message(self, chat_id: int, text: str, **kwargs):
+        self.sent.append((chat_id, text))
+
+
+class FakeStatus:
+    def __init__(self, text: str):
+        self.text = text
+
+    async def edit_text(self, text: str):
+        self.text = text
+
+
+class FakeMessage:
+    def __init__(self, chat_id: int, bot: FakeBot):
+        self.chat = SimpleNamespace(id=chat_id)
+        self.bot = bot
+        self.answers: list[FakeStatus] = []
+
+    async def answer(self, text: str, **kwargs) -> FakeStatus:
+        self.answers.append(FakeStatus(text))
+        return self.answers[-1]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_requests_share_one_job(monkeypatch):
+    bot = FakeBot()
+    release = asyncio.Event()
+    runs = []
+
+    async def run_export(job):
+        runs.append(job.id)
+        await job.report_progress('users', 3, 3)
+        await release.wait()
+        return ExportResult(users_rows=3, pairs_rows=1)
+
+    monkeypatch.setattr(export_jobs, 'run_export', run_export)
+    first, second = FakeMessage(1, bot), FakeMessage(2, bot)
+
+    job, is_new = await export_jobs.request_export(first, 'sheet')
+    assert is_new
+    same_job, is_new = await export_jobs.request_export(second, 'sheet')
+    assert same_job is job and not is_new
+    await export_jobs.request_export(first, 'sheet')
+    assert export_jobs.get_current_job() is job
+
+    release.set()
+    await job.task
+
+    assert runs == [job.id]
+    assert export_jobs.get_current_job() is None
+    assert sorted(chat_id for chat_id, _ in bot.sent) == [1, 2]
+    assert all(job.id in text and '3' in text for _, text in bot.sent)
+
+    job_2, is_new = await export_jobs.request_export(first, 'sheet')
+    assert is_new and job_2.id != job.id
+    await job_2.task
+
+
+@pytest.mark.asyncio
+async def test_failed_job_reports_error(monkeypatch):
+    bot = FakeBot()
+
+    async def run_export(job):
+        raise FileNotFoundError('credentials.json')
+
+    monkeypatch.setattr(export_jobs, 'run_export', run_export)
+    job, _ = await export_jobs.request_export(FakeMessage(1, bot), 'sheet')
+    await job.task
+
+    assert bot.sent == [
+        (1, export_jobs.ADMIN_TEXTS['error_google_sheets_unknown'])]
+    assert export_jobs.get_current_job() is None
+
+
+class FloodedStatus(FakeStatus):
+    async def edit_text(self, text: str):
+        raise TelegramRetryAfter(method=None, message='Flood control',
+                                 retry_after=5)
+
+
+@pytest.mark.asyncio
+async def test_progress_errors_do_not_stop_export(caplog):
+    flooded, status = FloodedStatus('start'), FakeStatus('start')
+    job = export_jobs.ExportJob(id='job', status_messages=[flooded, status])
+
+    await job.report_progress('users', 1, 3)
+
+    assert status.text != 'start'
+    assert 'Не удалось обновить ход экспорта job' in caplog.text
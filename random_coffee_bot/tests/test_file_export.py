@@ -0,0 +1,68 @@
+import csv
+import io
+import zipfile
+from collections.abc import AsyncIterator
+from datetime import datetime, UTC
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker
+
+from random_coffee_bot.database.models import Pair, User
+from random_coffee_bot.services import admin_service as adm
+from random_coffee_bot.services import file_export
+
+
+@pytest_asyncio.fixture
+async def export_session(sqlite_engine: AsyncEngine
+                         ) -> AsyncIterator[AsyncSession]:
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as s:
+        try:
+            yield s
+        finally:
+            await s.rollback()
+
+
+def read_csv(archive: zipfile.ZipFile, name: str) -> list[list[str]]:
+    with archive.open(name) as raw:
+        return list(csv.reader(io.TextIOWrapper(raw,
+                                                encoding='utf-8-sig')))
+
+
+@pytest.mark.asyncio
+async def test_export_to_archive(export_session: AsyncSession, tmp_path,
+                                 monkeypatch):
+    monkeypatch.setattr(file_export, 'FILE_EXPORT_CHUNK_ROWS', 2)
+    users = [User(telegram_id=74_000 + i, first_name=f'Имя{i}',
+                  last_name='Фамилия, с запятой' if i == 0 else None)
+             for i in range(5)]
+    export_session.add_all(users)
+    await export_session.flush()
+    export_session.add_all([
+        Pair(user1_id=users[0].id, user2_id=users[1].id,
+             created_at=datetime(2026, 2, 2, tzinfo=UTC)),
+        Pair(user1_id=users[2].id, user2_id=users[3].id,
+             user3_id=users[4].id,
+             created_at=datetime(2026, 2, 16, tzinfo=UTC)),
+    ])
+    await export_session.flush()
+
+    path = tmp_path / 'export.zip'
+    result = await file_export.export_to_archive(export_session, path)
+
+    assert (result.users_rows, result.pairs_rows) == (5, 2)
+    with zipfile.ZipFile(path) as archive:
+        users_csv = read_csv(archive, file_export.USERS_FILE_NAME)
+        pairs_csv = read_csv(archive, file_export.PAIRS_FILE_NAME)
+
+    assert users_csv[0] == adm.user_table_headers()
+    assert [row[0] for row in users_csv[1:]] == [
+        str(74_000 + i) for i in range(5)]
+    assert users_csv[1][2] == 'Фамилия, с запятой'
+    assert pairs_csv == [
+        adm.pair_table_headers(),
+        ['02.02.2026', 'Имя0 Фамилия, с запятой', 'Имя1', ''],
+        ['16.02.2026', 'Имя2', 'Имя3', 'Имя4'],
+    ]
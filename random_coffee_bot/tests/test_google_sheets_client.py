@@ -0,0 +1,114 @@
+import threading
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from google.auth.exceptions import RefreshError
+
+from random_coffee_bot.config import GoogleSheetConfig
+from random_coffee_bot.utils import google_sheets
+from random_coffee_bot.utils.google_sheets import GoogleSheetsClient
+
+
+class FakeCredentials:
+    def __init__(self, expires_in: timedelta):
+        self.token = None
+        self.expires_in = expires_in
+        self.expiry = None
+        self.refreshes = 0
+
+    def refresh(self, request):
+        self.refreshes += 1
+        self.token = f'token-{self.refreshes}'
+        self.expiry = datetime.now(UTC).replace(tzinfo=None) + \
+            self.expires_in
+
+
+class FakeSpreadsheet:
+    def __init__(self):
+        self.opened: list[str] = []
+        self.threads: set[str] = set()
+
+    def worksheet(self, title: str):
+        self.opened.append(title)
+        self.threads.add(threading.current_thread().name)
+        return f'worksheet-{title}'
+
+
+@pytest.fixture
+def google(monkeypatch):
+    state = {'credentials': [], 'authorized': 0,
+             'spreadsheet': FakeSpreadsheet(),
+             'expires_in': timedelta(hours=1)}
+
+    def from_service_account_file(path, scopes):
+        credentials = FakeCredentials(state['expires_in'])
+        state['credentials'].append(credentials)
+        return credentials
+
+    class FakeClient:
+        def open_by_key(self, key):
+            return state['spreadsheet']
+
+    def authorize(credentials):
+        state['authorized'] += 1
+        return FakeClient()
+
+    monkeypatch.setattr(google_sheets.Credentials,
+                        'from_service_account_file',
+                        from_service_account_file)
+    monkeypatch.setattr(google_sheets.gspread, 'authorize', authorize)
+    return state
+
+
+@pytest.fixture
+def client():
+    client = GoogleSheetsClient(GoogleSheetConfig(
+        sheet_id='sheet', backend='google',
+        credentials_file='credentials.json',
+        max_workers=1, write_quota_per_minute=60, chunk_rows=500,
+        max_retries=5))
+    yield client
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_connects_lazily_and_caches_handles(google, client):
+    assert google['credentials'] == []
+
+    assert await client.worksheet('users') == 'worksheet-users'
+    assert await client.worksheet('users') == 'worksheet-users'
+    await client.worksheet('pairs')
+
+    assert len(google['credentials']) == 1
+    assert google['credentials'][0].refreshes == 1
+    assert google['authorized'] == 1
+    assert google['spreadsheet'].opened == ['users', 'pairs']
+    assert all(name.startswith('google-sheets')
+               for name in google['spreadsheet'].threads)
+
+
+@pytest.mark.asyncio
+async def test_refreshes_token_before_expiry(google, client):
+    google['expires_in'] = timedelta(minutes=1)
+    await client.worksheet('users')
+    await client.worksheet('users')
+
+    credentials = google['credentials'][0]
+    assert credentials.refreshes == 2
+    assert google['authorized'] == 1
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_auth_error(google, client):
+    await client.worksheet('users')
+
+    def revoked():
+        raise RefreshError('invalid_grant')
+
+    with pytest.raises(RefreshError):
+        await client.run(revoked)
+    await client.worksheet('users')
+
+    assert len(google['credentials']) == 2
+    assert google['authorized'] == 2
+    assert google['spreadsheet'].opened == ['users', 'users']
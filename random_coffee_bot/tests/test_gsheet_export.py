@@ -0,0 +1,239 @@
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, UTC
+
+import pytest
+import pytest_asyncio
+from gspread.exceptions import APIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker
+
+from random_coffee_bot.config import GoogleSheetConfig
+from random_coffee_bot.database.models import Pair, User
+from random_coffee_bot.services import admin_service as adm
+from random_coffee_bot.utils import sheets_writer
+from random_coffee_bot.utils.fake_sheets import (api_error,
+                                                 FakeSheetsBackend,
+                                                 FakeSheetsClient,
+                                                 FakeWorksheet)
+from random_coffee_bot.utils.sheets_writer import (SheetsBatchWriter,
+                                                   WriteQuota)
+
+
+@pytest_asyncio.fixture
+async def export_session(sqlite_engine: AsyncEngine
+                         ) -> AsyncIterator[AsyncSession]:
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as s:
+        try:
+            yield s
+        finally:
+            await s.rollback()
+
+
+def make_writer(worksheet, progress=None) -> SheetsBatchWriter:
+    return SheetsBatchWriter(worksheet, WriteQuota(1000), chunk_rows=2,
+                             max_retries=2, base_delay=0,
+                             progress=progress)
+
+
+def make_worksheet(rows: int = 1000) -> FakeWorksheet:
+    return FakeWorksheet(FakeSheetsBackend(), 'test', rows=rows)
+
+
+@pytest.fixture
+def sheets(monkeypatch) -> Iterator[tuple[FakeWorksheet, FakeWorksheet]]:
+    client = FakeSheetsClient(GoogleSheetConfig(
+        sheet_id='sheet', backend='fake', credentials_file='',
+        max_workers=1, write_quota_per_minute=1000, chunk_rows=2,
+        max_retries=2))
+    client.retry_base_delay = 0
+    users_sheet = client.spreadsheet.worksheets['users']
+    pairs_sheet = client.spreadsheet.worksheets['pairs']
+    pairs_sheet.row_count = 2
+    monkeypatch.setattr(adm, 'get_sheets_client', lambda: client)
+    yield users_sheet, pairs_sheet
+    client.close()
+
+
+@pytest.mark.asyncio
+async def test_writer_chunks_contiguous_rows():
+    worksheet = make_worksheet(rows=3)
+    progress = []
+
+    async def report(done: int, total: int):
+        progress.append((done, total))
+
+    rows = [(n, [str(n), 'x']) for n in (7, 2, 3, 4, 9)]
+    written = await make_writer(worksheet, report).write_rows(rows)
+
+    assert written == 5
+    assert worksheet.row_count == 9
+    assert worksheet.writes == ['A2:B3', 'A4:B4', 'A7:B7', 'A9:B9']
+    assert progress == [(2, 5), (4, 5), (5, 5)]
+
+
+@pytest.mark.asyncio
+async def test_writer_retries_only_quota_and_server_errors():
+    worksheet = make_worksheet()
+    failures = worksheet.backend.failures['batch_update']
+    failures.extend([api_error(429), api_error(503)])
+    assert await make_writer(worksheet).write_rows([(2, ['a'])]) == 1
+    assert worksheet.cells[2] == ['a']
+
+    failures.append(api_error(400))
+    with pytest.raises(APIError):
+        await make_writer(worksheet).write_rows([(2, ['b'])])
+
+    failures.extend([api_error(500)] * 3)
+    with pytest.raises(APIError):
+        await make_writer(worksheet).write_rows([(2, ['c'])])
+
+
+@pytest.mark.asyncio
+async def test_write_quota_waits_for_window(monkeypatch):
+    now = [0.0]
+    sleeps = []
+
+    async def fake_sleep(delay: float):
+        sleeps.append(delay)
+        now[0] += delay
+
+    monkeypatch.setattr(sheets_writer.asyncio, 'sleep', fake_sleep)
+    quota = WriteQuota(2, period=60, clock=lambda: now[0])
+    await quota.acquire()
+    now[0] = 10.0
+    await quota.acquire()
+    await quota.acquire()
+
+    assert sleeps == [50.0]
+    assert now[0] == 60.0
+
+
+@pytest.mark.asyncio
+async def test_users_export_writes_only_changed_rows(
+        export_session: AsyncSession, sheets):
+    users_sheet, _ = sheets
+    users = [User(telegram_id=70_000 + i, first_name=f'U{i}')
+             for i in range(3)]
+    export_session.add_all(users)
+    await export_session.flush()
+
+    rows = await adm.export_users_to_gsheet(
+        export_session, await adm.fetch_all_users(export_session))
+    assert rows == 3
+    assert users_sheet.backend.calls['clear'] == 1
+    assert users_sheet.column(0)[1:] == ['70000', '70001', '70002']
+
+    users_sheet.writes.clear()
+    rows = await adm.export_users_to_gsheet(
+        export_session, await adm.fetch_all_users(export_session))
+    assert rows == 0
+    assert users_sheet.writes == []
+
+    users[1].first_name = 'Новое имя'
+    await export_session.delete(users[0])
+    export_session.add(User(telegram_id=70_003, first_name='U3'))
+    await export_session.flush()
+
+    rows = await adm.export_users_to_gsheet(
+        export_session, await adm.fetch_all_users(export_session))
+    assert rows == 3
+    assert users_sheet.backend.calls['clear'] == 1
+    assert users_sheet.writes == ['A2:K3', 'A5:K5']
+    assert users_sheet.column(0)[1:] == ['70001', '70002', '70003']
+    assert users_sheet.cells[3][1] == 'Новое имя'
+
+
+@pytest.mark.asyncio
+async def test_pairs_export_appends_new_pairs(export_session: AsyncSession,
+                                              sheets):
+    _, pairs_sheet = sheets
+    users = [User(telegram_id=71_000 + i, first_name=f'U{i}')
+             for i in range(4)]
+    export_session.add_all(users)
+    await export_session.flush()
+    export_session.add(Pair(user1_id=users[0].id, user2_id=users[1].id,
+                            created_at=datetime(2026, 1, 5, tzinfo=UTC)))
+    await export_session.flush()
+
+    async def export() -> int:
+        return await adm.export_pairs_to_gsheet(export_session,
+                                                export_session)
+
+    assert await export() == 1
+    assert await export() == 0
+
+    export_session.add(Pair(user1_id=users[2].id, user2_id=users[3].id,
+                            created_at=datetime(2026, 1, 19, tzinfo=UTC)))
+    await export_session.flush()
+    pairs_sheet.writes.clear()
+
+    assert await export() == 1
+    assert pairs_sheet.backend.calls['clear'] == 1
+    assert pairs_sheet.writes == ['A3:D3']
+    assert pairs_sheet.row_count == 3
+    assert pairs_sheet.column(1) == [adm.pair_table_headers()[1], 'U0', 'U2']
+
+
+@pytest.mark.asyncio
+async def test_pairs_export_streams_names_built_in_sql(
+        export_session: AsyncSession, sheets):
+    _, pairs_sheet = sheets
+    users = [User(telegram_id=73_000 + i, first_name=f'Имя{i}',
+                  last_name=f'Фамилия{i}' if i % 2 else None)
+             for i in range(11)]
+    export_session.add_all(users)
+    await export_session.flush()
+    export_session.add_all(
+        Pair(user1_id=users[i].id, user2_id=users[i + 1].id,
+             user3_id=users[10].id if i == 0 else None)
+        for i in range(0, 10, 2))
+    await export_session.flush()
+
+    assert await adm.export_pairs_to_gsheet(export_session,
+                                            export_session) == 5
+
+    # заголовок отдельно, затем пары чанками по две строки
+    assert pairs_sheet.writes == ['A1:D1', 'A2:D3', 'A4:D5', 'A6:D6']
+    assert pairs_sheet.row_count == 6
+    assert pairs_sheet.cells[2][1:] == ['Имя0', 'Имя1 Фамилия1',
+                                       'Имя10']
+    assert pairs_sheet.cells[3][1:] == ['Имя2', 'Имя3 Фамилия3', '']
+    state = await adm.get_export_state(export_session, adm.PAIRS_SHEET)
+    assert state.rows_count == 5
+
+
+@pytest.mark.asyncio
+async def test_users_export_resumes_after_failed_chunk(
+        export_session: AsyncSession, sheets):
+    users_sheet, _ = sheets
+    export_session.add_all(User(telegram_id=72_000 + i, first_name=f'U{i}')
+                           for i in range(5))
+    await export_session.flush()
+    users = await adm.fetch_all_users(export_session)
+
+    # первый чанк (заголовок и первый юзер) записан, второй - нет
+    users_sheet.backend.failures['batch_update'] = [None, api_error(400)]
+    with pytest.raises(APIError):
+        await adm.export_users_to_gsheet(export_session, users)
+
+    users_sheet.writes.clear()
+    assert await adm.export_users_to_gsheet(export_session, users) == 4
+    assert users_sheet.backend.calls['clear'] == 1
+    assert users_sheet.writes == ['A3:K4', 'A5:K6']
+    assert users_sheet.column(0)[1:] == [str(72_000 + i) for i in range(5)]
+
+
+def test_fake_backend_rejects_requests_over_quota():
+    now = [0.0]
+    backend = FakeSheetsBackend(quota_per_minute=2, clock=lambda: now[0])
+    backend.request('batch_update')
+    backend.request('batch_update')
+    with pytest.raises(APIError) as error:
+        backend.request('batch_update')
+    assert error.value.response.status_code == 429
+
+    now[0] = 60.0
+    backend.request('batch_update')
+    assert backend.calls['batch_update'] == 4
+    assert backend.errors == {429: 1}
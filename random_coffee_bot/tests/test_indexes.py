@@ -0,0 +1,81 @@
+import pytest
+import pytest_asyncio
+from sqlalchemy import Select, or_, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from random_coffee_bot.database.models import Pair, User
+from random_coffee_bot.database.views import (select_pair_export_rows,
+                                              select_user_views)
+
+
+async def explain(session: AsyncSession, stmt: Select) -> str:
+    """
+    Возвращает план запроса. На маленьких таблицах планировщик всегда
+    выбирает seq scan, поэтому он отключается на время транзакции:
+    если подходящего индекса нет, в плане все равно будет Seq Scan.
+    """
+    await session.execute(text('SET LOCAL enable_seqscan = off'))
+    sql = stmt.compile(dialect=postgresql.dialect(),
+                       compile_kwargs={'literal_binds': True})
+    result = await session.execute(text(f'EXPLAIN {sql}'))
+    return '\n'.join(row[0] for row in result)
+
+
+@pytest_asyncio.fixture
+async def some_pairs(session: AsyncSession) -> list[User]:
+    users = [User(telegram_id=i, first_name=f'Имя{i}', last_name=f'Ф{i}',
+                  is_active=i % 2 == 0)
+             for i in range(1, 7)]
+    session.add_all(users)
+    await session.flush()
+    session.add_all([
+        Pair(user1_id=users[0].id, user2_id=users[1].id),
+        Pair(user1_id=users[2].id, user2_id=users[3].id,
+             user3_id=users[4].id),
+    ])
+    await session.flush()
+    return users
+
+
+# pair секционирована, поэтому в плане видны индексы секций, которые
+# PostgreSQL называет по схеме <секция>_<колонка>_idx.
+@pytest.mark.asyncio
+async def test_pair_history_uses_created_at_index(session, some_pairs):
+    plan = await explain(
+        session,
+        select_pair_export_rows().order_by(Pair.created_at.desc()))
+    assert '_created_at_idx' in plan
+    assert 'Seq Scan on pair' not in plan
+
+
+@pytest.mark.asyncio
+async def test_pairs_of_user_use_member_indexes(session, some_pairs):
+    user_id = some_pairs[0].id
+    plan = await explain(
+        session,
+        select(Pair.id).where(or_(Pair.user1_id == user_id,
+                                  Pair.user2_id == user_id,
+                                  Pair.user3_id == user_id)))
+    assert '_user1_id_idx' in plan
+    assert '_user2_id_idx' in plan
+    assert '_user3_id_idx' in plan
+
+
+@pytest.mark.asyncio
+async def test_user_list_uses_partial_order_index(session, some_pairs):
+    plan = await explain(
+        session,
+        select_user_views()
+        .where(User.is_admin.is_(False), User.is_blocked.is_(False))
+        .order_by(User.last_name, User.id)
+        .limit(10))
+    assert 'ix_user_list_order' in plan
+    assert 'Sort' not in plan
+
+
+@pytest.mark.asyncio
+async def test_active_users_use_partial_index(session, some_pairs):
+    plan = await explain(
+        session, select(User.telegram_id).where(User.is_active.is_(True)))
+    assert 'ix_user_active_telegram_id' in plan
@@ -0,0 +1,46 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+from random_coffee_bot.database.instrumentation import (
+    instrument_engine, MAX_STATEMENT_LENGTH, normalize_statement)
+from random_coffee_bot.database.models import User
+from random_coffee_bot.metrics import registry
+
+
+def query_series() -> dict[str, int]:
+    return {name: values['count'] for name, values
+            in registry.snapshot('db_query_seconds').items()}
+
+
+def test_normalize_statement_groups_literals_and_placeholder_lists():
+    assert normalize_statement(
+        "SELECT * FROM users\n WHERE id IN ($1, $2, $3) AND name = 'Ann'"
+    ) == 'SELECT * FROM users WHERE id IN (...) AND name = ?'
+
+
+@pytest.mark.asyncio
+async def test_long_statements_with_common_prefix_are_separate_series(
+        sqlite_engine: AsyncEngine):
+    """
+    Запросы к users длиннее MAX_STATEMENT_LENGTH и различаются только
+    условием WHERE, но в метрике не сливаются.
+    """
+    instrument_engine(sqlite_engine, slow_query_ms=0)
+    maker = async_sessionmaker(sqlite_engine)
+    observed = []
+
+    for stmt in (select(User).where(User.telegram_id == 1),
+                 select(User).where(User.is_admin)):
+        before = query_series()
+        async with maker() as session:
+            await session.execute(stmt)
+        observed.append({name for name, count in query_series().items()
+                         if count > before.get(name, 0)})
+
+    first, second = observed
+    assert len(first) == len(second) == 1
+    assert first != second
+    for name in first | second:
+        statement = name.split('statement=', 1)[1].split(',statement_id=')[0]
+        assert len(statement) == MAX_STATEMENT_LENGTH + 1
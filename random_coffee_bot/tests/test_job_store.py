@@ -0,0 +1,113 @@
+import asyncio
+import time
+from datetime import datetime, timedelta, UTC
+
+import pytest
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from sqlalchemy import create_engine
+
+from random_coffee_bot.utils.job_store import OffloadedJobStore
+
+
+# время одного запроса медленного хранилища, секунды
+STORE_DELAY = 0.1
+
+
+class SlowJobStore(MemoryJobStore):
+    """Хранилище в памяти, каждая запись которого идет как запрос к БД."""
+
+    def add_job(self, job):
+        time.sleep(STORE_DELAY)
+        super().add_job(job)
+
+    def update_job(self, job):
+        time.sleep(STORE_DELAY)
+        super().update_job(job)
+
+
+async def job():
+    pass
+
+
+async def max_loop_lag(scheduler: AsyncIOScheduler) -> float:
+    """
+    Добавляет и меняет задачи в планировщике и возвращает наибольшую
+    задержку цикла событий за это время.
+    """
+    lag = 0.0
+    done = False
+
+    async def ticker():
+        nonlocal lag
+        while not done:
+            started_at = time.perf_counter()
+            await asyncio.sleep(0.005)
+            lag = max(lag, time.perf_counter() - started_at - 0.005)
+
+    ticker_task = asyncio.create_task(ticker())
+    run_date = datetime.now(UTC) + timedelta(days=1)
+    try:
+        for i in range(5):
+            scheduler.add_job(job, 'date', run_date=run_date, id=f'job{i}')
+            await asyncio.sleep(0.01)
+            scheduler.modify_job(f'job{i}', name=f'Задача {i}')
+            await asyncio.sleep(0.01)
+            assert len(scheduler.get_jobs()) == i + 1
+    finally:
+        done = True
+        await ticker_task
+    return lag
+
+
+def make_scheduler(store) -> AsyncIOScheduler:
+    scheduler = AsyncIOScheduler(jobstores={'default': store},
+                                 timezone='UTC')
+    scheduler.start()
+    return scheduler
+
+
+@pytest.mark.asyncio
+async def test_offloaded_store_does_not_block_event_loop():
+    scheduler = make_scheduler(SlowJobStore())
+    try:
+        assert await max_loop_lag(scheduler) >= STORE_DELAY
+    finally:
+        scheduler.shutdown(wait=False)
+
+    slow = SlowJobStore()
+    store = OffloadedJobStore(slow)
+    scheduler = make_scheduler(store)
+    try:
+        assert await max_loop_lag(scheduler) < STORE_DELAY / 2
+        await store.flush()
+        assert [j.name for j in slow.get_all_jobs()] == [
+            f'Задача {i}' for i in range(5)]
+    finally:
+        scheduler.shutdown(wait=False)
+
+
+@pytest.mark.asyncio
+async def test_offloaded_store_persists_and_restores_jobs(tmp_path):
+    url = f'sqlite:///{tmp_path / "jobs.sqlite"}'
+    run_date = datetime.now(UTC) + timedelta(days=1)
+
+    store = OffloadedJobStore(SQLAlchemyJobStore(engine=create_engine(url)))
+    scheduler = make_scheduler(store)
+    scheduler.add_job(job, 'date', run_date=run_date, id='kept')
+    scheduler.add_job(job, 'date', run_date=run_date, id='removed')
+    scheduler.remove_job('removed')
+    await store.flush()
+    scheduler.shutdown(wait=False)
+
+    restored = OffloadedJobStore(SQLAlchemyJobStore(
+        engine=create_engine(url)))
+    scheduler = AsyncIOScheduler(jobstores={'default': restored},
+                                 timezone='UTC')
+    scheduler.start(paused=True)
+    try:
+        assert [j.id for j in scheduler.get_jobs()] == ['kept']
+        assert scheduler.get_job('kept').next_run_time == run_date
+    finally:
+        scheduler.shutdown(wait=False)
@@ -0,0 +1,422 @@
+import asyncio
+import time
+from datetime import datetime, UTC
+from types import SimpleNamespace
+
+import pytest
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.enums import ChatType
+from aiogram.filters import Command
+from aiogram.fsm.context import FSMContext
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Chat, Message, Update
+from aiogram.types import User as TgUser
+from sqlalchemy import event, func, select
+from sqlalchemy.exc import OperationalError, SQLAlchemyError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from random_coffee_bot.database.backend import create_sqlite_schema
+from random_coffee_bot.database.instrumentation import instrument_engine
+from random_coffee_bot.database.models import User
+from random_coffee_bot.database.replica import ReadSessionRouter
+from random_coffee_bot.metrics import registry
+from random_coffee_bot.middlewares import (AccessMiddleware,
+                                           DbSessionMiddleware,
+                                           QueryStatsMiddleware,
+                                           ReadSessionMiddleware,
+                                           ThrottlingMiddleware,
+                                           UpdateSchedulerMiddleware)
+
+
+def outcome_count(outcome: str) -> float:
+    return registry.counter('db_unit_of_work_total', outcome=outcome).value
+
+
+async def user_names(maker: async_sessionmaker[AsyncSession]) -> list[str]:
+    async with maker() as session:
+        return list((await session.scalars(
+            select(User.first_name).order_by(User.id))).all())
+
+
+@pytest.mark.asyncio
+async def test_db_session_commits_on_success(sqlite_engine: AsyncEngine):
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    commits = outcome_count('commit')
+
+    async def handler(event, data):
+        data['session'].add(User(telegram_id=81_001, first_name='Ok'))
+        await data['session'].flush()
+        return 'done'
+
+    assert await DbSessionMiddleware(maker)(handler, None, {}) == 'done'
+
+    assert await user_names(maker) == ['Ok']
+    assert outcome_count('commit') == commits + 1
+
+
+@pytest.mark.asyncio
+async def test_db_session_rolls_back_on_exception(sqlite_engine: AsyncEngine):
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    rollbacks = outcome_count('rollback')
+
+    async def handler(event, data):
+        data['session'].add(User(telegram_id=81_002, first_name='Lost'))
+        await data['session'].flush()
+        raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        await DbSessionMiddleware(maker)(handler, None, {})
+
+    assert await user_names(maker) == []
+    assert outcome_count('rollback') == rollbacks + 1
+
+
+@pytest.mark.asyncio
+async def test_db_session_rolls_back_after_caught_flush_error(
+        sqlite_engine: AsyncEngine):
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+
+    async def handler(event, data):
+        session = data['session']
+        session.add(User(telegram_id=81_003, first_name='First'))
+        await session.flush()
+        session.add(User(telegram_id=81_003, first_name='Duplicate'))
+        try:
+            await session.flush()
+        except SQLAlchemyError:
+            # хэндлеры так отвечают юзеру об ошибке БД
+            return 'db_error'
+
+    assert await DbSessionMiddleware(maker)(handler, None, {}) == 'db_error'
+    assert await user_names(maker) == []
+
+
+class FakeBot:
+    async def get_chat_member(self, chat_id, user_id):
+        return SimpleNamespace(status='member')
+
+
+@pytest.mark.asyncio
+async def test_access_does_not_swallow_handler_db_errors(
+        sqlite_engine: AsyncEngine):
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    answers = []
+
+    async def answer(text, **kwargs):
+        answers.append(text)
+
+    event = SimpleNamespace(
+        chat_member=None, callback_query=None,
+        message=SimpleNamespace(chat=SimpleNamespace(type=ChatType.PRIVATE),
+                                answer=answer))
+
+    async def handler(event, data):
+        raise SQLAlchemyError('handler failed')
+
+    async def access(event, data):
+        return await AccessMiddleware()(handler, event, data)
+
+    data = {'event_from_user': SimpleNamespace(id=81_004),
+            'bot': FakeBot(), 'group_tg_id': -1}
+    with pytest.raises(SQLAlchemyError):
+        await DbSessionMiddleware(maker)(access, event, data)
+    assert answers == []
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def callback_update(data: str, answers: list) -> SimpleNamespace:
+    async def answer(text=None, **kwargs):
+        answers.append(text)
+
+    return SimpleNamespace(
+        chat_member=None, message=None,
+        callback_query=SimpleNamespace(data=data, answer=answer))
+
+
+def message_update(answers: list) -> SimpleNamespace:
+    async def answer(text, **kwargs):
+        answers.append(text)
+
+    return SimpleNamespace(chat_member=None, callback_query=None,
+                           message=SimpleNamespace(answer=answer))
+
+
+@pytest.mark.asyncio
+async def test_throttling_drops_updates_over_rate_limit():
+    clock = FakeClock()
+    throttling = ThrottlingMiddleware(rate_limit=2, period=1.0,
+                                      duplicate_window=0.5, clock=clock)
+    data = {'event_from_user': SimpleNamespace(id=1)}
+    answers = []
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event)
+
+    for _ in range(4):
+        await throttling(handler, message_update(answers), data)
+    # предупреждение одно на окно
+    assert len(handled) == 2
+    assert len(answers) == 1
+
+    clock.now = 1.0
+    await throttling(handler, message_update(answers), data)
+    assert len(handled) == 3
+
+
+@pytest.mark.asyncio
+async def test_throttling_duplicate_window_counts_from_handled_callback():
+    clock = FakeClock()
+    throttling = ThrottlingMiddleware(rate_limit=100, period=1.0,
+                                      duplicate_window=0.5, clock=clock)
+    data = {'event_from_user': SimpleNamespace(id=2)}
+    answers = []
+    handled = []
+
+    async def handler(event, data):
+        handled.append(event.callback_query.data)
+
+    # нажатия каждые 0.3 с: дубли отбрасываются, но не продлевают окно
+    for now in (0.0, 0.3, 0.6, 0.9):
+        clock.now = now
+        await throttling(handler, callback_update('pause', answers), data)
+    await throttling(handler, callback_update('resume', answers), data)
+
+    assert handled == ['pause', 'pause', 'resume']
+    # отброшенным колбэкам ответили пустым ответом
+    assert answers == [None, None]
+
+
+@pytest.mark.asyncio
+async def test_throttling_cleanup_forgets_idle_users():
+    clock = FakeClock()
+    throttling = ThrottlingMiddleware(rate_limit=1, period=1.0,
+                                      duplicate_window=0.5, clock=clock)
+    throttling.CLEANUP_EVERY = 3
+
+    async def handler(event, data):
+        pass
+
+    for user_id in (1, 2):
+        await throttling(handler, callback_update('x', []),
+                         {'event_from_user': SimpleNamespace(id=user_id)})
+    assert set(throttling._hits) == {1, 2}
+    assert set(throttling._last_callback) == {1, 2}
+
+    clock.now = 5.0
+    await throttling(handler, message_update([]),
+                     {'event_from_user': SimpleNamespace(id=3)})
+    assert set(throttling._hits) == {3}
+    assert throttling._last_callback == {}
+
+
+class Form(StatesGroup):
+    name = State()
+
+
+def text_update(update_id: int, text: str) -> Update:
+    return Update(update_id=update_id, message=Message(
+        message_id=update_id, date=datetime.now(UTC), text=text,
+        chat=Chat(id=83_001, type=ChatType.PRIVATE),
+        from_user=TgUser(id=83_001, is_bot=False, first_name='Ann')))
+
+
+@pytest.mark.asyncio
+async def test_scheduler_reads_fsm_state_when_update_is_processed():
+    """
+    Второй апдейт попадает в очередь, пока первый еще меняет состояние,
+    но фильтр по состоянию видит уже новое.
+    """
+    handled = []
+    router = Router()
+
+    @router.message(Command('start'))
+    async def start(message: Message, state: FSMContext):
+        await asyncio.sleep(0.01)
+        await state.set_state(Form.name)
+        handled.append('start')
+
+    @router.message(Form.name, F.text)
+    async def name(message: Message):
+        handled.append(f'name:{message.text}')
+
+    @router.message()
+    async def fallback(message: Message):
+        handled.append(f'fallback:{message.text}')
+
+    scheduler = UpdateSchedulerMiddleware(max_concurrency=4, max_pending=10)
+    dp = Dispatcher()
+    dp.update.outer_middleware(scheduler)
+    dp.include_router(router)
+    bot = Bot('42:TEST')
+    try:
+        await dp.feed_update(bot, text_update(1, '/start'))
+        await dp.feed_update(bot, text_update(2, 'Ann'))
+        await scheduler.wait_closed()
+    finally:
+        await bot.session.close()
+
+    assert handled == ['start', 'name:Ann']
+
+
+def user_data(user_id: int) -> dict:
+    return {'event_from_user': SimpleNamespace(id=user_id)}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_keeps_order_per_user_and_caps_concurrency():
+    scheduler = UpdateSchedulerMiddleware(max_concurrency=2, max_pending=50)
+    handled: dict[int, list[int]] = {}
+    running = peak = 0
+
+    async def handler(event, data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        handled.setdefault(data['event_from_user'].id, []).append(event)
+        running -= 1
+
+    for event in range(3):
+        for user_id in range(5):
+            await scheduler(handler, event, user_data(user_id))
+    await scheduler.wait_closed()
+
+    assert peak == 2
+    assert handled == {user_id: [0, 1, 2] for user_id in range(5)}
+
+
+@pytest.mark.asyncio
+async def test_scheduler_blocks_polling_when_queues_are_full():
+    scheduler = UpdateSchedulerMiddleware(max_concurrency=1, max_pending=2)
+    release = asyncio.Event()
+    handled = []
+
+    async def handler(event, data):
+        await release.wait()
+        handled.append(event)
+
+    await scheduler(handler, 1, user_data(1))
+    await scheduler(handler, 2, user_data(2))
+    # третий апдейт не принимается, пока в очередях нет места
+    third = asyncio.create_task(scheduler(handler, 3, user_data(1)))
+    await asyncio.sleep(0.01)
+    assert not third.done()
+
+    release.set()
+    await asyncio.wait_for(third, 1)
+    await scheduler.wait_closed()
+    assert sorted(handled) == [1, 2, 3]
+
+
+@pytest.mark.asyncio
+async def test_query_stats_warns_about_too_many_queries(
+        sqlite_engine: AsyncEngine, caplog: pytest.LogCaptureFixture):
+    instrument_engine(sqlite_engine, slow_query_ms=0)
+    maker = async_sessionmaker(sqlite_engine)
+    query_stats = QueryStatsMiddleware(warn_queries=2)
+
+    def handler_for(queries: int):
+        async def handler(event, data):
+            async with maker() as session:
+                for _ in range(queries):
+                    await session.execute(select(User.id))
+        return handler
+
+    with caplog.at_level('DEBUG', logger='random_coffee_bot.middlewares'):
+        await query_stats(handler_for(2), text_update(3, 'ok'), {})
+        assert 'WARNING' not in [r.levelname for r in caplog.records]
+
+        await query_stats(handler_for(3), text_update(4, 'n+1'), {})
+    warnings = [r.getMessage() for r in caplog.records
+                if r.levelname == 'WARNING']
+    assert len(warnings) == 1
+    assert warnings[0].startswith(
+        'Хэндлер update:message сделал 3 запросов к БД')
+
+
+def replica_data(session: AsyncSession) -> dict:
+    return {'session': session,
+            'handler': SimpleNamespace(flags={'read_replica': 30})}
+
+
+async def count_users(session: AsyncSession) -> int:
+    return (await session.execute(select(func.count(User.id)))).scalar_one()
+
+
+@pytest.mark.asyncio
+async def test_read_session_reuses_update_session_without_replica(
+        sqlite_engine: AsyncEngine):
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    middleware = ReadSessionMiddleware(ReadSessionRouter(maker, None))
+    seen = []
+
+    async def handler(event, data):
+        seen.append(data['read_session'])
+
+    async with maker() as session:
+        await middleware(handler, None, replica_data(session))
+        await middleware(handler, None, {'session': session})
+
+    assert seen == [session, session]
+
+
+@pytest.mark.asyncio
+async def test_read_session_fails_over_to_primary_mid_handler(
+        sqlite_engine: AsyncEngine):
+    """
+    Реплика отказала после первого запроса: хэндлер не видит ошибки,
+    следующие запросы идут в основную БД.
+    """
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as session:
+        session.add(User(telegram_id=84_001, first_name='Primary'))
+        await session.commit()
+
+    replica_engine = create_async_engine('sqlite+aiosqlite://',
+                                         poolclass=StaticPool)
+    await create_sqlite_schema(replica_engine)
+    replica_down = False
+
+    @event.listens_for(replica_engine.sync_engine, 'before_cursor_execute')
+    def fail(conn, cursor, statement, parameters, context, executemany):
+        if replica_down:
+            raise OperationalError(statement, parameters,
+                                   Exception('replica is down'))
+
+    router = ReadSessionRouter(maker, async_sessionmaker(replica_engine))
+    # отставание уже проверено, в SQLite запроса для него нет
+    router._lag = 0.0
+    router._lag_checked_at = time.monotonic()
+    failovers = registry.counter('db_replica_failovers_total').value
+    counts = []
+
+    async def handler(event, data):
+        nonlocal replica_down
+        read_session = data['read_session']
+        assert read_session is not data['session']
+        counts.append(await count_users(read_session))
+        replica_down = True
+        counts.append(await count_users(read_session))
+        counts.append(await count_users(read_session))
+
+    try:
+        async with maker() as session:
+            await ReadSessionMiddleware(router)(
+                handler, None, replica_data(session))
+    finally:
+        await replica_engine.dispose()
+
+    assert counts == [0, 1, 1]
+    assert registry.counter('db_replica_failovers_total').value \
+        == failovers + 1
+    assert not await router._replica_is_usable(30)
@@ -0,0 +1,101 @@
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from random_coffee_bot.database.models import Pair, PairMember, User
+from random_coffee_bot.utils.pairing import get_pair_history
+
+
+async def create_users(session: AsyncSession, n: int) -> list[User]:
+    users = [User(telegram_id=20_000 + i, first_name=f'U{i}')
+             for i in range(n)]
+    session.add_all(users)
+    await session.flush()
+    return users
+
+
+async def members(session: AsyncSession) -> set[tuple[int, int, int]]:
+    result = await session.execute(
+        select(PairMember.pair_id, PairMember.user_id, PairMember.round_id))
+    return set(result.tuples())
+
+
+@pytest.mark.asyncio
+async def test_members_follow_pair_inserts(session: AsyncSession):
+    """На каждого участника пары создается строка pair_member."""
+    u1, u2, u3, u4 = await create_users(session, 4)
+    pair = Pair(user1_id=u1.id, user2_id=u2.id)
+    triple = Pair(user1_id=u3.id, user2_id=u4.id, user3_id=u1.id)
+    session.add_all([pair, triple])
+    await session.flush()
+
+    rows = await members(session)
+    round_id = next(iter(rows))[2]
+    assert rows == {
+        (pair.id, u1.id, round_id), (pair.id, u2.id, round_id),
+        (triple.id, u3.id, round_id), (triple.id, u4.id, round_id),
+        (triple.id, u1.id, round_id),
+    }
+
+
+@pytest.mark.asyncio
+async def test_third_member_added_later(session: AsyncSession):
+    """Третий участник, добавленный к сохраненной паре, тоже попадает
+    в pair_member с тем же номером раунда."""
+    u1, u2, u3 = await create_users(session, 3)
+    pair = Pair(user1_id=u1.id, user2_id=u2.id)
+    session.add(pair)
+    await session.flush()
+
+    pair.user3_id = u3.id
+    await session.flush()
+    rows = await members(session)
+    assert {user_id for _, user_id, _ in rows} == {u1.id, u2.id, u3.id}
+    assert len({round_id for _, _, round_id in rows}) == 1
+
+    pair.user3_id = None
+    await session.flush()
+    rows = await members(session)
+    assert {user_id for _, user_id, _ in rows} == {u1.id, u2.id}
+
+
+@pytest.mark.asyncio
+async def test_each_transaction_is_a_new_round(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    async with session_maker() as session:
+        u1, u2 = await create_users(session, 2)
+        try:
+            session.add(Pair(user1_id=u1.id, user2_id=u2.id))
+            await session.commit()
+            session.add(Pair(user1_id=u1.id, user2_id=u2.id))
+            await session.commit()
+
+            rounds = sorted(
+                round_id for _, _, round_id in await members(session))
+            assert rounds[0] == rounds[1]
+            assert rounds[2] == rounds[3] == rounds[0] + 1
+        finally:
+            await session.rollback()
+            await session.execute(delete(PairMember))
+            await session.execute(delete(Pair))
+            await session.execute(delete(User))
+            await session.commit()
+
+
+@pytest.mark.asyncio
+async def test_pair_history_counts_meetings(session: AsyncSession):
+    u1, u2, u3, u4 = await create_users(session, 4)
+    session.add_all([
+        Pair(user1_id=u1.id, user2_id=u2.id),
+        Pair(user1_id=u2.id, user2_id=u1.id),
+        Pair(user1_id=u3.id, user2_id=u4.id, user3_id=u1.id),
+    ])
+    await session.flush()
+
+    history = await get_pair_history(session, [u1.id, u2.id, u3.id])
+
+    assert history == {
+        (u1.id, u2.id): 2,
+        (min(u1.id, u3.id), max(u1.id, u3.id)): 1,
+    }
@@ -0,0 +1,101 @@
+from collections.abc import AsyncIterator
+from datetime import date, datetime, UTC
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import delete, func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from random_coffee_bot.database.models import (Pair, PairArchive,
+                                               PairHistorySummary,
+                                               PairMember, User)
+from random_coffee_bot.database.partitions import (archive_pair_partitions,
+                                                   ensure_pair_partitions,
+                                                   get_pair_partition_years,
+                                                   pair_partition_ddl,
+                                                   pair_partition_name)
+from random_coffee_bot.utils.pairing import get_pair_history
+
+
+OLD_YEAR = 2019
+
+
+@pytest_asyncio.fixture
+async def committed_session(
+    session_maker: async_sessionmaker[AsyncSession],
+) -> AsyncIterator[AsyncSession]:
+    """
+    Сессия для тестов, которые коммитят DDL и данные.
+    После теста удаляет все, что могло остаться в БД.
+    """
+    async with session_maker() as s:
+        years_before = set(await get_pair_partition_years(s))
+        try:
+            yield s
+        finally:
+            await s.rollback()
+            for model in (PairArchive, PairHistorySummary, PairMember, Pair,
+                          User):
+                await s.execute(delete(model))
+            years_after = set(await get_pair_partition_years(s))
+            for year in (years_after - years_before) | {OLD_YEAR}:
+                await s.execute(text(
+                    f'DROP TABLE IF EXISTS {pair_partition_name(year)}'))
+            await s.commit()
+
+
+@pytest.mark.asyncio
+async def test_create_all_creates_current_partitions(session: AsyncSession):
+    year = datetime.now(UTC).year
+    years = await get_pair_partition_years(session)
+    assert {year, year + 1} <= set(years)
+
+
+@pytest.mark.asyncio
+async def test_ensure_creates_future_partitions(
+    committed_session: AsyncSession,
+):
+    year = datetime.now(UTC).year
+
+    created = await ensure_pair_partitions(committed_session, years_ahead=3)
+
+    assert created == [pair_partition_name(year + 2),
+                       pair_partition_name(year + 3)]
+    assert await ensure_pair_partitions(committed_session, 3) == []
+
+
+@pytest.mark.asyncio
+async def test_archive_summarizes_and_detaches_old_partition(
+    committed_session: AsyncSession,
+):
+    s = committed_session
+    await s.execute(text(pair_partition_ddl(OLD_YEAR)))
+    u1, u2, u3 = [User(telegram_id=30_000 + i, first_name=f'U{i}')
+                  for i in range(3)]
+    s.add_all([u1, u2, u3])
+    await s.flush()
+    s.add(Pair(user1_id=u1.id, user2_id=u2.id,
+               created_at=datetime(OLD_YEAR, 3, 1, tzinfo=UTC)))
+    await s.commit()
+    s.add(Pair(user1_id=u2.id, user2_id=u1.id, user3_id=u3.id,
+               created_at=datetime(OLD_YEAR, 6, 1, tzinfo=UTC)))
+    await s.commit()
+    s.add(Pair(user1_id=u1.id, user2_id=u2.id))
+    await s.commit()
+
+    archived = await archive_pair_partitions(
+        s, keep_years=3, detach=True, today=date(OLD_YEAR + 3, 1, 1))
+
+    assert archived == [pair_partition_name(OLD_YEAR)]
+    assert OLD_YEAR not in await get_pair_partition_years(s)
+    assert (await s.execute(select(func.count(Pair.id)))).scalar_one() == 1
+    summary = (await s.execute(select(PairHistorySummary))).scalars().all()
+    assert {(r.user_low_id, r.user_high_id, r.meetings) for r in summary} == {
+        (u1.id, u2.id, 2), (u1.id, u3.id, 1), (u2.id, u3.id, 1)}
+
+    history = await get_pair_history(s, [u1.id, u2.id, u3.id])
+    assert history[(u1.id, u2.id)] == 3
+    assert history[(u1.id, u3.id)] == 1
+
+    assert await archive_pair_partitions(
+        s, keep_years=3, detach=True, today=date(OLD_YEAR + 3, 1, 1)) == []
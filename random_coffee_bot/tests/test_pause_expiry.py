@@ -0,0 +1,41 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from random_coffee_bot.database.models import User
+from random_coffee_bot.services.admin_service import (clear_expired_pauses,
+                                                      format_text_about_user)
+
+
+@pytest.mark.asyncio
+async def test_clear_expired_pauses(session: AsyncSession):
+    """Снимаются паузы, закончившиеся сегодня или раньше."""
+    today = date.today()
+    pauses = [today - timedelta(days=3), today, today + timedelta(days=1),
+              None]
+    users = [User(telegram_id=40_000 + i, first_name=f'U{i}',
+                  pause_until=pause_until)
+             for i, pause_until in enumerate(pauses)]
+    session.add_all(users)
+    await session.flush()
+
+    assert await clear_expired_pauses(session) == 2
+
+    result = await session.execute(
+        select(User.pause_until).order_by(User.telegram_id))
+    assert result.scalars().all() == [None, None, pauses[2], None]
+
+
+def test_expired_pause_is_not_shown():
+    """До запуска ежедневной задачи истекшая пауза не показывается."""
+    template = '{pause_until}'
+    expired = User(first_name='А', pause_until=date.today())
+    future = User(first_name='Б',
+                  pause_until=date.today() + timedelta(days=7))
+
+    assert format_text_about_user(template, expired) == \
+        format_text_about_user(template, User(first_name='В'))
+    assert format_text_about_user(template, future) != \
+        format_text_about_user(template, expired)
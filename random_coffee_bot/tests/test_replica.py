@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import (AsyncEngine,
+                                    AsyncSession,
+                                    async_sessionmaker,
+                                    create_async_engine)
+
+from random_coffee_bot.database.models import User
+from random_coffee_bot.database.replica import ReadSessionRouter
+
+
+async def count_users(session: AsyncSession) -> int:
+    result = await session.execute(select(func.count(User.id)))
+    return result.scalar_one()
+
+
+@pytest.fixture
+def replica_session_maker(replica_engine: AsyncEngine
+                          ) -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(replica_engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica(
+    session_maker: async_sessionmaker[AsyncSession],
+    replica_session_maker: async_sessionmaker[AsyncSession],
+):
+    """Если реплика доступна и не отстает, чтение идет из нее."""
+    async with replica_session_maker() as s:
+        s.add(User(telegram_id=1, first_name='Реплика'))
+        await s.commit()
+
+    router = ReadSessionRouter(session_maker, replica_session_maker)
+    async with router.session(max_staleness=10) as s:
+        assert await count_users(s) == 1
+
+
+@pytest.mark.asyncio
+async def test_without_replica_reads_go_to_primary(
+    session_maker: async_sessionmaker[AsyncSession],
+    replica_session_maker: async_sessionmaker[AsyncSession],
+):
+    """Без настроенной реплики сессия открывается на основной БД."""
+    async with replica_session_maker() as s:
+        s.add(User(telegram_id=1, first_name='Реплика'))
+        await s.commit()
+
+    router = ReadSessionRouter(session_maker, None)
+    async with router.session(max_staleness=10) as s:
+        assert await count_users(s) == 0
+
+
+@pytest.mark.asyncio
+async def test_falls_back_to_primary_when_replica_is_down(
+    engine: AsyncEngine,
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    """Недоступная реплика не ломает чтение: оно идет в основную БД."""
+    broken_engine = create_async_engine(
+        engine.url.set(port=1, host='127.0.0.1'),
+        connect_args={'timeout': 1})
+    broken_maker = async_sessionmaker(broken_engine)
+    router = ReadSessionRouter(session_maker, broken_maker)
+    try:
+        async with router.session(max_staleness=10) as s:
+            assert await count_users(s) == 0
+        assert router.replica is broken_maker
+        assert not await router._replica_is_usable(10)
+    finally:
+        await broken_engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_stale_replica_is_skipped(
+    session_maker: async_sessionmaker[AsyncSession],
+    replica_session_maker: async_sessionmaker[AsyncSession],
+):
+    """Если реплика отстает сильнее допустимого, читаем из основной БД."""
+    async with replica_session_maker() as s:
+        s.add(User(telegram_id=1, first_name='Реплика'))
+        await s.commit()
+
+    router = ReadSessionRouter(session_maker, replica_session_maker)
+    async with router.session(max_staleness=10) as s:
+        assert await count_users(s) == 1
+    router._lag = 120.0
+
+    async with router.session(max_staleness=10) as s:
+        assert await count_users(s) == 0
+    async with router.session(max_staleness=300) as s:
+        assert await count_users(s) == 1
@@ -0,0 +1,111 @@
+import asyncio
+from collections.abc import AsyncIterator, Iterator
+from datetime import datetime, UTC
+from types import SimpleNamespace
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker
+
+from random_coffee_bot.database.models import Setting
+from random_coffee_bot.services import admin_service as adm
+from random_coffee_bot.utils import setting_events
+
+
+@pytest.fixture
+def changes() -> Iterator[asyncio.Queue]:
+    queue: asyncio.Queue = asyncio.Queue()
+
+    async def on_change():
+        queue.put_nowait(True)
+
+    setting_events.subscribe(on_change)
+    yield queue
+    setting_events.unsubscribe(on_change)
+
+
+@pytest_asyncio.fixture
+async def interval_session(sqlite_engine: AsyncEngine
+                           ) -> AsyncIterator[AsyncSession]:
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as s:
+        s.add(Setting(id=1, global_interval=2,
+                      first_pairing_date=datetime.now(UTC)))
+        await s.commit()
+        yield s
+
+
+@pytest.mark.asyncio
+async def test_interval_change_is_published_after_commit(
+        interval_session: AsyncSession, changes: asyncio.Queue):
+    await adm.set_new_global_interval(interval_session, 3)
+    await asyncio.sleep(0)
+    assert changes.empty()
+
+    await interval_session.commit()
+    await asyncio.wait_for(changes.get(), 1)
+
+
+@pytest.mark.asyncio
+async def test_rolled_back_or_same_interval_is_not_published(
+        interval_session: AsyncSession, changes: asyncio.Queue):
+    await adm.set_new_global_interval(interval_session, 4)
+    await interval_session.rollback()
+    await adm.set_new_global_interval(interval_session, 2)
+    await interval_session.commit()
+    await asyncio.sleep(0)
+
+    assert changes.empty()
+
+
+@pytest.mark.asyncio
+async def test_listener_receives_notify(engine: AsyncEngine,
+                                        changes: asyncio.Queue):
+    listener = setting_events.SettingsListener(engine)
+    assert listener.start()
+    try:
+        await asyncio.wait_for(listener.listening.wait(), 5)
+        async with engine.begin() as conn:
+            await conn.execute(select(func.pg_notify(
+                setting_events.CHANNEL, '3')))
+        await asyncio.wait_for(changes.get(), 5)
+    finally:
+        await listener.stop()
+
+
+class HalfOpenDriver:
+    """Соединение, которое молча перестало отвечать."""
+
+    def __init__(self):
+        self.pings = 0
+
+    def add_termination_listener(self, callback):
+        pass
+
+    async def add_listener(self, channel, callback):
+        pass
+
+    async def fetchval(self, query):
+        self.pings += 1
+        if self.pings > 1:
+            await asyncio.Event().wait()
+        return 1
+
+
+@pytest.mark.asyncio
+async def test_listener_detects_half_open_connection():
+    driver = HalfOpenDriver()
+
+    async def get_raw_connection():
+        return SimpleNamespace(driver_connection=driver)
+
+    conn = SimpleNamespace(get_raw_connection=get_raw_connection)
+    listener = setting_events.SettingsListener(
+        engine=None, ping_interval=0.01, ping_timeout=0.05)
+
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(listener._listen(conn, resync=False), 1)
+    assert driver.pings == 2
+    assert not listener.listening.is_set()
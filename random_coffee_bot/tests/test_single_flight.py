@@ -0,0 +1,160 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker
+
+from random_coffee_bot.database.models import Setting, User
+from random_coffee_bot.database.views import UserView
+from random_coffee_bot.services.admin_service import get_admin_list
+from random_coffee_bot.utils.single_flight import single_flight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_query(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    """Одновременные вызовы с одним ключом выполняют один запрос."""
+    calls = 0
+
+    @single_flight
+    async def count_users(session: AsyncSession) -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.05)
+        result = await session.execute(select(User.id))
+        return len(result.all())
+
+    async def call() -> int:
+        async with session_maker() as s:
+            return await count_users(s)
+
+    results = await asyncio.gather(*(call() for _ in range(20)))
+
+    assert calls == 1
+    assert results == [0] * 20
+
+
+@pytest.mark.asyncio
+async def test_different_keys_are_not_coalesced(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    """Вызовы с разными аргументами выполняются независимо."""
+    calls = []
+
+    @single_flight
+    async def echo(session: AsyncSession, value: int) -> int:
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        return value
+
+    async def call(value: int) -> int:
+        async with session_maker() as s:
+            return await echo(s, value)
+
+    results = await asyncio.gather(call(1), call(2), call(1))
+
+    assert sorted(calls) == [1, 2]
+    assert results == [1, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_session_with_writes_bypasses_coalescing(
+    session: AsyncSession, ensure_setting: Setting,
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    """Сессия со своими незакоммиченными изменениями читает сама."""
+    started = asyncio.Event()
+    calls = 0
+
+    @single_flight
+    async def get_interval(s: AsyncSession) -> int | None:
+        nonlocal calls
+        calls += 1
+        started.set()
+        await asyncio.sleep(0.05)
+        result = await s.execute(
+            select(Setting.global_interval).where(Setting.id == 1))
+        return result.scalar_one_or_none()
+
+    async def other_reader() -> int | None:
+        async with session_maker() as s:
+            return await get_interval(s)
+
+    ensure_setting.global_interval = 4
+    await session.flush()
+
+    other = asyncio.create_task(other_reader())
+    await started.wait()
+    own = await get_interval(session)
+    await other
+
+    assert calls == 2
+    assert own == 4
+
+
+@pytest.mark.asyncio
+async def test_exception_is_propagated_to_all_callers(
+    session_maker: async_sessionmaker[AsyncSession],
+):
+    """Ошибку запроса получают все ожидающие вызовы."""
+
+    @single_flight
+    async def broken(session: AsyncSession) -> None:
+        await asyncio.sleep(0.05)
+        raise ValueError('boom')
+
+    async def call() -> None:
+        async with session_maker() as s:
+            await broken(s)
+
+    results = await asyncio.gather(*(call() for _ in range(3)),
+                                   return_exceptions=True)
+
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_core_dml_bypasses_coalescing(sqlite_engine: AsyncEngine):
+    """update() через session.execute тоже считается записью сессии."""
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    release = asyncio.Event()
+    calls = 0
+
+    @single_flight
+    async def read(s: AsyncSession) -> int:
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    async with maker() as leader, maker() as writer:
+        leader_task = asyncio.create_task(read(leader))
+        await asyncio.sleep(0)
+        await writer.execute(update(User).values(is_active=False))
+        assert not (writer.new or writer.dirty or writer.deleted)
+
+        release.set()
+        assert await read(writer) == 2
+        await leader_task
+        await writer.rollback()
+
+    assert calls == 2
+
+
+@pytest.mark.asyncio
+async def test_admin_list_is_not_bound_to_leader_session(
+        sqlite_engine: AsyncEngine):
+    """Список админов общий для вызовов, поэтому это не ORM-объекты."""
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as s:
+        s.add(User(telegram_id=82_001, first_name='Admin', is_admin=True))
+        s.add(User(telegram_id=82_002, first_name='User'))
+        await s.commit()
+
+    async with maker() as s:
+        admins = await get_admin_list(s)
+
+    assert [type(a) for a in admins] == [UserView]
+    assert [a.telegram_id for a in admins] == [82_001]
@@ -0,0 +1,67 @@
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from random_coffee_bot.database.models import Pair, User
+from random_coffee_bot.services.admin_service import (clear_expired_pauses,
+                                                      get_stats)
+
+
+@pytest.mark.asyncio
+async def test_user_counters_follow_user_changes(session: AsyncSession):
+    today = date.today()
+    session.add_all([
+        User(telegram_id=50_000, first_name='Админ', is_admin=True),
+        User(telegram_id=50_001, first_name='Пауза', pause_until=today),
+        User(telegram_id=50_002, first_name='Активный'),
+        User(telegram_id=50_003, first_name='Неактивный', is_active=False),
+    ])
+    await session.flush()
+
+    stats = await get_stats(session)
+    assert stats['all_users'] == 4
+    assert stats['active_users'] == 3
+    assert stats['listed_users'] == 3
+    assert stats['paused_users'] == 1
+
+    result = await session.execute(
+        select(User).where(User.telegram_id == 50_002))
+    user = result.scalar_one()
+    user.is_active = False
+    user.is_blocked = True
+    user.pause_until = today + timedelta(days=7)
+    await session.flush()
+
+    stats = await get_stats(session)
+    assert stats['active_users'] == 2
+    assert stats['listed_users'] == 2
+    assert stats['paused_users'] == 2
+
+    assert await clear_expired_pauses(session) == 1
+    assert (await get_stats(session))['paused_users'] == 1
+
+    await session.delete(user)
+    await session.flush()
+    stats = await get_stats(session)
+    assert stats['all_users'] == 3
+    assert stats['paused_users'] == 0
+
+
+@pytest.mark.asyncio
+async def test_pair_counters(session: AsyncSession):
+    users = [User(telegram_id=51_000 + i, first_name=f'U{i}')
+             for i in range(5)]
+    session.add_all(users)
+    await session.flush()
+    u1, u2, u3, u4, u5 = users
+    session.add_all([
+        Pair(user1_id=u1.id, user2_id=u2.id),
+        Pair(user1_id=u3.id, user2_id=u4.id, user3_id=u5.id),
+    ])
+    await session.flush()
+
+    stats = await get_stats(session)
+    assert stats['meetings_total'] == 2
+    assert stats['paired_last_round'] == 5
@@ -0,0 +1,97 @@
+from collections.abc import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker
+
+from random_coffee_bot.database.models import (STAT_ALL_USERS,
+                                               STAT_LISTED_USERS, User)
+from random_coffee_bot.services import admin_service as adm
+from random_coffee_bot.services import user_import
+
+
+@pytest_asyncio.fixture
+async def import_session(sqlite_engine: AsyncEngine
+                         ) -> AsyncIterator[AsyncSession]:
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as s:
+        try:
+            yield s
+        finally:
+            await s.rollback()
+
+
+def test_read_import_rows_skips_invalid_and_duplicates():
+    rows, skipped = user_import.read_import_rows([
+        'telegram_id,first_name,last_name\n',
+        '1,Анна,\n',
+        'abc,Ошибка,\n',
+        '-5,Ошибка,\n',
+        '2,Борис,Бобров\n',
+        '1,Аня,Иванова\n',
+    ])
+    assert skipped == 3
+    assert rows == [
+        {'telegram_id': 1, 'username': None, 'first_name': 'Аня',
+         'last_name': 'Иванова'},
+        {'telegram_id': 2, 'username': None, 'first_name': 'Борис',
+         'last_name': 'Бобров'},
+    ]
+
+    with pytest.raises(ValueError):
+        user_import.read_import_rows(['id,first_name\n', '1,Анна\n'])
+
+
+@pytest.mark.asyncio
+async def test_import_users_merges_into_user(import_session: AsyncSession):
+    import_session.add_all([
+        User(telegram_id=75_001, first_name='Старое', last_name='Имя'),
+        User(telegram_id=75_002, first_name='Same', username='same'),
+    ])
+    await import_session.flush()
+    stats_before = await adm.get_stats(import_session)
+
+    rows, skipped = user_import.read_import_rows([
+        'telegram_id,username,first_name,last_name\n',
+        '75001,,Новое,\n',
+        '75002,same,Same,\n',
+        '75003,new,Новый,Юзер\n',
+        '75004,,Еще,\n',
+        'oops,,,\n',
+    ])
+    result = await user_import.import_users(import_session, rows, skipped)
+
+    assert (result.inserted, result.updated, result.skipped) == (2, 1, 2)
+    users = {u.telegram_id: u for u in (await import_session.execute(
+        select(User).execution_options(populate_existing=True)
+    )).scalars()}
+    assert (users[75_001].first_name, users[75_001].last_name) == \
+        ('Новое', 'Имя')
+    assert users[75_003].username == 'new'
+    assert users[75_003].is_active and not users[75_003].is_admin
+    stats = await adm.get_stats(import_session)
+    for key in (STAT_ALL_USERS, STAT_LISTED_USERS):
+        assert stats[key] == stats_before[key] + 2
+
+    again = await user_import.import_users(import_session, rows)
+    assert (again.inserted, again.updated, again.skipped) == (0, 0, 4)
+
+
+@pytest.mark.asyncio
+async def test_import_from_file_owns_its_transaction(
+        sqlite_engine: AsyncEngine, tmp_path):
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    path = tmp_path / 'members.csv'
+    path.write_text('telegram_id,first_name\n76001,Анна\n', encoding='utf-8')
+
+    async with maker() as session:
+        result = await user_import.import_users_from_file(session, path)
+        assert not session.in_transaction()
+    assert (result.inserted, result.updated, result.skipped) == (1, 0, 0)
+
+    async with maker() as session:
+        names = (await session.scalars(
+            select(User.first_name).where(User.telegram_id == 76_001))).all()
+    assert names == ['Анна']
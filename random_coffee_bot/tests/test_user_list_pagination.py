@@ -0,0 +1,74 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from random_coffee_bot.database.models import User
+from random_coffee_bot.keyboards.admin_buttons import (ITEMS_PER_PAGE,
+                                                       PageCallbackFactory,
+                                                       UsersCallbackFactory,
+                                                       generate_inline_user_list,
+                                                       get_listed_users_count)
+
+
+def parse_keyboard(kb) -> tuple[list[int], dict[str, PageCallbackFactory]]:
+    buttons = [button for row in kb.export() for button in row]
+    user_ids = [UsersCallbackFactory.unpack(b.callback_data).telegram_id
+                for b in buttons if b.callback_data.startswith('get_user')]
+    navigation = {}
+    for b in buttons:
+        if b.callback_data.startswith('page'):
+            data = PageCallbackFactory.unpack(b.callback_data)
+            navigation[data.direction] = data
+    return user_ids, navigation
+
+
+@pytest.mark.asyncio
+async def test_keyset_pages_cover_list_in_order(session: AsyncSession):
+    """
+    Листание вперед и назад проходит всех участников ровно по одному
+    разу в порядке фамилии, юзеры без фамилии идут в конце.
+    """
+    last_names = ['Б', None, 'А', 'Б', None, 'В', 'А'] * 5
+    users = [User(telegram_id=i, first_name=str(i), last_name=last_name,
+                  is_admin=(i == 3), is_blocked=(i == 4))
+             for i, last_name in enumerate(last_names)]
+    session.add_all(users)
+    await session.flush()
+    get_listed_users_count.invalidate()
+
+    listed = [u for u in users if not u.is_admin and not u.is_blocked]
+    expected = [u.telegram_id for u in sorted(
+        listed, key=lambda u: (u.last_name is None, u.last_name or '', u.id))]
+
+    forward_pages = []
+    page, cursor, direction = 1, 0, 'next'
+    while True:
+        kb, total = await generate_inline_user_list(session, page, cursor,
+                                                    direction)
+        user_ids, navigation = parse_keyboard(kb)
+        forward_pages.append(user_ids)
+        if 'next' not in navigation:
+            break
+        nxt = navigation['next']
+        page, cursor, direction = nxt.page, nxt.cursor, nxt.direction
+
+    assert total == len(listed)
+    assert [i for p in forward_pages for i in p] == expected
+    assert all(len(p) == ITEMS_PER_PAGE for p in forward_pages[:-1])
+
+    backward_pages = [forward_pages[-1]]
+    while 'prev' in navigation:
+        prev = navigation['prev']
+        kb, _ = await generate_inline_user_list(session, prev.page,
+                                                prev.cursor, prev.direction)
+        user_ids, navigation = parse_keyboard(kb)
+        backward_pages.append(user_ids)
+
+    assert backward_pages[::-1] == forward_pages
+
+
+@pytest.mark.asyncio
+async def test_empty_list(session: AsyncSession):
+    kb, total = await generate_inline_user_list(session)
+
+    assert kb is None
+    assert total == 0
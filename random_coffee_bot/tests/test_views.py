@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, \
+    async_sessionmaker
+
+from random_coffee_bot.database.models import Pair, User
+from random_coffee_bot.database.views import (UserView,
+                                              select_pair_export_rows,
+                                              select_user_views,
+                                              to_user_view)
+
+
+@pytest.mark.asyncio
+async def test_user_view_matches_orm_user(session: AsyncSession):
+    """UserView содержит те же значения, что и ORM-объект."""
+    user = User(telegram_id=1, first_name='Анна', last_name=None,
+                pairing_interval=4)
+    session.add(user)
+    await session.flush()
+
+    result = await session.execute(
+        select_user_views().where(User.id == user.id))
+    view = to_user_view(result.one())
+
+    assert isinstance(view, UserView)
+    assert view.telegram_id == 1
+    assert view.full_name == 'Анна'
+    assert view.pairing_interval == 4
+    assert view.is_active is True
+    with pytest.raises(AttributeError):
+        view.is_active = False  # type: ignore[misc]
+
+
+@pytest.mark.asyncio
+async def test_pair_export_rows_contain_member_names(
+        sqlite_engine: AsyncEngine):
+    """Имена участников склеиваются в SQL, третьего может не быть."""
+    maker = async_sessionmaker(sqlite_engine, expire_on_commit=False)
+    async with maker() as session:
+        users = [User(telegram_id=i, first_name=f'Имя{i}',
+                      last_name=f'Ф{i}' if i != 2 else None)
+                 for i in range(1, 6)]
+        session.add_all(users)
+        await session.flush()
+        session.add_all([
+            Pair(user1_id=users[0].id, user2_id=users[1].id),
+            Pair(user1_id=users[2].id, user2_id=users[3].id,
+                 user3_id=users[4].id),
+        ])
+        await session.flush()
+
+        result = await session.execute(
+            select_pair_export_rows().order_by(Pair.id))
+        rows = [tuple(row[2:]) for row in result]
+
+    assert rows == [('Имя1 Ф1', 'Имя2', ''),
+                    ('Имя3 Ф3', 'Имя4 Ф4', 'Имя5 Ф5')]
@@ -74,8 +74,12 @@ ADMIN_TEXTS = {
     'choose_interval': 'Выберите новый интервал:',
     'success_new_interval': '✅ Установлен новый интервал: {interval}.\nСледующее формирование пар запланировано на - {next_pairing_date}',
     'cancel_changing_interval': 'Оставлен прежний интервал: {interval}.\nСледующее формирование пар запланировано на - {next_pairing_date}',
-    'start_export_data': '⌛️ Начинаю экспорт данных…',
-    'success_export_data': '✅ Экспорт завершён. <a href="https://docs.google.com/spreadsheets/d/{google_sheet_id}">Ссылка на таблицу</a>',
+    'export_job_started': '⌛️ Начинаю экспорт данных (задача {job_id}). Когда он завершится, пришлю сообщение.',
+    'export_job_attached': '⌛️ Экспорт уже идет (задача {job_id}). Когда он завершится, пришлю сообщение.',
+    'export_progress': '⌛️ Экспорт листа {sheet}: записано строк {done} из {total}…',
+    'success_export_data': '✅ Экспорт {job_id} завершён за {duration} с. Записано строк юзеров: {users_rows}, новых пар: {pairs_rows}. <a href="https://docs.google.com/spreadsheets/d/{google_sheet_id}">Ссылка на таблицу</a>',
+    'start_export_file': '⌛️ Готовлю файл с данными…',
+    'success_export_file': '✅ Выгрузка в файл: юзеров {users_rows}, пар {pairs_rows}.',
     'error_google_sheets_settings': '❌ Произошла ошибка при работе с ГуглТаблицами. Обратитесь к разработчикам.',
     'error_google_sheets_unknown': '❌ Произошла ошибка при работе с ГуглТаблицами. Попробуйте позже. Если ошибка останется, обратитесь к разработчикам.',
     'error_google_sheets_wrong_name': '❌ Лист с нужным именем не найден. Проверьте, чтобы имена листов соответсвовали инструкции разработчиков.',
@@ -89,6 +93,9 @@ ADMIN_TEXTS = {
     'code_error': 'Ошибка. Попробуйте снова. При повторной ошибке обратитесь к разработчикам.',
     'info': ('Количество зарегистрированных человек: {all_users}\n'
              'Количество активных участников: {active_users}\n'
+             'Сейчас на паузе: {paused_users}\n'
+             'Участвовали в последнем формировании пар: {paired_last_round}\n'
+             'Всего встреч: {meetings_total}\n'
              'Дата следующей встречи: {next_pairing_date}\n'
              'Текущий интервал: {interval}\n\n'
              'Чтобы узнать, как работает каждая кнопка меню, отправьте команду /admin_help.'),
@@ -205,6 +212,7 @@ USER_TEXTS = {
     'status_active_false': 'неактивен',
     'no_data': 'не указано',
     'db_error': 'Ошибка обработки данных. Попробуй позже.',
+    'too_many_requests': 'Слишком много запросов. Подожди пару секунд и попробуй снова.',
     'no_permission': 'Извини, у тебя нет разрешения на участие в Random Coffee by Karina Club. Если считаешь, что это ошибка, свяжись с администратором.',
     'no_username': 'не задан (рекомендуем задать в настройках Телеграмма)',
     'comfirmation_change_name': (
@@ -319,6 +327,7 @@ KEYBOARD_BUTTON_TEXTS = {
     'button_list_participants': '📋 Список участников',
     'button_participant_management': '👥 Управление участниками',
     'button_google_sheets': '📊 Выгрузить в гугл таблицу',
+    'button_export_file': '📁 Выгрузить в файл',
     'button_change_interval': '🤝 Изменить интервал',
     'button_send_notification': '✉️ Отправить рассылку',
     'button_change_my_details': '✏️ Изменить мои данные',
@@ -2,26 +2,26 @@ import logging
 from datetime import datetime
 
 from sqlalchemy import select
-from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.exc import SQLAlchemyError
 
-from ..database.db import AsyncSessionLocal
+from ..database.backend import dialect_insert
 from ..database.models import Setting
 
 
 logger = logging.getLogger(__name__)
 
 
-async def ensure_app_settings(default_global_interval: int | None,
+async def ensure_app_settings(session_maker,
+                              default_global_interval: int | None,
                               first_pairing_at: datetime | None,
                               is_pairing_on: bool | None) -> Setting:
     """Создаёт запись setting(id=1), если её нет.
     Если запись уже есть — ничего не меняет.
     """
 
-    async with AsyncSessionLocal() as session:
+    async with session_maker() as session:
         try:
-            stmt = pg_insert(Setting).values(
+            stmt = dialect_insert(session)(Setting).values(
                 id=1,
                 global_interval=default_global_interval or 2,
                 first_pairing_date=first_pairing_at,
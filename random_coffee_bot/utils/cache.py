@@ -0,0 +1,46 @@
+import functools
+import time
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..metrics import registry
+
+
+T = TypeVar('T')
+
+
+def ttl_cache(seconds: float
+              ) -> Callable[[Callable[..., Awaitable[T]]],
+                            Callable[..., Awaitable[T]]]:
+    """
+    Кэширует результат сервисной функции на seconds секунд.
+    Как и в single_flight, первым аргументом функция принимает сессию,
+    а ключ кэша образуют остальные аргументы.
+    Кэш можно сбросить вызовом func.invalidate(), например после
+    изменения данных, от которых зависит результат.
+    """
+    def decorator(func: Callable[..., Awaitable[T]]
+                  ) -> Callable[..., Awaitable[T]]:
+        cache: dict[tuple, tuple[float, Any]] = {}
+
+        @functools.wraps(func)
+        async def wrapper(session: AsyncSession, *args: Any,
+                          **kwargs: Any) -> T:
+            key = (args, tuple(sorted(kwargs.items())))
+            cached = cache.get(key)
+            now = time.monotonic()
+            if cached is not None and cached[0] > now:
+                registry.counter('ttl_cache_total', func=func.__name__,
+                                 outcome='hit').inc()
+                return cached[1]
+            registry.counter('ttl_cache_total', func=func.__name__,
+                             outcome='miss').inc()
+            result = await func(session, *args, **kwargs)
+            cache[key] = (now + seconds, result)
+            return result
+
+        wrapper.invalidate = cache.clear  # type: ignore[attr-defined]
+        return wrapper
+
+    return decorator
@@ -0,0 +1,189 @@
+"""
+Гугл Таблица в памяти процесса вместо настоящей.
+
+Повторяет ту часть интерфейса gspread, которой пользуется экспорт,
+записывает все вызовы API и умеет имитировать задержку сети, квоту
+Google (ответ 429) и случайные ошибки сервера (503). Нужна для тестов,
+бенчмарков и локального запуска без ключа сервис-аккаунта: включается
+настройкой GOOGLE_SHEETS_BACKEND=fake или через set_sheets_client.
+"""
+import json
+import random
+import re
+import threading
+import time
+from collections import Counter, defaultdict, deque
+from typing import Any, Callable, Optional
+
+import gspread
+from gspread.exceptions import APIError, WorksheetNotFound
+from requests import Response
+
+from ..config import GoogleSheetConfig
+from .google_sheets import GoogleSheetsClient
+
+
+RANGE_RE = re.compile(r'^([A-Z]+)(\d+):([A-Z]+)(\d+)$')
+
+
+def api_error(status: int, message: str = '') -> APIError:
+    """APIError с заданным HTTP-статусом, как его бросает gspread."""
+    response = Response()
+    response.status_code = status
+    response.reason = message
+    response._content = json.dumps({'error': {
+        'code': status, 'message': message, 'status': ''}}).encode()
+    return APIError(response)
+
+
+def _column_number(letters: str) -> int:
+    number = 0
+    for letter in letters:
+        number = number * 26 + ord(letter) - ord('A') + 1
+    return number
+
+
+class FakeSheetsBackend:
+    """
+    Общий для всех листов «сервер»: считает запросы и записанные
+    ячейки, добавляет задержку и бросает ошибки.
+    failures - ошибки для следующих запросов каждого метода по порядку
+    (None - успешный запрос), quota_per_minute - квота сервера.
+    """
+
+    def __init__(self, latency: float = 0.0,
+                 quota_per_minute: Optional[int] = None,
+                 error_rate: float = 0.0, seed: Optional[int] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        self.latency = latency
+        self.quota_per_minute = quota_per_minute
+        self.error_rate = error_rate
+        self.failures: defaultdict[str, list[Optional[APIError]]] = \
+            defaultdict(list)
+        self.calls: Counter[str] = Counter()
+        self.errors: Counter[int] = Counter()
+        self.cells_written = 0
+        self._random = random.Random(seed)
+        self._clock = clock
+        self._window: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    def request(self, method: str) -> None:
+        """Один запрос к API: задержка, учет и, возможно, ошибка."""
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            self.calls[method] += 1
+            failures = self.failures[method]
+            error = failures.pop(0) if failures else None
+            if error is None and self.quota_per_minute is not None:
+                now = self._clock()
+                while self._window and now - self._window[0] >= 60:
+                    self._window.popleft()
+                if len(self._window) >= self.quota_per_minute:
+                    error = api_error(429, 'Quota exceeded')
+                else:
+                    self._window.append(now)
+            if error is None and self._random.random() < self.error_rate:
+                error = api_error(503, 'Service unavailable')
+            if error is not None:
+                self.errors[error.response.status_code] += 1
+                raise error
+
+    @property
+    def total_calls(self) -> int:
+        return sum(self.calls.values())
+
+
+class FakeWorksheet:
+    """Лист: сетка row_count x col_count и заполненные строки."""
+
+    def __init__(self, backend: FakeSheetsBackend, title: str,
+                 rows: int = 1000, cols: int = 26):
+        self.backend = backend
+        self.title = title
+        self.row_count = rows
+        self.col_count = cols
+        self.cells: dict[int, list[str]] = {}
+        # диапазоны успешных batch_update по порядку
+        self.writes: list[str] = []
+
+    def clear(self) -> None:
+        self.backend.request('clear')
+        self.cells.clear()
+
+    def resize(self, rows: Optional[int] = None,
+               cols: Optional[int] = None) -> None:
+        self.backend.request('resize')
+        if rows is not None:
+            self.row_count = rows
+            self.cells = {n: row for n, row in self.cells.items()
+                          if n <= rows}
+        if cols is not None:
+            self.col_count = cols
+
+    def batch_update(self, data: list[dict], **kwargs: Any) -> None:
+        self.backend.request('batch_update')
+        parsed = []
+        for item in data:
+            match = RANGE_RE.match(item['range'])
+            if match is None:
+                raise api_error(400, f'Unable to parse range: '
+                                     f'{item["range"]}')
+            first, last = int(match[2]), int(match[4])
+            if last > self.row_count or \
+                    _column_number(match[3]) > self.col_count:
+                raise api_error(400, f'Range {item["range"]} exceeds '
+                                     f'grid limits')
+            if last - first + 1 != len(item['values']):
+                raise api_error(400, 'Row count does not match range')
+            parsed.append((first, item))
+        for first, item in parsed:
+            for n, row in enumerate(item['values'], start=first):
+                self.cells[n] = [str(value) for value in row]
+                self.backend.cells_written += len(row)
+            self.writes.append(item['range'])
+
+    def get_all_values(self) -> list[list[str]]:
+        self.backend.request('get_all_values')
+        if not self.cells:
+            return []
+        last = max(n for n, row in self.cells.items() if any(row))
+        return [self.cells.get(n, []) for n in range(1, last + 1)]
+
+    def column(self, n: int) -> list[str]:
+        """Непустые значения колонки n (с нуля) без запроса к API."""
+        return [self.cells[i][n] for i in sorted(self.cells)
+                if any(self.cells[i])]
+
+
+class FakeSpreadsheet:
+    def __init__(self, backend: FakeSheetsBackend,
+                 titles: tuple[str, ...]):
+        self.backend = backend
+        self.worksheets = {title: FakeWorksheet(backend, title)
+                           for title in titles}
+
+    def worksheet(self, title: str) -> FakeWorksheet:
+        self.backend.request('worksheet')
+        if title not in self.worksheets:
+            raise WorksheetNotFound(title)
+        return self.worksheets[title]
+
+
+class FakeSheetsClient(GoogleSheetsClient):
+    """
+    GoogleSheetsClient, который вместо Google подключается к
+    FakeSpreadsheet. Квота, чанки, повторы и пул потоков - те же, что
+    у настоящего клиента.
+    """
+
+    def __init__(self, config: GoogleSheetConfig,
+                 backend: Optional[FakeSheetsBackend] = None,
+                 titles: tuple[str, ...] = ('users', 'pairs')):
+        super().__init__(config)
+        self.backend = backend or FakeSheetsBackend()
+        self.spreadsheet = FakeSpreadsheet(self.backend, titles)
+
+    async def _connect(self) -> gspread.Spreadsheet:
+        return self.spreadsheet
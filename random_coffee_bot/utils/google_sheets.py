@@ -1,21 +1,153 @@
+"""
+Клиент Google Sheets для экспорта.
+
+Ничего не делает при импорте: авторизация, открытие таблицы и листов
+происходят при первом обращении, после чего хендлы кэшируются.
+Токен обновляется заранее, незадолго до истечения, а при ошибках
+авторизации или сети кэш сбрасывается, и следующее обращение
+подключается заново. Блокирующие вызовы gspread выполняются в
+отдельном ограниченном пуле потоков, чтобы не занимать пул по
+умолчанию, которым пользуются другие части бота.
+"""
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, UTC
+from typing import Any, Callable, Optional
+
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
+from google.auth.exceptions import RefreshError, TransportError
+from google.auth.transport.requests import Request
+from google.oauth2.service_account import Credentials
+from gspread.exceptions import APIError
 
-from ..config import load_config
+from ..config import GoogleSheetConfig, load_config
+from .sheets_writer import ProgressCallback, SheetsBatchWriter, WriteQuota
 
 
-config = load_config()
+logger = logging.getLogger(__name__)
 
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
-creds = ServiceAccountCredentials.from_json_keyfile_name(
-    'random_coffee_bot/credentials.json', scopes=SCOPES
-)
+# За сколько до истечения токена обновлять его заранее.
+TOKEN_REFRESH_MARGIN = timedelta(minutes=5)
+
+
+class GoogleSheetsClient:
+    """Ленивый асинхронный клиент одной Гугл Таблицы."""
+
+    # начальная задержка перед повтором запроса на 429/5xx, секунды
+    retry_base_delay: float = 1.0
+
+    def __init__(self, config: GoogleSheetConfig):
+        self.config = config
+        self.quota = WriteQuota(config.write_quota_per_minute)
+        self._executor = ThreadPoolExecutor(
+            max_workers=config.max_workers,
+            thread_name_prefix='google-sheets')
+        self._lock = asyncio.Lock()
+        self._credentials: Optional[Credentials] = None
+        self._spreadsheet: Optional[gspread.Spreadsheet] = None
+        self._worksheets: dict[str, gspread.Worksheet] = {}
+
+    async def run(self, func: Callable, *args: Any, **kwargs: Any) -> Any:
+        """
+        Выполняет блокирующий вызов gspread в пуле клиента. Если
+        вызов упал из-за авторизации или сети, сбрасывает кэш, чтобы
+        следующее обращение подключилось заново.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(
+                self._executor, functools.partial(func, *args, **kwargs))
+        except (RefreshError, TransportError):
+            self.reset()
+            raise
+        except APIError as e:
+            if e.response.status_code == 401:
+                self.reset()
+            raise
+
+    def reset(self) -> None:
+        """Забывает токен и хендлы таблицы и листов."""
+        if self._spreadsheet is not None:
+            logger.info('Сбрасываем подключение к Гугл Таблице.')
+        self._credentials = None
+        self._spreadsheet = None
+        self._worksheets.clear()
+
+    def _token_expires_soon(self) -> bool:
+        # google-auth хранит expiry как наивное время UTC
+        expiry = self._credentials.expiry
+        now = datetime.now(UTC).replace(tzinfo=None)
+        return (not self._credentials.token or expiry is None
+                or expiry - now < TOKEN_REFRESH_MARGIN)
+
+    async def _connect(self) -> gspread.Spreadsheet:
+        async with self._lock:
+            if self._credentials is None:
+                logger.info('Подключаемся к Гугл Таблице.')
+                self._credentials = await self.run(
+                    Credentials.from_service_account_file,
+                    self.config.credentials_file, scopes=SCOPES)
+            if self._token_expires_soon():
+                await self.run(self._credentials.refresh, Request())
+            if self._spreadsheet is None:
+                client = gspread.authorize(self._credentials)
+                self._spreadsheet = await self.run(client.open_by_key,
+                                                   self.config.sheet_id)
+            return self._spreadsheet
+
+    async def worksheet(self, title: str) -> gspread.Worksheet:
+        """Лист по имени. Хендл кэшируется до сброса подключения."""
+        spreadsheet = await self._connect()
+        if title not in self._worksheets:
+            self._worksheets[title] = await self.run(spreadsheet.worksheet,
+                                                     title)
+        return self._worksheets[title]
+
+    def writer(self, worksheet: gspread.Worksheet,
+               progress: Optional[ProgressCallback] = None
+               ) -> SheetsBatchWriter:
+        return SheetsBatchWriter(worksheet, self.quota,
+                                 chunk_rows=self.config.chunk_rows,
+                                 max_retries=self.config.max_retries,
+                                 base_delay=self.retry_base_delay,
+                                 progress=progress, runner=self.run)
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+_client: Optional[GoogleSheetsClient] = None
+
+
+def get_sheets_client() -> GoogleSheetsClient:
+    """
+    Общий клиент бота. Создается при первом обращении. При
+    GOOGLE_SHEETS_BACKEND=fake вместо Google используется таблица в
+    памяти (см. utils.fake_sheets).
+    """
+    global _client
+    if _client is None:
+        config = load_config().g_sheet
+        if config.backend == 'fake':
+            from .fake_sheets import FakeSheetsClient
+            _client = FakeSheetsClient(config)
+        else:
+            _client = GoogleSheetsClient(config)
+    return _client
+
 
-gc = gspread.authorize(creds)
+def set_sheets_client(client: GoogleSheetsClient) -> None:
+    """Подменяет общий клиент, например на FakeSheetsClient."""
+    global _client
+    _client = client
 
-SHEET_ID = config.g_sheet.sheet_id
-sh = gc.open_by_key(SHEET_ID)
 
-users_sheet = sh.worksheet('users')
-pairs_sheet = sh.worksheet('pairs')
+async def close_sheets_client() -> None:
+    global _client
+    if _client is not None:
+        _client.close()
+        _client = None
@@ -0,0 +1,99 @@
+"""
+Хранилище задач APScheduler, которое не блокирует цикл событий.
+
+AsyncIOScheduler вызывает методы хранилища синхронно из цикла событий,
+поэтому SQLAlchemyJobStore ходит в БД прямо в нем и на время каждого
+запроса задерживает обработку апдейтов. OffloadedJobStore держит задачи
+в памяти и отвечает на чтения из нее, а изменения записывает в
+хранилище в БД в отдельном потоке, строго по порядку. Из БД задачи
+читаются один раз - при старте планировщика, до начала поллинга.
+"""
+import asyncio
+import copy
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
+
+from apscheduler.job import Job
+from apscheduler.jobstores.base import BaseJobStore
+from apscheduler.jobstores.memory import MemoryJobStore
+
+
+logger = logging.getLogger(__name__)
+
+
+class OffloadedJobStore(BaseJobStore):
+    """
+    Обертка над хранилищем store (обычно SQLAlchemyJobStore). Записи
+    выполняются в фоне одним потоком; ошибки записи пишутся в лог, а
+    состояние в памяти остается верным до перезапуска.
+    """
+
+    def __init__(self, store: BaseJobStore):
+        self.store = store
+        self._memory = MemoryJobStore()
+        # один поток, чтобы записи шли в БД в том же порядке
+        self._executor = ThreadPoolExecutor(max_workers=1,
+                                            thread_name_prefix='job-store')
+
+    def start(self, scheduler: Any, alias: str) -> None:
+        super().start(scheduler, alias)
+        self._memory.start(scheduler, alias)
+        self.store.start(scheduler, alias)
+        for job in self.store.get_all_jobs():
+            self._memory.add_job(job)
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=True)
+        self.store.shutdown()
+
+    async def flush(self) -> None:
+        """Ждет, пока все изменения будут записаны в хранилище."""
+        await asyncio.wrap_future(self._executor.submit(lambda: None))
+
+    def _write(self, method: Callable[..., None], *args: Any) -> None:
+        def run() -> None:
+            try:
+                method(*args)
+            except Exception:
+                logger.exception(f'Ошибка записи в хранилище задач: '
+                                 f'{method.__name__}')
+
+        self._executor.submit(run)
+
+    @staticmethod
+    def _snapshot(job: Job) -> Job:
+        # планировщик меняет объекты задач на месте, поэтому в поток
+        # уходит копия состояния на момент изменения
+        return copy.copy(job)
+
+    def lookup_job(self, job_id: str) -> Job | None:
+        return self._memory.lookup_job(job_id)
+
+    def get_due_jobs(self, now: Any) -> list[Job]:
+        return self._memory.get_due_jobs(now)
+
+    def get_next_run_time(self) -> Any:
+        return self._memory.get_next_run_time()
+
+    def get_all_jobs(self) -> list[Job]:
+        return self._memory.get_all_jobs()
+
+    def add_job(self, job: Job) -> None:
+        self._memory.add_job(job)
+        self._write(self.store.add_job, self._snapshot(job))
+
+    def update_job(self, job: Job) -> None:
+        self._memory.update_job(job)
+        self._write(self.store.update_job, self._snapshot(job))
+
+    def remove_job(self, job_id: str) -> None:
+        self._memory.remove_job(job_id)
+        self._write(self.store.remove_job, job_id)
+
+    def remove_all_jobs(self) -> None:
+        self._memory.remove_all_jobs()
+        self._write(self.store.remove_all_jobs)
+
+    def __repr__(self) -> str:
+        return f'<{self.__class__.__name__} ({self.store!r})>'
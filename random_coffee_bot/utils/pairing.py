@@ -4,10 +4,13 @@ from collections import defaultdict
 from datetime import datetime, UTC
 
 from aiogram import Bot
-from sqlalchemy import select, func, or_, cast, Date, bindparam
+from sqlalchemy import select, func, or_, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
 
-from ..database.models import User, Pair, Setting
+from ..database.backend import utc_today, weeks_before
+from ..database.models import (User, Pair, PairHistorySummary, PairMember,
+                               Setting)
 from ..services.admin_service import (notify_admins_about_pairing,
                                       notify_users_about_pairs)
 
@@ -32,19 +35,17 @@ async def get_users_ready_for_pairing(session: AsyncSession) -> list['User']:
         select(Setting.global_interval).where(Setting.id == 1))
     global_interval_weeks = setting_result.scalar_one()
 
-    today_date = cast(func.timezone('UTC', func.now()), Date)
+    today_date = utc_today()
     coalesced_weeks = func.coalesce(User.pairing_interval,
                                     bindparam('global_weeks'))
-    threshold_datetime = (func.timezone('UTC', func.now())
-                          - func.make_interval(0, 0, coalesced_weeks))
-    threshold_date = cast(threshold_datetime, Date)
+    threshold_date = weeks_before(today_date, coalesced_weeks)
 
     stmt = (
         select(User).where(
             User.is_active.is_(True),
             or_(User.pause_until.is_(None), User.pause_until <= today_date),
             or_(User.last_paired_at.is_(None),
-                cast(User.last_paired_at, Date) <= threshold_date))
+                User.last_paired_at <= threshold_date))
     )
 
     users_result = await session.execute(
@@ -52,21 +53,43 @@ async def get_users_ready_for_pairing(session: AsyncSession) -> list['User']:
     return list(users_result.scalars().all())
 
 
+async def get_pair_history(session: AsyncSession,
+                           user_ids: list[int]) -> dict[tuple[int, int], int]:
+    """
+    Считает, сколько раз каждые двое из user_ids уже встречались.
+    Ключ - (меньший id, больший id). Читается только история переданных
+    юзеров: недавние встречи по индексу pair_member, встречи из
+    архивированных секций pair - из pair_history_summary.
+    """
+    member = aliased(PairMember)
+    partner = aliased(PairMember)
+    stmt = (
+        select(member.user_id, partner.user_id, func.count())
+        .join(partner, (partner.pair_id == member.pair_id)
+              & (partner.user_id > member.user_id))
+        .where(member.user_id.in_(user_ids),
+               partner.user_id.in_(user_ids))
+        .group_by(member.user_id, partner.user_id)
+    )
+    result = await session.execute(stmt)
+    history = {(u1, u2): count for u1, u2, count in result}
+
+    archived = await session.execute(
+        select(PairHistorySummary.user_low_id,
+               PairHistorySummary.user_high_id,
+               PairHistorySummary.meetings)
+        .where(PairHistorySummary.user_low_id.in_(user_ids),
+               PairHistorySummary.user_high_id.in_(user_ids)))
+    for u1, u2, count in archived:
+        history[(u1, u2)] = history.get((u1, u2), 0) + count
+    return history
+
+
 async def generate_unique_pairs(session, users: list[User]) -> list[Pair]:
     """Формирует пары, минимизируя количество повторений."""
 
-    result = await session.execute(
-        select(Pair.user1_id, Pair.user2_id, Pair.user3_id))
     history = defaultdict(int)  # (min_id, max_id) -> count
-
-    for row in result.fetchall():
-        ids = [row.user1_id, row.user2_id]
-        if row.user3_id:
-            ids.append(row.user3_id)
-        ids = sorted(ids)
-        for i in range(len(ids)):
-            for j in range(i + 1, len(ids)):
-                history[(ids[i], ids[j])] += 1
+    history.update(await get_pair_history(session, [u.id for u in users]))
 
     random.shuffle(users)
     user_ids = [u.id for u in users]
@@ -2,18 +2,25 @@ import logging
 from datetime import datetime, timedelta, timezone
 
 from apscheduler.events import EVENT_JOB_EXECUTED
+from apscheduler.jobstores.base import JobLookupError
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.cron import CronTrigger
 from apscheduler.triggers.interval import IntervalTrigger
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..config import load_config
-from ..database.db import AsyncSessionLocal
+from ..database.db import create_sync_engine_from_config
 from ..database.models import Setting
+from ..database.partitions import (archive_pair_partitions,
+                                   ensure_pair_partitions)
 from ..globals import job_context
-from ..services.admin_service import get_admin_list
+from ..services.admin_service import clear_expired_pauses, get_admin_list
 from ..services.constants import DATE_TIME_FORMAT_LOCALTIME
 from ..texts import ADMIN_TEXTS
+from ..utils import setting_events
+from ..utils.job_store import OffloadedJobStore
 from ..utils.pairing import auto_pairing
 
 
@@ -21,19 +28,23 @@ logger = logging.getLogger(__name__)
 
 config = load_config()
 bot_timezone = config.time.zone
-db_url = config.db.db_url
 
-DATABASE_URL = db_url.replace('+asyncpg', '+psycopg')
+# Задачи хранятся в БД, но запросы к ней идут в отдельном потоке,
+# чтобы не задерживать обработку апдейтов (см. utils.job_store).
+job_store = OffloadedJobStore(SQLAlchemyJobStore(
+    engine=create_sync_engine_from_config(config.db)))
 
 scheduler = AsyncIOScheduler(
-    jobstores={
-        'default': SQLAlchemyJobStore(url=DATABASE_URL)
-    },
+    jobstores={'default': job_store},
     timezone='UTC'
 )
 
 current_interval = None
 
+# Раньше смена интервала проверялась задачей с этим id раз в минуту.
+# Она могла остаться в хранилище задач, поэтому удаляется при старте.
+LEGACY_RELOAD_JOB_ID = 'reload_jobs_checker'
+
 
 async def auto_pairing_wrapper():
     session_maker = job_context.session_maker
@@ -48,7 +59,8 @@ async def auto_pairing_wrapper():
                         '(флаг в настройках).')
             return
 
-    admin_ids = [admin.telegram_id for admin in await get_admin_list()]
+        admin_ids = [admin.telegram_id
+                     for admin in await get_admin_list(session)]
     super_admins = job_context.admin_id_list
     all_admin_list = list(set(admin_ids + super_admins))
 
@@ -57,6 +69,35 @@ async def auto_pairing_wrapper():
                        all_admin_list)
 
 
+async def pair_partitions_maintenance_wrapper():
+    """
+    Создает секции pair на будущие годы и архивирует старые.
+    Секционирование есть только в PostgreSQL.
+    """
+    session_maker = job_context.session_maker
+    maintenance = config.maintenance
+
+    async with session_maker() as session:
+        if session.bind.dialect.name != 'postgresql':
+            return
+        await ensure_pair_partitions(
+            session, maintenance.pair_partitions_ahead_years)
+        await archive_pair_partitions(
+            session,
+            maintenance.pair_archive_after_years,
+            maintenance.pair_archive_detach)
+
+
+async def expire_pauses_wrapper():
+    """Снимает паузы, срок которых истек."""
+    session_maker = job_context.session_maker
+
+    async with session_maker() as session:
+        expired = await clear_expired_pauses(session)
+        await session.commit()
+    logger.info(f'⏯ Снято истекших пауз: {expired}')
+
+
 async def reload_scheduled_wrapper():
     _, _, session_maker = job_context.get_context()
     await reload_scheduled_jobs(session_maker)
@@ -73,7 +114,7 @@ def show_next_runs(scheduler: AsyncIOScheduler):
                      f'{next_run_localtime.strftime(DATE_TIME_FORMAT_LOCALTIME) if next_run_localtime else "нет запланированного запуска"}')
 
 
-async def get_next_pairing_date() -> str | None:
+async def get_next_pairing_date(session: AsyncSession) -> str | None:
     """
     Возвращает дату, когда состоится следующее формирование пар
     согласно планировщику задач.
@@ -81,10 +122,9 @@ async def get_next_pairing_date() -> str | None:
     job = next((job for job in scheduler.get_jobs()
                 if job.id == 'auto_pairing_weekly'), None)
 
-    async with AsyncSessionLocal() as session:
-        result = await session.execute(select(Setting.is_pairing_on)
-                                       .where(Setting.id == 1))
-        is_pairing_on = result.scalar_one()
+    result = await session.execute(select(Setting.is_pairing_on)
+                                   .where(Setting.id == 1))
+    is_pairing_on = result.scalar_one()
 
     if job:
         next_run_utc = job.next_run_time
@@ -172,6 +212,11 @@ async def schedule_pairing_jobs(session_maker):
     if not scheduler.running:
         scheduler.add_listener(job_listener, EVENT_JOB_EXECUTED)
         scheduler.start()
+        try:
+            scheduler.remove_job(LEGACY_RELOAD_JOB_ID)
+            logger.info(f'🗑 Задача {LEGACY_RELOAD_JOB_ID} удалена.')
+        except JobLookupError:
+            pass
 
     if current_interval != setting_interval:
         logger.info(
@@ -189,16 +234,43 @@ async def schedule_pairing_jobs(session_maker):
     start_date_for_feedback_dispatcher = await schedule_feedback_dispatcher_for_auto_pairing(
         start_date_for_auto_pairing)
 
-    schedule_or_reschedule('reload_jobs_checker',
-                           reload_scheduled_wrapper,
-                           1,
-                           session_maker,
-                           start_date=start_date_for_auto_pairing,
-                           misfire_grace_time=60)  # Для прода: misfire_grace_time=86400 (для теста 3600 - 1 час)
-
     show_next_runs(scheduler)
 
 
+def watch_interval_changes():
+    """
+    Перепланирует auto_pairing_weekly сразу после смены глобального
+    интервала (см. utils.setting_events) вместо ежеминутной проверки.
+    """
+    setting_events.subscribe(reload_scheduled_wrapper)
+
+
+async def shutdown_scheduler():
+    """Останавливает планировщик и дожидается записи задач в БД."""
+    if scheduler.running:
+        await job_store.flush()
+        scheduler.shutdown(wait=False)
+
+
+def schedule_maintenance_jobs():
+    """Ежедневные задачи обслуживания БД, в ночное время по UTC."""
+    scheduler.add_job(
+        expire_pauses_wrapper,
+        trigger=CronTrigger(hour=0, minute=5),
+        id='expire_pauses',
+        replace_existing=True,
+        misfire_grace_time=3600,
+    )
+    scheduler.add_job(
+        pair_partitions_maintenance_wrapper,
+        trigger=CronTrigger(hour=3, minute=0),
+        id='pair_partitions_maintenance',
+        replace_existing=True,
+        misfire_grace_time=3600,
+    )
+    logger.info('🧹 Задачи обслуживания БД запланированы.')
+
+
 async def reload_scheduled_jobs(session_maker):
     async with session_maker() as session:
         result = await session.execute(
@@ -0,0 +1,174 @@
+"""
+События об изменении настроек бота.
+
+Пока событие одно - смена глобального интервала, после которой
+планировщик должен перепланировать auto_pairing_weekly. Подписчики
+в этом процессе получают событие сразу после коммита транзакции, в
+которой поменялся интервал. В PostgreSQL та же транзакция отправляет
+NOTIFY, и остальные процессы бота получают событие через
+SettingsListener (LISTEN на отдельном соединении). Свой NOTIFY процесс
+тоже получает, поэтому подписчики должны спокойно переносить повторы.
+"""
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Optional
+
+from sqlalchemy import event, func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, \
+    AsyncSession
+from sqlalchemy.orm import Session
+
+from ..database.backend import dialect_name
+
+
+logger = logging.getLogger(__name__)
+
+CHANNEL = 'global_interval_changed'
+_PENDING_KEY = 'global_interval_changed'
+
+Subscriber = Callable[[], Awaitable[None]]
+
+_subscribers: list[Subscriber] = []
+_tasks: set[asyncio.Task] = set()
+
+
+def subscribe(callback: Subscriber) -> None:
+    _subscribers.append(callback)
+
+
+def unsubscribe(callback: Subscriber) -> None:
+    _subscribers.remove(callback)
+
+
+async def _run_subscriber(callback: Subscriber) -> None:
+    try:
+        await callback()
+    except Exception:
+        logger.exception('Ошибка в обработчике смены интервала')
+
+
+def publish() -> None:
+    """Запускает подписчиков в фоне и не ждет их завершения."""
+    for callback in list(_subscribers):
+        task = asyncio.ensure_future(_run_subscriber(callback))
+        _tasks.add(task)
+        task.add_done_callback(_tasks.discard)
+
+
+async def notify_interval_changed(session: AsyncSession,
+                                  interval: int) -> None:
+    """
+    Вызывается в транзакции, которая меняет интервал. Событие уйдет
+    только после ее коммита, при откате - не уйдет.
+    """
+    session.info[_PENDING_KEY] = interval
+    if dialect_name(session) == 'postgresql':
+        # NOTIFY доставляется слушателям при коммите
+        await session.execute(select(func.pg_notify(CHANNEL,
+                                                    str(interval))))
+
+
+@event.listens_for(Session, 'after_commit')
+def _publish_after_commit(session: Session) -> None:
+    interval = session.info.pop(_PENDING_KEY, None)
+    if interval is not None:
+        logger.info(f'Глобальный интервал изменен на {interval}.')
+        publish()
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session: Session) -> None:
+    session.info.pop(_PENDING_KEY, None)
+
+
+class SettingsListener:
+    """
+    Слушает канал CHANNEL и передает уведомления подписчикам. Держит
+    одно соединение из пула engine; после обрыва переподключается через
+    reconnect_delay секунд и на всякий случай публикует событие, так
+    как уведомления за время обрыва потеряны. Работает только с
+    PostgreSQL через asyncpg.
+    Полуоткрытое TCP-соединение (например, после перезапуска сервера
+    за NAT) asyncpg сам не замечает, поэтому раз в ping_interval секунд
+    соединение проверяется запросом SELECT 1. Если ответа нет за
+    ping_timeout секунд, соединение считается оборванным.
+    """
+
+    def __init__(self, engine: AsyncEngine, reconnect_delay: float = 5.0,
+                 ping_interval: float = 60.0, ping_timeout: float = 10.0):
+        self.engine = engine
+        self.reconnect_delay = reconnect_delay
+        self.ping_interval = ping_interval
+        self.ping_timeout = ping_timeout
+        self._task: Optional[asyncio.Task] = None
+        # установлен, пока подписка активна
+        self.listening = asyncio.Event()
+
+    def start(self) -> bool:
+        """Возвращает False, если СУБД не поддерживает LISTEN."""
+        if self.engine.dialect.name != 'postgresql' or \
+                self.engine.dialect.driver != 'asyncpg':
+            return False
+        self._task = asyncio.create_task(self._run())
+        return True
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def _on_notify(self, connection: Any, pid: int, channel: str,
+                   payload: str) -> None:
+        logger.info(f'Уведомление {channel} от процесса {pid}: '
+                    f'интервал {payload}.')
+        publish()
+
+    async def _listen(self, conn: AsyncConnection, resync: bool) -> None:
+        raw = await conn.get_raw_connection()
+        driver = raw.driver_connection
+        lost = asyncio.Event()
+        driver.add_termination_listener(lambda _: lost.set())
+        await driver.add_listener(CHANNEL, self._on_notify)
+        logger.info(f'Подписка на {CHANNEL} включена.')
+        self.listening.set()
+        if resync:
+            publish()
+        try:
+            while not lost.is_set():
+                try:
+                    await asyncio.wait_for(lost.wait(), self.ping_interval)
+                except TimeoutError:
+                    await self._ping(driver)
+        finally:
+            self.listening.clear()
+
+    async def _ping(self, driver: Any) -> None:
+        try:
+            # запрос идет мимо SQLAlchemy, чтобы не открывать транзакцию
+            await asyncio.wait_for(driver.fetchval('SELECT 1'),
+                                   self.ping_timeout)
+        except TimeoutError:
+            raise ConnectionError(f'Соединение с подпиской на {CHANNEL} '
+                                  f'не ответило за {self.ping_timeout} с.'
+                                  ) from None
+
+    async def _run(self) -> None:
+        reconnect = False
+        while True:
+            try:
+                async with self.engine.connect() as conn:
+                    try:
+                        await self._listen(conn, resync=reconnect)
+                    finally:
+                        # подписка остается на соединении, поэтому
+                        # в пул его не возвращаем
+                        await conn.invalidate()
+                logger.warning(f'Соединение с подпиской на {CHANNEL} '
+                               f'оборвалось.')
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception(f'Ошибка подписки на {CHANNEL}')
+            reconnect = True
+            await asyncio.sleep(self.reconnect_delay)
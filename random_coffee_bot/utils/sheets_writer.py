@@ -0,0 +1,194 @@
+"""
+Запись строк в лист Гугл Таблицы порциями с учетом квоты API.
+
+Google Sheets API ограничивает число запросов на запись в минуту и
+размер одного запроса, поэтому строки отправляются чанками через
+batch_update, а каждый запрос сначала получает место в квоте. На 429
+и 5xx запрос повторяется с экспоненциальной задержкой и джиттером.
+После каждого записанного чанка вызывается on_chunk: в нем вызывающий
+код сохраняет, что уже выгружено, и при повторе после сбоя продолжает
+с первого незаписанного чанка.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import deque
+from typing import (Any, AsyncIterable, AsyncIterator, Awaitable, Callable,
+                    Optional, Sequence)
+
+from gspread.exceptions import APIError
+
+
+logger = logging.getLogger(__name__)
+
+SheetRow = tuple[int, Sequence[str]]
+ProgressCallback = Callable[[int, int], Awaitable[None]]
+ChunkCallback = Callable[[Sequence[SheetRow]], Awaitable[None]]
+Runner = Callable[..., Awaitable[Any]]
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def row_range(first_row: int, last_row: int, width: int) -> str:
+    """Диапазон A{first_row}:{колонка}{last_row} для width колонок."""
+    return f'A{first_row}:{chr(ord("A") + width - 1)}{last_row}'
+
+
+class WriteQuota:
+    """
+    Скользящее окно запросов на запись: не больше limit запросов за
+    period секунд. Один объект на все листы, так как квота Google
+    считается на сервис-аккаунт.
+    """
+
+    def __init__(self, limit: int, period: float = 60.0,
+                 clock: Callable[[], float] = time.monotonic):
+        self.limit = limit
+        self.period = period
+        self._clock = clock
+        self._calls: deque[float] = deque()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = self._clock()
+                while self._calls and now - self._calls[0] >= self.period:
+                    self._calls.popleft()
+                if len(self._calls) < self.limit:
+                    self._calls.append(now)
+                    return
+                delay = self._calls[0] + self.period - now
+                logger.info(f'Квота записи в Гугл Таблицы исчерпана, '
+                            f'ждем {delay:.1f} с.')
+                await asyncio.sleep(delay)
+
+
+class SheetsBatchWriter:
+    """
+    Пишет строки (номер строки, значения) в лист чанками не больше
+    chunk_rows строк. Соседние строки внутри чанка объединяются в один
+    диапазон, весь чанк уходит одним batch_update.
+    Блокирующие вызовы gspread выполняет runner (по умолчанию - пул
+    потоков цикла событий).
+    """
+
+    def __init__(self, worksheet: Any, quota: WriteQuota,
+                 chunk_rows: int = 500, max_retries: int = 5,
+                 base_delay: float = 1.0, max_delay: float = 64.0,
+                 progress: Optional[ProgressCallback] = None,
+                 runner: Optional[Runner] = None):
+        self.worksheet = worksheet
+        self.quota = quota
+        self.chunk_rows = chunk_rows
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.progress = progress
+        self.runner = runner or self._run_in_default_executor
+
+    @staticmethod
+    async def _run_in_default_executor(func: Callable, *args) -> Any:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, func, *args)
+
+    async def _call(self, func: Callable, *args) -> Any:
+        """Запрос на запись с учетом квоты и повторами на 429/5xx."""
+        attempt = 0
+        while True:
+            await self.quota.acquire()
+            try:
+                return await self.runner(func, *args)
+            except APIError as e:
+                status = e.response.status_code
+                if status not in RETRY_STATUSES or \
+                        attempt >= self.max_retries:
+                    raise
+                delay = random.uniform(
+                    0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                attempt += 1
+                logger.warning(f'Google Sheets ответил {status}, повтор '
+                               f'{attempt}/{self.max_retries} через '
+                               f'{delay:.1f} с.')
+                await asyncio.sleep(delay)
+
+    async def clear(self) -> None:
+        await self._call(self.worksheet.clear)
+
+    async def ensure_rows(self, rows: int) -> None:
+        """Расширяет сетку листа, если в ней меньше rows строк."""
+        if self.worksheet.row_count < rows:
+            await self._call(self.worksheet.resize, rows)
+
+    def chunks(self, rows: Sequence[SheetRow]) -> list[list[SheetRow]]:
+        ordered = sorted(rows, key=lambda r: r[0])
+        return [ordered[i:i + self.chunk_rows]
+                for i in range(0, len(ordered), self.chunk_rows)]
+
+    @staticmethod
+    def chunk_ranges(chunk: Sequence[SheetRow]) -> list[dict]:
+        width = max(len(values) for _, values in chunk)
+        ranges: list[dict] = []
+        first = last = None
+        values: list[list[str]] = []
+        for n, row in chunk:
+            if last is not None and n != last + 1:
+                ranges.append({'range': row_range(first, last, width),
+                               'values': values})
+                first, values = None, []
+            if first is None:
+                first = n
+            last = n
+            values.append(list(row) + [''] * (width - len(row)))
+        ranges.append({'range': row_range(first, last, width),
+                       'values': values})
+        return ranges
+
+    async def _write_chunks(self, chunks: AsyncIterable[Sequence[SheetRow]],
+                            total: Optional[int],
+                            on_chunk: Optional[ChunkCallback]) -> int:
+        done = 0
+        async for rows in chunks:
+            if not rows:
+                continue
+            if done == 0 and total:
+                # строки идут подряд: расширяем сетку один раз на все
+                await self.ensure_rows(min(n for n, _ in rows) + total - 1)
+            for chunk in self.chunks(rows):
+                await self.ensure_rows(chunk[-1][0])
+                await self._call(self.worksheet.batch_update,
+                                 self.chunk_ranges(chunk))
+                if on_chunk is not None:
+                    await on_chunk(chunk)
+                done += len(chunk)
+                logger.debug(f'Записано строк {done} из {total or "?"}.')
+                if self.progress is not None:
+                    await self.progress(done, max(total or 0, done))
+        return done
+
+    async def write_rows(self, rows: Sequence[SheetRow],
+                         on_chunk: Optional[ChunkCallback] = None) -> int:
+        """
+        Записывает строки чанками по возрастанию номеров строк.
+        on_chunk вызывается после каждого успешно записанного чанка.
+        Возвращает количество записанных строк.
+        """
+        if not rows:
+            return 0
+        await self.ensure_rows(max(n for n, _ in rows))
+
+        async def single() -> AsyncIterator[Sequence[SheetRow]]:
+            yield rows
+        return await self._write_chunks(single(), len(rows), on_chunk)
+
+    async def write_stream(self, chunks: AsyncIterable[Sequence[SheetRow]],
+                           total: Optional[int] = None,
+                           on_chunk: Optional[ChunkCallback] = None) -> int:
+        """
+        Как write_rows, но строки приходят порциями по мере чтения из
+        БД, и в памяти держится только текущая порция. Номера строк
+        должны возрастать от порции к порции. total (если известно)
+        нужно только для отчета о прогрессе.
+        """
+        return await self._write_chunks(chunks, total, on_chunk)
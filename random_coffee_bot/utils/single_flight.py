@@ -0,0 +1,107 @@
+import asyncio
+import functools
+import logging
+from typing import Any, Awaitable, Callable, TypeVar
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from ..metrics import registry
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+_HAS_WRITES_KEY = 'single_flight_has_writes'
+
+_in_flight: dict[tuple, asyncio.Future] = {}
+
+
+class _LeaderCancelled(Exception):
+    """Запрос, результат которого ждали, был отменен."""
+
+
+@event.listens_for(Session, 'after_flush')
+def _mark_session_has_writes(session: Session, flush_context) -> None:
+    session.info[_HAS_WRITES_KEY] = True
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_session_executes_dml(orm_execute_state) -> None:
+    # update()/delete()/insert() через session.execute идут мимо flush
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info[_HAS_WRITES_KEY] = True
+
+
+@event.listens_for(Session, 'after_commit')
+@event.listens_for(Session, 'after_rollback')
+def _reset_session_has_writes(session: Session) -> None:
+    session.info.pop(_HAS_WRITES_KEY, None)
+
+
+def _session_has_writes(session: AsyncSession) -> bool:
+    """
+    Проверяет, есть ли в текущей транзакции сессии незакоммиченные
+    изменения. Такой сессии нельзя отдавать результат чужого запроса:
+    он не увидит ее собственных записей.
+    """
+    return bool(session.info.get(_HAS_WRITES_KEY)
+                or session.new or session.dirty or session.deleted)
+
+
+def single_flight(func: Callable[..., Awaitable[T]]
+                  ) -> Callable[..., Awaitable[T]]:
+    """
+    Декоратор для сервисных функций, которые только читают из БД.
+    Первым аргументом функция принимает сессию, остальные аргументы
+    образуют ключ. Если запрос с тем же ключом уже выполняется, вызов
+    не идет в БД, а ждет результат уже запущенного запроса.
+
+    Результат не кэшируется: как только запрос завершился, следующий
+    вызов снова идет в БД. Сессии с незакоммиченными изменениями
+    выполняют запрос сами, чтобы видеть свои записи.
+    """
+    name = f'{func.__module__}.{func.__qualname__}'
+
+    @functools.wraps(func)
+    async def wrapper(session: AsyncSession, *args: Any, **kwargs: Any) -> T:
+        if _session_has_writes(session):
+            registry.counter('single_flight_calls_total',
+                             func=func.__name__, outcome='bypass').inc()
+            return await func(session, *args, **kwargs)
+
+        key = (name, args, tuple(sorted(kwargs.items())))
+        future = _in_flight.get(key)
+        if future is not None:
+            registry.counter('single_flight_calls_total',
+                             func=func.__name__, outcome='follower').inc()
+            logger.debug(f'Запрос {name} уже выполняется, ждем результат.')
+            try:
+                return await asyncio.shield(future)
+            except _LeaderCancelled:
+                return await func(session, *args, **kwargs)
+
+        future = asyncio.get_running_loop().create_future()
+        _in_flight[key] = future
+        registry.counter('single_flight_calls_total',
+                         func=func.__name__, outcome='leader').inc()
+        try:
+            result = await func(session, *args, **kwargs)
+        except asyncio.CancelledError:
+            future.set_exception(_LeaderCancelled())
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del _in_flight[key]
+            # Исключение уже передано ожидающим вызовам, если они есть.
+            if future.done() and not future.cancelled():
+                future.exception()
+
+    return wrapper